@@ -0,0 +1,260 @@
+# coding=utf-8
+
+"""Synthetic OF documentation, for the benchmarks of generate-index.py and open-documentation.py.
+
+Usage
+=====
+
+python benchmarks/corpus.py [--scale S] [--seed N] directory
+
+Write a documentation tree like the documentation directory of ofSite in directory/documentation:
+class files (ofThing.markdown) and functions files (ofThing_functions.markdown) spread over the
+modules directories and an addons directory, with the headings structure read by generate-index.py:
+
+    #class ofThing
+
+    ##Description
+    ...
+    ##Methods
+
+    ###void draw(float x, float y)
+    ...
+
+The scale 1 is the size of the OF documentation: about 800 classes and global functions, and 2,400
+methods names, many of them shared by several classes (draw, setup, getWidth...). Some functions
+and methods are overloaded. The same seed always writes the same files.
+
+At every scale, the corpus also has a few overloads of the OF documentation (OVERLOADS), with
+glm:: types, references and default values, and the calls they must resolve to (CALLS).
+
+The benchmarks import this module to write the corpus and to know the index it must produce.
+
+"""
+
+import os
+import random
+import argparse
+
+# At scale 1
+CLASS_COUNT = 320
+FUNCTIONS_FILE_COUNT = 60
+FUNCTIONS_PER_FILE = 8
+# Methods names specific to a few classes, and methods each class takes from the common ones
+METHOD_NAME_COUNT = 2360
+METHODS_PER_CLASS = 8
+
+# Methods names used by many classes
+COMMON_METHODS = [
+    'draw', 'setup', 'update', 'clear', 'begin', 'end', 'load', 'save', 'allocate', 'bind', 'unbind',
+    'getWidth', 'getHeight', 'setWidth', 'setHeight', 'getPosition', 'setPosition', 'isAllocated',
+    'isLoaded', 'close', 'open', 'start', 'stop', 'play', 'pause', 'reset', 'resize', 'set', 'get',
+    'size', 'enable', 'disable', 'getTexture', 'setColor', 'getColor', 'getName', 'exit', 'send',
+    'receive', 'getId' ]
+COMMON_METHODS_PER_CLASS = 4
+
+MODULES = [ '3d', 'app', 'communication', 'events', 'gl', 'graphics', 'math', 'sound', 'types',
+            'utils', 'video', 'addons/ofxGui', 'addons/ofxOsc', 'addons/ofxAssimpModelLoader' ]
+
+TYPES = [ 'void', 'int', 'float', 'bool', 'ofPoint', 'string', 'ofColor', 'ofVec3f &' ]
+PARAMETERS = [ 'float x', 'float y', 'int index', 'const ofPoint &p', 'bool enabled', 'string name',
+               'const ofColor &color', 'int width, int height' ]
+
+# Files with known overloads, like Corpus.files, and the calls of open-documentation.py that
+# must resolve to them: ( call, the ( class name, signature ) of the best overloads )
+OVERLOADS_FILES = [
+    ( 'graphics/ofGraphics_functions.markdown', None, [
+        ( 'void', 'ofDrawCircle', 'float x, float y, float radius' ),
+        ( 'void', 'ofDrawCircle', 'float x, float y, float z, float radius' ),
+        ( 'void', 'ofDrawCircle', 'const glm::vec2 &p, float radius' ),
+        ( 'void', 'ofDrawCircle', 'const glm::vec3 &p, float radius' ),
+        ( 'void', 'ofDrawBitmapString', 'const std::string &textString, float x, float y' ),
+        ( 'void', 'ofDrawBitmapString', 'const std::string &textString, const glm::vec3 &p' ) ] ),
+    ( 'graphics/ofImage_.markdown', 'ofImage_', [
+        ( 'void', 'draw', 'float x, float y' ),
+        ( 'void', 'draw', 'const glm::vec3 &pos, float w, float h' ) ] ),
+    ( 'gl/ofTexture.markdown', 'ofTexture', [
+        ( 'void', 'draw', 'const glm::vec2 &p, float scale = 1.0f' ) ] ) ]
+CALLS = [
+    ( 'ofDrawCircle(x, y, r)', [ ( '', 'void ofDrawCircle(float x, float y, float radius)' ) ] ),
+    ( 'ofDrawCircle(1.5f, 2, 3, 4)', [ ( '', 'void ofDrawCircle(float x, float y, float z, float radius)' ) ] ),
+    ( 'ofDrawCircle(glm::vec2(0, 0), 10)', [ ( '', 'void ofDrawCircle(const glm::vec2 &p, float radius)' ) ] ),
+    ( 'ofDrawCircle(const glm::vec3 &center, float r)', [ ( '', 'void ofDrawCircle(const glm::vec3 &p, float radius)' ) ] ),
+    ( 'ofDrawCircle(x)', [] ),
+    ( 'ofDrawCircle("red", 1, 2)', [] ),
+    ( 'ofDrawBitmapString("fps", 10, 20)', [ ( '', 'void ofDrawBitmapString(const std::string &textString, float x, float y)' ) ] ),
+    ( 'ofDrawBitmapString(std::string text, glm::vec3 p)', [ ( '', 'void ofDrawBitmapString(const std::string &textString, const glm::vec3 &p)' ) ] ),
+    ( 'image.draw(glm::vec2, float)', [ ( 'ofTexture', 'void draw(const glm::vec2 &p, float scale = 1.0f)' ) ] ),
+    ( 'texture.draw(glm::vec2(1, 2))', [ ( 'ofTexture', 'void draw(const glm::vec2 &p, float scale = 1.0f)' ) ] ),
+    ( 'ofImage_::draw(const glm::vec3 &p, float w, float h)', [ ( 'ofImage_', 'void draw(const glm::vec3 &pos, float w, float h)' ) ] ) ]
+
+CLASS_TEMPLATE = '''#class %(className)s
+
+<!--
+_visible: True
+_advanced: False
+_istemplated: False
+_extends: %(extends)s
+-->
+
+##InlineDescription
+
+%(description)s
+
+##Description
+
+%(description)s
+
+~~~~{.cpp}
+%(className)s thing;
+thing.setup();
+~~~~
+
+##Methods
+
+%(methods)s
+##Variables
+
+###int width
+
+_description: _
+
+The width.
+
+'''
+
+METHOD_TEMPLATE = '''###%(returnType)s %(name)s(%(parameters)s)
+
+<!--
+_syntax: %(name)s(%(parameters)s)
+_name: %(name)s
+_returns: %(returnType)s
+_visible: True
+-->
+
+_inlined_description: _
+
+%(description)s
+
+_description: _
+
+%(description)s
+
+<!----------------------------------------------------------------------------->
+
+'''
+
+FUNCTIONS_TEMPLATE = '''#functions
+
+<!--
+_visible: True
+-->
+
+##Functions
+
+%(functions)s'''
+
+
+###################################################################################################
+
+class Corpus( object ):
+
+    """The files of a synthetic documentation, and the index they make"""
+
+    def __init__( self, scale = 1, seed = 1 ):
+        self.scale = scale
+        self.seed = seed
+        classCount = int( CLASS_COUNT * scale )
+        functionsFileCount = int( FUNCTIONS_FILE_COUNT * scale )
+        methodNames = [ 'method%dOf%s' % ( number, 'AEIOU'[ number % 5 ] ) for number in range( int( METHOD_NAME_COUNT * scale ) ) ]
+
+        rng = random.Random( seed )
+        # The files, as ( path relative to the documentation directory, class name, signatures )
+        # tuples, the class name being None for a functions file. A signature is a
+        # ( returnType, name, parameters ) tuple.
+        self.files = []
+        # The classes names, the global functions names, and for each method name the number of
+        # classes that have it
+        self.classes = []
+        self.functions = []
+        self.methods = dict()
+
+        for number in range( classCount ):
+            module = MODULES[ number % len( MODULES ) ]
+            # Like ofImage_, some class names end with an underscore
+            className = 'ofThing%d%s' % ( number, '_' if number % 9 == 0 else '' )
+            names = rng.sample( COMMON_METHODS, COMMON_METHODS_PER_CLASS )
+            # Every specific name is used by at least one class
+            names += [ methodNames[ ( number * METHODS_PER_CLASS + k ) % len( methodNames ) ] for k in range( METHODS_PER_CLASS ) ]
+            signatures = [ self.signature( rng, name ) for name in names ]
+            # An overloaded method
+            signatures.append( self.signature( rng, names[0] ) )
+            self.files.append( ( module + '/' + className + '.markdown', className, signatures ) )
+            self.classes.append( className )
+            for name in set( names ):
+                self.methods[ name ] = self.methods.get( name, 0 ) + 1
+
+        for number in range( functionsFileCount ):
+            module = MODULES[ number % len( MODULES ) ]
+            names = [ 'ofFunction%dOf%d' % ( k, number ) for k in range( FUNCTIONS_PER_FILE ) ]
+            signatures = [ self.signature( rng, name ) for name in names ]
+            # An overloaded function
+            signatures.append( self.signature( rng, names[0] ) )
+            self.files.append( ( module + '/ofThing%d_functions.markdown' % number, None, signatures ) )
+            self.functions += names
+
+        for ( fileRelPath, className, signatures ) in OVERLOADS_FILES:
+            self.files.append( ( fileRelPath, className, signatures ) )
+            names = set( [ name for ( _, name, _ ) in signatures ] )
+            if className is None:
+                self.functions += sorted( names )
+                continue
+            self.classes.append( className )
+            for name in names:
+                self.methods[ name ] = self.methods.get( name, 0 ) + 1
+        # The calls and the overloads they must resolve to
+        self.calls = CALLS
+
+    def signature( self, rng, name ):
+
+        """Return a random signature for a function"""
+
+        parameters = ', '.join( rng.sample( PARAMETERS, rng.randint( 0, 3 ) ) )
+        return ( rng.choice( TYPES ), name, parameters )
+
+    def write( self, rootPath ):
+
+        """Write the documentation directory in rootPath, and return its path"""
+
+        documentationPath = os.path.join( rootPath, 'documentation' )
+        for ( fileRelPath, className, signatures ) in self.files:
+            filePath = os.path.join( documentationPath, *fileRelPath.split( '/' ) )
+            dirPath = os.path.dirname( filePath )
+            if not os.path.isdir( dirPath ):
+                os.makedirs( dirPath )
+            functions = ''.join( [ METHOD_TEMPLATE % {
+                'returnType': returnType, 'name': name, 'parameters': parameters,
+                'description': 'Does %s with %s.' % ( name, parameters or 'nothing' ) }
+                for ( returnType, name, parameters ) in signatures ] )
+            if className is None:
+                content = FUNCTIONS_TEMPLATE % { 'functions': functions }
+            else:
+                content = CLASS_TEMPLATE % {
+                    'className': className, 'extends': 'ofBaseDraws', 'methods': functions,
+                    'description': 'The %s class draws things.' % className }
+            with open( filePath, 'wb' ) as f:
+                f.write( content )
+        return documentationPath
+
+
+###################################################################################################
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( description = 'Write a synthetic OF documentation' )
+    parser.add_argument( 'directory', help = 'the documentation is written in directory/documentation' )
+    parser.add_argument( '--scale', type = float, default = 1, help = 'size, relative to the OF documentation (default: 1)' )
+    parser.add_argument( '--seed', type = int, default = 1, help = 'seed of the random generator (default: 1)' )
+    arguments = parser.parse_args()
+    corpus = Corpus( arguments.scale, arguments.seed )
+    documentationPath = corpus.write( arguments.directory )
+    print '%d files, %d classes, %d functions, %d methods names written in %s' % (
+        len( corpus.files ), len( corpus.classes ), len( corpus.functions ), len( corpus.methods ), documentationPath )
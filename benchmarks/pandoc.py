@@ -0,0 +1,178 @@
+# coding=utf-8
+
+"""Pandoc stand-in, so that the benchmarks can run the html extractor without Pandoc.
+
+Usage
+=====
+
+python benchmarks/pandoc.py [options] [-t json] [-o output] [input.markdown]
+
+Only the output that generate-index.py reads is produced: a standalone html file with the table
+of content of the headings (levels 1 to 3) in <div id="TOC">, nested in <ul> lists like the one
+of Pandoc --toc, followed by the headings and the paragraphs. With -t json, the JSON AST of the
+document is written instead: its headings, paragraphs and HTML comments (raw blocks). Without an
+input file the standard input is read, and without -o the output is written to the standard
+output. The other options are ignored.
+
+Like with the markdown-space_in_atx_header format, the space after the # of a heading is
+optional. The headings in fenced code blocks and in HTML comments are skipped. This is enough
+for the files written by benchmarks/corpus.py, not for any markdown file.
+
+"""
+
+import sys
+import re
+import cgi
+import json
+
+headingRegex = re.compile( r'^(#{1,6})\s*(.*?)\s*#*\s*$' )
+
+# Deepest heading level in the TOC (Pandoc default)
+TOC_DEPTH = 3
+
+# Level of the HTML comments blocks
+COMMENT = -1
+
+# Version of the JSON AST format
+API_VERSION = [ 1, 17, 5, 4 ]
+
+
+###################################################################################################
+
+def readBlocks( lines ):
+
+    """Return the list of the ( heading level, text ) of the markdown lines, the level being 0 for a
+    paragraph and COMMENT for an HTML comment"""
+
+    blocks = []
+    inFence = False
+    comment = None
+    for line in lines:
+        if line.startswith( '~~~' ) or line.startswith( '```' ):
+            inFence = not inFence
+            continue
+        if inFence:
+            continue
+        if comment is not None or line.startswith( '<!--' ):
+            comment = line if comment is None else comment + '\n' + line
+            if '-->' in line:
+                blocks.append( ( COMMENT, comment.strip() ) )
+                comment = None
+            continue
+        m = headingRegex.match( line )
+        if m and m.group(2):
+            blocks.append( ( len( m.group(1) ), m.group(2) ) )
+        elif line.strip():
+            blocks.append( ( 0, line.strip() ) )
+    return blocks
+
+
+###################################################################################################
+
+def tocList( headings ):
+
+    """Return the html list of the headings, as ( level, text, identifier ) tuples"""
+
+    html = [ '<ul>\n' ]
+    i = 0
+    while i < len( headings ):
+        ( level, text, identifier ) = headings[i]
+        # The sub-headings are the following headings of a deeper level
+        j = i + 1
+        while j < len( headings ) and headings[j][0] > level:
+            j += 1
+        html.append( '<li><a href="#' + identifier + '">' + cgi.escape( text ) + '</a>' )
+        if j > i + 1:
+            html.append( '\n' + tocList( headings[ i + 1 : j ] ) )
+        html.append( '</li>\n' )
+        i = j
+    html.append( '</ul>\n' )
+    return ''.join( html )
+
+
+###################################################################################################
+
+def inlines( text ):
+
+    """Return the JSON AST of the inlines of a text without markup"""
+
+    words = text.decode( 'utf-8' ).split()
+    result = []
+    for word in words:
+        if result:
+            result.append( { 't': 'Space' } )
+        result.append( { 't': 'Str', 'c': word } )
+    return result
+
+
+###################################################################################################
+
+def convertToJSON( blocks ):
+
+    """Return the JSON AST of the blocks"""
+
+    ast = []
+    for ( level, text ) in blocks:
+        if level == COMMENT:
+            ast.append( { 't': 'RawBlock', 'c': [ 'html', text.decode( 'utf-8' ) ] } )
+        elif level == 0:
+            ast.append( { 't': 'Para', 'c': inlines( text ) } )
+        else:
+            ast.append( { 't': 'Header', 'c': [ level, [ 'section-%d' % len( ast ), [], [] ], inlines( text ) ] } )
+    return json.dumps( { 'pandoc-api-version': API_VERSION, 'meta': {}, 'blocks': ast } )
+
+
+###################################################################################################
+
+def convertToHTML( blocks, title ):
+
+    """Return the standalone html of the blocks"""
+
+    headings = []
+    body = []
+    for ( level, text ) in blocks:
+        if level == COMMENT:
+            continue
+        if level == 0:
+            body.append( '<p>' + cgi.escape( text ) + '</p>\n' )
+            continue
+        identifier = 'section-%d' % len( body )
+        if level <= TOC_DEPTH:
+            headings.append( ( level, text, identifier ) )
+        body.append( '<h%d id="%s">%s</h%d>\n' % ( level, identifier, cgi.escape( text ), level ) )
+
+    return ( '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8" />\n<title>' + cgi.escape( title ) + '</title>\n</head>\n<body>\n' +
+             '<div id="TOC">\n' + tocList( headings ) + '</div>\n' + ''.join( body ) + '</body>\n</html>\n' )
+
+
+###################################################################################################
+
+if __name__ == '__main__':
+    arguments = sys.argv[ 1: ]
+    outputPath = None
+    outputFormat = 'html'
+    inputPath = None
+    i = 0
+    while i < len( arguments ):
+        if arguments[i] in ( '-o', '-t', '-f' ):
+            if arguments[i] == '-o':
+                outputPath = arguments[ i + 1 ]
+            elif arguments[i] == '-t':
+                outputFormat = arguments[ i + 1 ]
+            i += 2
+            continue
+        if not arguments[i].startswith( '-' ):
+            inputPath = arguments[i]
+        i += 1
+
+    if inputPath is None:
+        blocks = readBlocks( sys.stdin.read().splitlines() )
+    else:
+        with open( inputPath, 'r' ) as f:
+            blocks = readBlocks( f.read().splitlines() )
+    output = convertToJSON( blocks ) if outputFormat == 'json' else convertToHTML( blocks, inputPath or '' )
+    if outputPath is None:
+        sys.stdout.write( output )
+    else:
+        with open( outputPath, 'w' ) as f:
+            f.write( output )
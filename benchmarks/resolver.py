@@ -0,0 +1,100 @@
+# coding=utf-8
+
+"""Throughput benchmark of the batch resolver (ofdoc.resolver).
+
+Usage
+=====
+
+python benchmarks/resolver.py [--count N] [--min-rate R]
+
+The benchmark reads the index in a Resolver, then resolves N keywords (all the keywords of the
+index and as many unknown keywords, repeated) with resolveMany(), and through
+open-documentation.py --batch fed by a file. It prints the time to read the index and the number of
+lookups per second.
+
+It fails, with exit status 1, if the resolveMany() rate is below --min-rate lookups per second, or
+if the batch command output doesn't match resolveMany().
+
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import subprocess
+
+# Path to the repository
+rootPath = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+sys.path.insert( 0, rootPath )
+import ofdoc.indexfile
+import ofdoc.resolver
+
+scriptPath = os.path.join( rootPath, 'open-documentation.py' )
+indexPath = os.path.join( rootPath, 'index' )
+
+
+###################################################################################################
+
+def sameLine( line, keyword, urls ):
+
+    """Check a line printed by open-documentation.py --batch. The script adds its documentation URL
+    in front of the relative URLs of the benchmark resolver."""
+
+    fields = line.split( '\t' )
+    if fields[0] != keyword or len( fields ) != len( urls ) + 1:
+        return False
+    return all( [ url.endswith( relURL ) for ( url, relURL ) in zip( fields[ 1: ], urls ) ] )
+
+
+###################################################################################################
+
+parser = argparse.ArgumentParser( description = 'Throughput benchmark of the batch resolver' )
+parser.add_argument( '--count', type = int, default = 1000000, help = 'number of lookups (default: 1000000)' )
+parser.add_argument( '--min-rate', type = float, help = 'fail if there are less lookups per second' )
+arguments = parser.parse_args()
+
+start = time.time()
+resolver = ofdoc.resolver.openResolver( indexPath )
+loadTime = time.time() - start
+if resolver is None:
+    print 'Error: No index found.'
+    sys.exit(1)
+print 'Index read in %.1f ms, %d keywords' % ( loadTime * 1000.0, len( resolver ) )
+
+# Half known keywords, half unknown ones
+sample = []
+for keyword in sorted( resolver.urls ):
+    sample.append( keyword )
+    sample.append( keyword + 'Unknown' )
+keywords = ( sample * ( arguments.count // len( sample ) + 1 ) )[ : arguments.count ]
+
+start = time.time()
+results = resolver.resolveMany( keywords )
+elapsed = time.time() - start
+rate = len( keywords ) / elapsed
+print 'resolveMany():          %9d lookups in %6.3f s, %10.0f lookups/s' % ( len( keywords ), elapsed, rate )
+failed = False
+if arguments.min_rate is not None and rate < arguments.min_rate:
+    print 'Error: less than %.0f lookups/s' % arguments.min_rate
+    failed = True
+
+# The same keywords through the command line
+( handle, keywordsPath ) = tempfile.mkstemp( suffix = '.txt' )
+try:
+    with os.fdopen( handle, 'w' ) as f:
+        f.write( '\n'.join( keywords ) + '\n' )
+    start = time.time()
+    process = subprocess.Popen( [ sys.executable, scriptPath, '--batch', keywordsPath ], stdout = subprocess.PIPE )
+    output = process.communicate()[0]
+    elapsed = time.time() - start
+finally:
+    os.remove( keywordsPath )
+print 'open-documentation.py --batch: %6.3f s, %10.0f lookups/s (with start up)' % ( elapsed, len( keywords ) / elapsed )
+
+lines = output.splitlines()
+if len( lines ) != len( keywords ) or not all( [ sameLine( *line ) for line in zip( lines, keywords, results ) ] ):
+    print 'Error: the batch command output differs from resolveMany()'
+    failed = True
+
+sys.exit( 1 if failed else 0 )
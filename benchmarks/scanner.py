@@ -0,0 +1,148 @@
+# coding=utf-8
+
+"""Benchmark of the C++ sources scanner (cross-reference.py).
+
+Usage
+=====
+
+python benchmarks/scanner.py [--size MB] [--files N] [--jobs N ...] [--keep DIR]
+
+The benchmark writes a synthetic OF project in a temporary directory: N .cpp and .h files, of
+about MB megabytes in total, using the keywords of the index (classes, global functions, method
+calls) mixed with ordinary identifiers, comments and strings. Then it scans it with
+cross-reference.py for each number of jobs, and prints the time and the throughput in MB/s.
+
+It fails, with exit status 1, if the outputs for the different numbers of jobs are not identical,
+or if an identifier hidden in a comment or a string is reported.
+
+"""
+
+import sys
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+# Path to the repository
+rootPath = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+sys.path.insert( 0, rootPath )
+import ofdoc.resolver
+
+scriptPath = os.path.join( rootPath, 'cross-reference.py' )
+indexPath = os.path.join( rootPath, 'index' )
+
+# Identifiers that are not in the index
+PLAIN_IDENTIFIERS = [ 'value', 'count', 'result', 'buffer', 'index', 'total', 'width2', 'myObject', 'tmp' ]
+
+# Must never be reported: only used in comments and strings
+HIDDEN_IDENTIFIER = 'ofRectangle'
+
+
+###################################################################################################
+
+def sourceLines( rng, classes, functions, methods ):
+
+    """Yield synthetic C++ lines"""
+
+    while True:
+        choice = rng.randint( 0, 9 )
+        if choice == 0:
+            yield '    // Use %s here, or %s\n' % ( HIDDEN_IDENTIFIER, rng.choice( PLAIN_IDENTIFIERS ) )
+        elif choice == 1:
+            yield '    /* %s\n     * %s is documented elsewhere */\n' % ( HIDDEN_IDENTIFIER, HIDDEN_IDENTIFIER )
+        elif choice == 2:
+            yield '    ofLogNotice() << "%s: " << %s;\n' % ( HIDDEN_IDENTIFIER, rng.choice( PLAIN_IDENTIFIERS ) )
+        elif choice == 3:
+            yield '    %s %s;\n' % ( rng.choice( classes ), rng.choice( PLAIN_IDENTIFIERS ) )
+        elif choice == 4:
+            yield '    %s( %s, %d );\n' % ( rng.choice( functions ), rng.choice( PLAIN_IDENTIFIERS ), rng.randint( 0, 100 ) )
+        elif choice == 5:
+            yield '    %s.%s();\n' % ( rng.choice( PLAIN_IDENTIFIERS ), rng.choice( methods ) )
+        elif choice == 6:
+            yield '    %s->%s( %s );\n' % ( rng.choice( PLAIN_IDENTIFIERS ), rng.choice( methods ), rng.choice( PLAIN_IDENTIFIERS ) )
+        elif choice == 7:
+            yield '    float %s = %s * %.2f;\n' % ( rng.choice( PLAIN_IDENTIFIERS ), rng.choice( PLAIN_IDENTIFIERS ), rng.random() )
+        elif choice == 8:
+            yield '    if( %s > %s ){ %s = 0; }\n' % tuple( [ rng.choice( PLAIN_IDENTIFIERS ) for _ in range( 3 ) ] )
+        else:
+            yield '\n'
+
+
+###################################################################################################
+
+def writeProject( projectPath, size, fileCount ):
+
+    """Write the synthetic project, and return its size in bytes"""
+
+    resolver = ofdoc.resolver.openResolver( indexPath )
+    keywords = sorted( resolver.urls )
+    methods = [ k for k in keywords if k in resolver.methodNames ]
+    others = [ k for k in keywords if k not in resolver.methodNames and k != HIDDEN_IDENTIFIER ]
+    classes = [ k for k in others if k[0:2] == 'of' and k[2:3].isupper() and not k.startswith( 'ofGet' ) ] or others
+    functions = others
+
+    rng = random.Random( 1 )
+    lines = sourceLines( rng, classes, functions, methods )
+    fileSize = size // fileCount
+    total = 0
+    for fileNumber in range( fileCount ):
+        directory = os.path.join( projectPath, 'addon%02d' % ( fileNumber % 16 ), 'src' )
+        if not os.path.isdir( directory ):
+            os.makedirs( directory )
+        extension = '.h' if fileNumber % 3 == 0 else '.cpp'
+        chunks = [ '#include "ofMain.h"\n', '#include <%s.h>\n\n' % HIDDEN_IDENTIFIER, 'void ofApp::setup(){\n' ]
+        written = sum( [ len( c ) for c in chunks ] )
+        while written < fileSize:
+            line = next( lines )
+            chunks.append( line )
+            written += len( line )
+        chunks.append( '}\n' )
+        with open( os.path.join( directory, 'file%05d%s' % ( fileNumber, extension ) ), 'w' ) as f:
+            f.write( ''.join( chunks ) )
+        total += written + 2
+    return total
+
+
+###################################################################################################
+
+parser = argparse.ArgumentParser( description = 'Benchmark of the C++ sources scanner' )
+parser.add_argument( '--size', type = float, default = 20.0, help = 'size of the project in MB (default: 20)' )
+parser.add_argument( '--files', type = int, default = 400, help = 'number of files (default: 400)' )
+parser.add_argument( '--jobs', type = int, nargs = '+',
+                     default = sorted( set( [ 1, multiprocessing.cpu_count() ] ) ),
+                     help = 'numbers of worker processes to measure (default: 1 and the number of CPUs)' )
+parser.add_argument( '--keep', help = 'write the project in this directory and keep it' )
+arguments = parser.parse_args()
+
+projectPath = arguments.keep or tempfile.mkdtemp( prefix = 'ofdoc-scanner-' )
+failed = False
+try:
+    size = writeProject( projectPath, int( arguments.size * 1024 * 1024 ), arguments.files )
+    print 'Project: %d files, %.1f MB' % ( arguments.files, size / 1048576.0 )
+    outputs = []
+    for jobs in arguments.jobs:
+        start = time.time()
+        process = subprocess.Popen( [ sys.executable, scriptPath, '--jobs', str( jobs ), projectPath ], stdout = subprocess.PIPE )
+        output = process.communicate()[0]
+        elapsed = time.time() - start
+        references = output.count( '\n' )
+        print 'jobs %3d: %7.2f s, %6.1f MB/s, %d references' % ( jobs, elapsed, size / 1048576.0 / elapsed, references )
+        if process.returncode != 0:
+            print 'Error: cross-reference.py failed'
+            failed = True
+        outputs.append( output )
+    if len( set( outputs ) ) > 1:
+        print 'Error: the outputs differ with the number of jobs'
+        failed = True
+    if any( [ '\t' + HIDDEN_IDENTIFIER + '\t' in output for output in outputs ] ):
+        print 'Error: an identifier of a comment or a string is reported'
+        failed = True
+finally:
+    if not arguments.keep:
+        shutil.rmtree( projectPath )
+
+sys.exit( 1 if failed else 0 )
@@ -0,0 +1,159 @@
+# coding=utf-8
+
+"""Start up benchmark of open-documentation.py.
+
+Usage
+=====
+
+python benchmarks/startup.py [--runs N] [--max-ms MS] [keyword ...]
+
+For each keyword of the sample, the benchmark runs open-documentation.py --no-daemon --no-browser
+N times, and prints the median and best wall clock times next to the start up time of an empty
+Python interpreter. If the resident mode is available, the same lookups are timed through a daemon
+started for the benchmark.
+
+Then each lookup is run once with python -v, to find the modules it loads (Python 2.7 has no
+-X importtime option). The benchmark fails, with exit status 1, if a lookup loads a GUI or web
+browser module, or if a median time is over --max-ms.
+
+Only the keywords matching one documentation entry, or an unknown keyword without any candidate, are
+used: the others would open a selection window.
+
+"""
+
+import sys
+import os
+import re
+import time
+import argparse
+import subprocess
+
+# Path to the repository
+rootPath = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+sys.path.insert( 0, rootPath )
+import ofdoc.indexfile
+import ofdoc.daemon
+import ofdoc.fuzzy
+
+scriptPath = os.path.join( rootPath, 'open-documentation.py' )
+indexPath = os.path.join( rootPath, 'index' )
+
+# A class, global functions, a method of a single class, and a keyword which is not in the index
+DEFAULT_KEYWORDS = [ 'ofRectangle', 'ofSetColor', 'ofDrawCircle', 'ofGetWidth', 'ofNotAKeyword' ]
+
+# Modules that a lookup without selection window must not load
+HEAVY_MODULES = [ 'Tkinter', '_tkinter', 'tkFont', 'platform', 'webbrowser', 'subprocess', 'socket' ]
+
+importRegex = re.compile( r'^import (\S+) ' )
+
+
+###################################################################################################
+
+def run( command ):
+
+    """Run a command, and return ( wall clock time in ms, stdout, stderr )"""
+
+    start = time.time()
+    process = subprocess.Popen( command, stdout = subprocess.PIPE, stderr = subprocess.PIPE )
+    stdoutdata, stderrdata = process.communicate()
+    return ( ( time.time() - start ) * 1000.0, stdoutdata, stderrdata )
+
+
+###################################################################################################
+
+def timeCommand( command, runs ):
+
+    """Return the ( median, best ) wall clock times of a command, in ms"""
+
+    times = sorted( [ run( command )[0] for _ in range( runs ) ] )
+    return ( times[ len( times ) // 2 ], times[0] )
+
+
+###################################################################################################
+
+def loadedModules( command ):
+
+    """Return the list of the modules loaded by a Python command"""
+
+    ( _, _, stderrdata ) = run( [ command[0], '-v' ] + command[ 1: ] )
+    modules = []
+    for line in stderrdata.splitlines():
+        m = importRegex.match( line )
+        if m:
+            modules.append( m.group(1) )
+    return modules
+
+
+###################################################################################################
+
+def printTimes( title, times ):
+    print '%-40s median %7.1f ms   best %7.1f ms' % ( ( title, ) + times )
+
+
+###################################################################################################
+
+parser = argparse.ArgumentParser( description = 'Start up benchmark of open-documentation.py' )
+parser.add_argument( 'keywords', nargs = '*', default = DEFAULT_KEYWORDS )
+parser.add_argument( '--runs', type = int, default = 10, help = 'runs per keyword (default: 10)' )
+parser.add_argument( '--max-ms', type = float, help = 'fail if a median time is over this limit' )
+arguments = parser.parse_args()
+
+index = ofdoc.indexfile.openIndex( indexPath )
+if index is None:
+    print 'Error: No index found.'
+    sys.exit(1)
+fuzzyIndex = ofdoc.fuzzy.openFuzzyIndex( indexPath )
+keywords = []
+for keyword in arguments.keywords:
+    entries = index.lookup( keyword )
+    if len( entries ) > 1 or ( not entries and fuzzyIndex is not None and fuzzyIndex.complete( keyword ) ):
+        print 'Skipping ' + keyword + ': it would open the selection window'
+    else:
+        keywords.append( keyword )
+index.close()
+if fuzzyIndex is not None:
+    fuzzyIndex.close()
+
+print 'Index: ' + type( index ).__name__
+failed = False
+medians = []
+
+printTimes( 'python -c pass', timeCommand( [ sys.executable, '-c', 'pass' ], arguments.runs ) )
+for keyword in keywords:
+    times = timeCommand( [ sys.executable, scriptPath, '--no-daemon', '--no-browser', keyword ], arguments.runs )
+    printTimes( keyword, times )
+    medians.append( times[0] )
+
+# The same lookups through the resident script
+socketPath = ofdoc.daemon.socketPath( indexPath )
+if not ofdoc.daemon.isAvailable():
+    print 'Resident mode not available on this platform'
+elif ofdoc.daemon.send( socketPath, 'ping' ) is not None:
+    print 'A daemon is already running, resident mode not measured'
+else:
+    daemon = subprocess.Popen( [ sys.executable, scriptPath, '--daemon', '--no-browser' ], stdout = subprocess.PIPE )
+    # Wait for the daemon to listen
+    daemon.stdout.readline()
+    try:
+        for keyword in keywords:
+            times = timeCommand( [ sys.executable, scriptPath, '--no-browser', keyword ], arguments.runs )
+            printTimes( keyword + ' (daemon)', times )
+            medians.append( times[0] )
+    finally:
+        ofdoc.daemon.send( socketPath, 'stop' )
+        daemon.wait()
+
+# The modules loaded by each lookup
+for keyword in keywords:
+    modules = loadedModules( [ sys.executable, scriptPath, '--no-daemon', '--no-browser', keyword ] )
+    heavy = [ m for m in HEAVY_MODULES if m in modules ]
+    print '%-40s %3d modules loaded' % ( keyword, len( modules ) )
+    if heavy:
+        print '    Error: loads ' + ', '.join( heavy )
+        failed = True
+
+if arguments.max_ms is not None and max( medians ) > arguments.max_ms:
+    print 'Error: a median time is over %.1f ms' % arguments.max_ms
+    failed = True
+
+sys.exit( 1 if failed else 0 )
@@ -0,0 +1,280 @@
+# coding=utf-8
+
+"""Benchmark suite of generate-index.py and open-documentation.py on synthetic documentations.
+
+Usage
+=====
+
+python benchmarks/suite.py [--scales S ...] [--extractor E] [--jobs N] [--offline] [--runs N]
+                           [--json file] [--keep DIR]
+
+For each scale (1, 10 and 100 by default), the suite writes a synthetic documentation with
+benchmarks/corpus.py: at scale 1 it is the size of the OF documentation, about 800 classes and
+global functions and 2,400 methods names. It copies generate-index.py, open-documentation.py and
+ofdoc in a work directory, set to read this documentation and to use the Pandoc stand-in
+benchmarks/pandoc.py, so no external tool is needed. Then it measures:
+
+full rebuild
+    generate-index.py from an empty index directory
+no-op rebuild
+    generate-index.py again, with nothing changed
+cold lookup
+    the median time of open-documentation.py --no-daemon --no-browser for a class, in a new process
+    each time (--runs times)
+warm lookup
+    the time of a lookup in an index already open, in the benchmark process
+bulk lookups
+    the throughput of ofdoc.resolver.Resolver.resolveMany() over all the keywords of the index and
+    as many unknown keywords, and the time to open the Resolver
+
+The suite fails, with exit status 1, if a script fails, if a class, a function or a method of the
+documentation is not found in the index with the expected number of classes, or if a call of the
+documentation doesn't resolve to its expected overloads in signatures.bin. --json writes the
+results to a file, to compare them from one version to another: the documentations are always the
+same for a given scale.
+
+The markdown extractor is the default. The html extractor (and --offline) runs the Pandoc stand-in
+once per file, which is much slower at scale 100. The json extractor runs it once per batch of files.
+
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+# Path to the repository
+rootPath = os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) )
+sys.path.insert( 0, rootPath )
+import ofdoc.indexfile
+import ofdoc.resolver
+import ofdoc.signatures
+import corpus
+
+pandocPath = os.path.join( rootPath, 'benchmarks', 'pandoc.py' )
+
+
+###################################################################################################
+
+def installScripts( workPath, documentationPath ):
+
+    """Copy the scripts in the work directory, set to read the documentation and to use the Pandoc
+    stand-in"""
+
+    os.makedirs( workPath )
+    shutil.copytree( os.path.join( rootPath, 'ofdoc' ), os.path.join( workPath, 'ofdoc' ),
+                     ignore = shutil.ignore_patterns( '*.pyc' ) )
+
+    # generate-index.py runs the executable set in pandocExe
+    if sys.platform == 'win32':
+        launcherPath = os.path.join( workPath, 'pandoc.bat' )
+        with open( launcherPath, 'w' ) as f:
+            f.write( '@"%s" "%s" %%*\n' % ( sys.executable, pandocPath ) )
+    else:
+        launcherPath = os.path.join( workPath, 'pandoc' )
+        with open( launcherPath, 'w' ) as f:
+            f.write( '#!/bin/sh\nexec "%s" "%s" "$@"\n' % ( sys.executable, pandocPath ) )
+        os.chmod( launcherPath, 0755 )
+
+    settings = [ ( 'docSourcesRootPath', documentationPath ), ( 'pandocExe', launcherPath ) ]
+    with open( os.path.join( rootPath, 'generate-index.py' ), 'rb' ) as f:
+        script = f.read()
+    for ( name, value ) in settings:
+        ( script, count ) = re.subn( r'(?m)^' + name + r' = .*$', lambda m: name + ' = ' + repr( value ), script )
+        if count != 1:
+            raise RuntimeError( 'No ' + name + ' setting in generate-index.py' )
+    with open( os.path.join( workPath, 'generate-index.py' ), 'wb' ) as f:
+        f.write( script )
+    shutil.copy( os.path.join( rootPath, 'open-documentation.py' ), workPath )
+
+
+###################################################################################################
+
+def run( command ):
+
+    """Run a command, and return ( wall clock time in s, exit status, output )"""
+
+    start = time.time()
+    process = subprocess.Popen( command, stdout = subprocess.PIPE, stderr = subprocess.STDOUT )
+    output = process.communicate()[0]
+    return ( time.time() - start, process.returncode, output )
+
+
+###################################################################################################
+
+def timeLoop( function, minimumTime = 0.5 ):
+
+    """Call the function until minimumTime is elapsed, return the time per call in s"""
+
+    calls = 0
+    start = time.time()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.time() - start
+        if elapsed >= minimumTime:
+            return elapsed / calls
+
+
+###################################################################################################
+
+def checkIndex( resolver, documentation ):
+
+    """Return the list of the errors of the index of the documentation"""
+
+    errors = []
+    for name in documentation.classes + documentation.functions:
+        if not resolver.resolve( name ):
+            errors.append( name + ' is not in the index' )
+    for ( name, classCount ) in documentation.methods.items():
+        found = len( resolver.resolve( name ) )
+        if found != classCount:
+            errors.append( '%s has %d classes in the index instead of %d' % ( name, found, classCount ) )
+    return errors
+
+
+###################################################################################################
+
+def checkSignatures( indexPath, documentation ):
+
+    """Return the list of the errors of the overloads matching the calls of the documentation. Like
+    open-documentation.py, only the overloads with the best score are kept."""
+
+    signatureIndex = ofdoc.signatures.openSignatureIndex( indexPath )
+    if signatureIndex is None:
+        return [ 'No signatures file' ]
+    errors = []
+    try:
+        for ( call, expected ) in documentation.calls:
+            ( name, arguments ) = ofdoc.signatures.parseCall( call )
+            matches = signatureIndex.match( name, arguments )
+            best = sorted( [ ( className, signature ) for ( score, className, path, signature ) in matches
+                             if score == matches[0][0] ] )
+            if best != sorted( expected ):
+                errors.append( '%s matches %s instead of %s' % ( call, best or 'nothing', expected or 'nothing' ) )
+    finally:
+        signatureIndex.close()
+    return errors
+
+
+###################################################################################################
+
+def benchmark( scale, workPath ):
+
+    """Run the benchmarks at a scale, return ( results dictionary, errors list )"""
+
+    results = { 'scale': scale }
+    if os.path.exists( workPath ):
+        shutil.rmtree( workPath )
+    documentation = corpus.Corpus( scale )
+    start = time.time()
+    documentationPath = documentation.write( os.path.join( workPath, 'ofSite' ) )
+    print 'Scale %g: %d files, %d classes, %d functions, %d methods names (written in %.1f s)' % (
+        scale, len( documentation.files ), len( documentation.classes ), len( documentation.functions ),
+        len( documentation.methods ), time.time() - start )
+    results.update( files = len( documentation.files ), classes = len( documentation.classes ),
+                    functions = len( documentation.functions ), methods = len( documentation.methods ) )
+
+    toolPath = os.path.join( workPath, 'tool' )
+    installScripts( toolPath, documentationPath )
+    indexPath = os.path.join( toolPath, 'index' )
+    generateCommand = [ sys.executable, os.path.join( toolPath, 'generate-index.py' ),
+                        '--jobs', str( arguments.jobs ), '--extractor', arguments.extractor ]
+    if arguments.offline:
+        generateCommand.append( '--offline' )
+
+    errors = []
+    for ( name, title ) in ( ( 'fullRebuild', 'full rebuild' ), ( 'noopRebuild', 'no-op rebuild' ) ):
+        ( elapsed, status, output ) = run( generateCommand )
+        results[ name ] = elapsed
+        print '    %-24s %9.2f s' % ( title, elapsed )
+        if status != 0:
+            errors.append( 'generate-index.py failed:\n' + output )
+            return ( results, errors )
+    results[ 'indexSize' ] = os.path.getsize( os.path.join( indexPath, ofdoc.indexfile.BINARY_INDEX_FILE_NAME ) )
+    print '    %-24s %9d KB' % ( 'index.bin', results[ 'indexSize' ] // 1024 )
+
+    # A class in the middle of the documentation, the only entry of its keyword
+    keyword = documentation.classes[ len( documentation.classes ) // 2 ]
+    lookupCommand = [ sys.executable, os.path.join( toolPath, 'open-documentation.py' ), '--no-daemon', '--no-browser', keyword ]
+    times = []
+    for _ in range( arguments.runs ):
+        ( elapsed, status, output ) = run( lookupCommand )
+        if status != 0:
+            errors.append( 'open-documentation.py failed:\n' + output )
+            return ( results, errors )
+        times.append( elapsed )
+    results[ 'coldLookup' ] = sorted( times )[ len( times ) // 2 ]
+    print '    %-24s %9.2f ms' % ( 'cold lookup', results[ 'coldLookup' ] * 1000 )
+
+    # The same number of keywords of the index and of unknown keywords
+    rng = random.Random( 1 )
+    resolver = ofdoc.resolver.openResolver( indexPath )
+    keywords = sorted( resolver.urls )
+    keywords += [ keyword + 'Unknown' for keyword in keywords ]
+    rng.shuffle( keywords )
+
+    index = ofdoc.indexfile.openIndex( indexPath )
+    try:
+        sample = keywords[ :1000 ]
+        def lookups():
+            for keyword in sample:
+                index.lookup( keyword )
+        results[ 'warmLookup' ] = timeLoop( lookups ) / len( sample )
+    finally:
+        index.close()
+    print '    %-24s %9.2f us' % ( 'warm lookup', results[ 'warmLookup' ] * 1000000 )
+
+    results[ 'resolverOpening' ] = timeLoop( lambda: ofdoc.resolver.openResolver( indexPath ) )
+    results[ 'bulkLookups' ] = len( keywords ) / timeLoop( lambda: resolver.resolveMany( keywords ) )
+    print '    %-24s %9.2f ms' % ( 'resolver opening', results[ 'resolverOpening' ] * 1000 )
+    print '    %-24s %9.0f lookups/s' % ( 'bulk lookups', results[ 'bulkLookups' ] )
+
+    errors += checkIndex( resolver, documentation )
+    errors += checkSignatures( indexPath, documentation )
+    return ( results, errors )
+
+
+###################################################################################################
+
+parser = argparse.ArgumentParser( description = 'Benchmark suite of generate-index.py and open-documentation.py' )
+parser.add_argument( '--scales', type = float, nargs = '+', default = [ 1, 10, 100 ],
+                     help = 'sizes of the documentations, relative to the OF documentation (default: 1 10 100)' )
+parser.add_argument( '--extractor', choices = [ 'markdown', 'html', 'json', 'verify' ], default = 'markdown',
+                     help = 'extractor of generate-index.py (default: markdown)' )
+parser.add_argument( '--jobs', type = int, default = multiprocessing.cpu_count(),
+                     help = 'number of processes of generate-index.py (default: number of CPUs)' )
+parser.add_argument( '--offline', action = 'store_true', help = 'also build the offline pack' )
+parser.add_argument( '--runs', type = int, default = 5, help = 'runs of the cold lookup (default: 5)' )
+parser.add_argument( '--json', help = 'write the results to this file' )
+parser.add_argument( '--keep', help = 'write the documentations and the indexes in this directory and keep them' )
+arguments = parser.parse_args()
+
+basePath = arguments.keep or tempfile.mkdtemp( prefix = 'ofdoc-suite-' )
+allResults = []
+failed = False
+try:
+    for scale in arguments.scales:
+        ( results, errors ) = benchmark( scale, os.path.join( basePath, 'scale%g' % scale ) )
+        allResults.append( results )
+        for error in errors[ :10 ]:
+            print '    Error: ' + error
+        if errors:
+            failed = True
+finally:
+    if not arguments.keep:
+        shutil.rmtree( basePath )
+
+if arguments.json:
+    with open( arguments.json, 'w' ) as f:
+        json.dump( { 'extractor': arguments.extractor, 'jobs': arguments.jobs, 'offline': arguments.offline,
+                     'results': allResults }, f, indent = 4, sort_keys = True )
+
+sys.exit( 1 if failed else 0 )
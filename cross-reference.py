@@ -0,0 +1,100 @@
+# coding=utf-8
+
+"""This script lists the OF identifiers used in the C++ sources of a project, with their documentation URLs.
+
+Usage
+=====
+
+cross-reference.py [--jobs N] [--output file] [--base-url URL] projectDirectory
+
+All the .cpp, .h (and other C++ extensions) files of the project directory and of its
+sub-directories are scanned. For each use of an OF class, global function or method, the script
+prints a line with tab separated fields:
+file path (relative to the project directory), line number, identifier, documentation URL(s)
+A method name shared by many classes has one URL per class.
+
+Methods names are only reported after ., -> or :: (image.draw(), ofApp::setup), to not report
+every variable called like an OF method. Comments, strings and #include lines are skipped.
+
+Options
+=======
+
+--jobs N
+    Number of worker processes scanning the files (default: number of CPUs). 1 scans the files in
+    the script process.
+--output file
+    Write the cross-reference to the file rather than to the standard output.
+--base-url URL
+    Base URL of the documentation (default: the online documentation). The URLs printed are this
+    base URL followed by the page path.
+
+Index
+=====
+
+This script use the index generated by generate-index.py, like open-documentation.py.
+
+Requirement
+===========
+
+Python 2.7
+
+"""
+
+# Base URL of the OpenFrameworks documentation
+documentationURL = 'http://www.openframeworks.cc/documentation/'
+
+import sys
+import os.path
+import argparse
+import multiprocessing
+
+import ofdoc.indexfile
+import ofdoc.scanner
+
+# Path to the script directory
+scriptDirPath = os.path.dirname(os.path.realpath(__file__))
+# Path to the index directory (downloaded with this script, or generated by generate-index.py)
+indexPath = os.path.join( scriptDirPath, 'index' )
+
+
+###################################################################################################
+
+def main():
+
+    parser = argparse.ArgumentParser( description = 'List the OF identifiers used in the C++ sources of a project' )
+    parser.add_argument( 'project', help = 'project directory' )
+    parser.add_argument( '--jobs', type = int, default = multiprocessing.cpu_count(),
+                         help = 'number of worker processes (default: number of CPUs)' )
+    parser.add_argument( '--output', help = 'output file (default: standard output)' )
+    parser.add_argument( '--base-url', default = documentationURL, help = 'base URL of the documentation' )
+    arguments = parser.parse_args()
+
+    if not os.path.isdir( arguments.project ):
+        print 'Error: ' + arguments.project + ' is not a directory.'
+        sys.exit(1)
+    index = ofdoc.indexfile.openIndex( indexPath )
+    if index is None:
+        print 'Error: No index found.'
+        sys.exit(1)
+    index.close()
+
+    output = open( arguments.output, 'w' ) if arguments.output else sys.stdout
+    errors = 0
+    try:
+        for ( filePath, references, error ) in ofdoc.scanner.scanProject( arguments.project, indexPath, arguments.base_url, arguments.jobs ):
+            if error is not None:
+                sys.stderr.write( 'Error: ' + error + '\n' )
+                errors += 1
+                continue
+            relPath = os.path.relpath( filePath, arguments.project )
+            output.write( ''.join( [ relPath + '\t' + str( lineNumber ) + '\t' + identifier + '\t' + '\t'.join( urls ) + '\n'
+                                     for ( lineNumber, identifier, urls ) in references ] ) )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    sys.exit( 1 if errors else 0 )
+
+
+# The worker processes import this script on Windows: only the main process must run it
+if __name__ == '__main__':
+    main()
@@ -7,13 +7,16 @@ Requirements
 
 Python 2.7
 Pandoc
+    Only for the html, json and verify extractors (see below)
     Used to convert the markdown documentation files to more parsable html files
     http://pandoc.org/
 BeautifulSoup
+    Only for the html and verify extractors (see below)
     Module for python
     Used to parse html files produced by Pandoc
     Installation: http://www.crummy.com/software/BeautifulSoup/bs4/doc/#installing-beautiful-soup
 html5lib
+    Only for the html and verify extractors (see below)
     html parser module for python
     Used by BeautifulSoup
     Installation: http://www.crummy.com/software/BeautifulSoup/bs4/doc/#installing-a-parser
@@ -31,21 +34,84 @@ Usage
 =====
 
 - Edit the script
-- Set the 2 path variables at the beginning
+- Set the path variables at the beginning
 - Set the logLevel
 - Save it and run it.
 
 The script create an index which associate the OF keywords to the html files in the documentation.
 You only need to run this script once. Then open-documentation.py can read the index.
 
+The index is written in a single binary file, indexPath\index.bin. The keywords are also written in
+indexPath\fuzzy.bin, for the prefix and fuzzy search of open-documentation.py, and the descriptions
+of the classes, methods and functions are indexed in indexPath\search.bin for the full-text search of
+open-documentation.py --search (see ofdoc/search.py). The signatures of the functions and methods,
+overloads included, are written in indexPath\signatures.bin, so that open-documentation.py can open
+the overload matching a call like ofDrawCircle(x, y, r) (see ofdoc/signatures.py). The old text index
+(classesAndGlobalFunctions.txt and one file per method name) is only written with the --text-index
+option. An existing text index can be converted to the binary format, without Pandoc nor the
+documentation sources, with the --from-text option.
+
+The classes, functions and methods are also written in indexPath\tags, a tags file in the format of
+ctags sorted by name, whose tags point to the documentation URLs (see ofdoc/indexfile.py). Editor
+plugins can look up a keyword in it without starting Python. It is the index of the last build,
+whatever the --store-version option.
+
 The copy of the openFrameworks site contains a directory where are the sources of the OF documentation.
-To parse them, the script first convert them to html using Pandoc. This create hmtl files in
-indexPath\html. You can delete this folder after usage, or leave it to speed up the next update (only
-the .markdown files more recents than the .html files will be reconverted by Pandoc).
+The index only needs the headings of these markdown files: the class titles, the "Methods" sections
+and the functions signatures. The --extractor option choose how they are read:
+- markdown (default): the headings are read directly in the markdown files (see ofdoc/markdown.py).
+- html: the files are converted to html with a TOC using Pandoc, and the TOC is parsed with
+  BeautifulSoup. This create hmtl files in indexPath\html. You can delete this folder after usage, or
+  leave it to speed up the next update.
+- json: the files are converted to the Pandoc JSON AST, and the headings are read in the tree (see
+  ofdoc/pandocjson.py). No html file is written, BeautifulSoup is not needed, and several files are
+  converted by a single Pandoc run. The index is the same as with the html extractor.
+- verify: use both methods, report the files for which they don't give the same index entries, and
+  write the index found with the html method.
+
+With the --offline option, the script also makes an offline copy of the documentation: all the
+files are converted to html with Pandoc (whatever the extractor), and the pages are stored in a
+single compressed file, indexPath\offline.pack, where open-documentation.py --offline reads them
+(see ofdoc/offline.py). The html files are kept in indexPath\html to speed up the next update.
+
+The updates are incremental. The script keeps in indexPath\manifest.json the hash of each .markdown
+file and the index entries it produced. On the next run, only the new or modified files are converted
+and parsed again, the entries of the deleted files are dropped, and nothing is written if nothing
+changed. Use the --rebuild option to ignore the manifest and convert and parse everything.
+
+With the --watch option (Linux only), the script keeps running after the build and watches
+docSourcesRootPath with inotify (see ofdoc/watch.py). When .markdown files are saved, added or
+removed, only these files are converted and parsed again, their entries are merged with the ones
+of the manifest, and the index files are written again. A burst of saves makes a single update.
+Each index file is written to a temporary file which then replaces it at once, so open-documentation.py
+never reads a half-written index, and only if its content changed. index.bin is replaced last: the
+resident open-documentation.py reloads the index when one of the index files changes, and a reader
+who sees the new index.bin also sees the new fuzzy.bin, signatures.bin, search.bin and offline
+pack. Stop the script with Ctrl+C.
+
+The files are converted and parsed in parallel by a pool of worker processes, one per core by default.
+Use the --jobs option to choose the number of processes (1 to do everything in the script process).
+The index entries are always merged in the same order, so the index doesn't depend on the number of
+jobs.
+
+Several OF versions can share the same scripts: with the --store-version option, like
+--store-version 0.9.3, the index is also added to the index store, indexPath\versions.bin, as this
+version (replacing the previous index of this version). The store keeps only once the strings and
+the entries common to several versions (see ofdoc/indexfile.py), and open-documentation.py
+--version=0.9.3 uses this version of the index. Build the index of each version, with
+docSourcesRootPath set to the documentation of this version, then add it to the store.
+
+To find out why a build is slow, use the --profile report.json option. The script then writes a JSON
+report with the time and the count of each stage (directory walk, hash, Pandoc conversions, html and
+markdown parsing, merge, index files writing...), the number of conversions skipped because the html
+file was up to date, and the slowest files (--profile-slowest N, 10 by default). See ofdoc/profiling.py.
+--cprofile stats.prof also dumps the cProfile statistics of the script process, to read with the
+pstats module. With several jobs the conversions and the parsing run in the worker processes, so
+use --jobs 1 to see them in the cProfile statistics.
 
 """
 
-import sys, os
+import sys, os, time
 
 # Path to the documentation directory in the local OF site copy :
 # Example:
@@ -67,12 +133,21 @@ logLevel = WARNING
 # If these 2 paths and the logLevel are set, no need to read further, you can run the script
 
 
-import subprocess, shlex
 import os.path
-import html5lib
-from bs4 import BeautifulSoup
-import re
+import argparse
+import cProfile
+import traceback
+import multiprocessing
 import colorama
+import ofdoc.indexfile
+import ofdoc.manifest
+import ofdoc.extractors
+import ofdoc.fuzzy
+import ofdoc.search
+import ofdoc.signatures
+import ofdoc.offline
+import ofdoc.profiling
+import ofdoc.watch
 colorama.init()
 
 logLevelTitle = {
@@ -90,10 +165,30 @@ def log( message, level = NOTICE ):
         print message,
         print colorama.Style.RESET_ALL
 
-# Check for pandoc file exist
-if not os.path.isfile( pandocExe ):
-    log( "The path to pandoc is incorrect, there is no such file :" + pandocExe, ERROR )
-    sys.exit(1)
+parser = argparse.ArgumentParser( description = 'Generate the index used by open-documentation.py' )
+parser.add_argument( '--text-index', action = 'store_true',
+                     help = 'also write the index in the old text format' )
+parser.add_argument( '--from-text', action = 'store_true',
+                     help = 'convert the existing text index to the binary format and exit' )
+parser.add_argument( '--jobs', type = int, default = multiprocessing.cpu_count(),
+                     help = 'number of processes converting and parsing the files (default: number of cores)' )
+parser.add_argument( '--rebuild', action = 'store_true',
+                     help = 'ignore the build manifest, convert and parse all the files' )
+parser.add_argument( '--offline', action = 'store_true',
+                     help = 'also store the documentation pages for open-documentation.py --offline' )
+parser.add_argument( '--extractor', choices = [ 'markdown', 'html', 'json', 'verify' ], default = 'markdown',
+                     help = 'read the headings in the markdown files, or in the html files or the JSON AST made by Pandoc, or check that markdown and html give the same index' )
+parser.add_argument( '--store-version', metavar = 'VERSION',
+                     help = 'also add the index to the index store, as this OF version' )
+parser.add_argument( '--profile', metavar = 'REPORT',
+                     help = 'write the time of each stage of the build to this JSON file' )
+parser.add_argument( '--profile-slowest', metavar = 'N', type = int, default = 10,
+                     help = 'number of slowest files in the profile report (default: 10)' )
+parser.add_argument( '--cprofile', metavar = 'STATS',
+                     help = 'write the cProfile statistics of the script process to this file' )
+parser.add_argument( '--watch', action = 'store_true',
+                     help = 'keep running, and update the index when documentation files change (Linux only)' )
+arguments = parser.parse_args()
 
 # Path to the script directory
 scriptDirPath = os.path.dirname(os.path.realpath(__file__))
@@ -104,261 +199,366 @@ indexPath = os.path.join( scriptDirPath, 'index' );
 
 ###################################################################################################
 
-def convertMarkDownToHTML( filePath, fileRelPath, dirRelPath ):
-    
-    """Convert a MarkDown file to an HTML file, for further processing with BeautifulSoup. This use the pandoc program."""
+def storeVersion():
     
-    htmlPath = os.path.join( htmlRootDirPath, dirRelPath ) + '.html'
-        
-    convert = True
-    if( os.path.exists( htmlPath ) ):
-        fileTime = os.path.getmtime( filePath )
-        htmlTime = os.path.getmtime( htmlPath )
-        if( fileTime <= htmlTime ):
-            convert = False
+    """Add the binary index to the index store, if asked with the --store-version option"""
     
-    if( convert ):
-        ( htmlDir, _ ) = os.path.split( htmlPath )
-        if( not os.path.exists( htmlDir ) ):
-            os.makedirs( htmlDir )
-        log( 'Convert "' + fileRelPath + '" to HTML' )
-        command = '"' + pandocExe + '" --quiet -f markdown-space_in_atx_header -t html -s --toc -o "' + htmlPath + '" "' + filePath + '"'
-        args = shlex.split( command )
-        process = subprocess.Popen( args, stdout=subprocess.PIPE, stderr=subprocess.PIPE )
-        stdoutdata, stderrdata = process.communicate()
-        if stderrdata:
-            log( "pandoc failed to parse this markdown file :" + filePath, ERROR )
-            log( "pandoc return this error :", ERROR )
-            log( stderrdata, ERROR )
-        
-    return htmlPath
+    if not arguments.store_version:
+        return
+    index = ofdoc.indexfile.BinaryIndex( os.path.join( indexPath, ofdoc.indexfile.BINARY_INDEX_FILE_NAME ) )
+    try:
+        if ofdoc.indexfile.addStoreVersion( indexPath, arguments.store_version, index ):
+            log( 'Index added to the index store as version ' + arguments.store_version )
+    finally:
+        index.close()
+
 
 ###################################################################################################
 
-def splitDirPath( path ):
-    
-    """Cut the path to a directory into its components"""
-    
-    folders = []
-    
-    while 1:
-        ( path, folder ) = os.path.split(path)
-        if folder != "":
-            folders.append(folder)
-        else:
-            if path != "":
-                folders.append(path)
+# Convert an existing text index, no need for the documentation sources
+if arguments.from_text:
+    if not os.path.isfile( os.path.join( indexPath, ofdoc.indexfile.TEXT_INDEX_FILE_NAME ) ):
+        log( "There is no text index to convert in " + indexPath, ERROR )
+        sys.exit(1)
+    ( topEntries, methods ) = ofdoc.indexfile.readTextIndex( indexPath )
+    ofdoc.fuzzy.writeFuzzyIndex( os.path.join( indexPath, ofdoc.fuzzy.FUZZY_INDEX_FILE_NAME ), ofdoc.indexfile.keywords( topEntries, methods ) )
+    ofdoc.indexfile.writeTagsFile( os.path.join( indexPath, ofdoc.indexfile.TAGS_FILE_NAME ), topEntries, methods )
+    ofdoc.indexfile.writeBinaryIndex( os.path.join( indexPath, ofdoc.indexfile.BINARY_INDEX_FILE_NAME ), topEntries, methods )
+    log( 'Binary index written for ' + str( len( topEntries ) ) + ' classes and functions and ' + str( len( methods ) ) + ' methods names' )
+    storeVersion()
+    sys.exit(0)
+
+# Pandoc is needed to make html files, or the JSON AST
+useHTML = arguments.extractor in ( 'html', 'verify' ) or arguments.offline
+usePandoc = useHTML or arguments.extractor == 'json'
+
+# Check for pandoc file exist
+if usePandoc and not os.path.isfile( pandocExe ):
+    log( "The path to pandoc is incorrect, there is no such file :" + pandocExe, ERROR )
+    sys.exit(1)
+
+if arguments.watch and not ofdoc.watch.isAvailable():
+    log( "The --watch option needs inotify, which is only available on Linux", ERROR )
+    sys.exit(1)
+
+
+###################################################################################################
+
+def findSources():
     
-            break
+    """Traverse the documentation and yield the markdown files as
+    ( filePath, fileRelPath, dirRelPath, name ) tuples"""
     
-    folders.reverse()
-    return folders
+    for dirPath, dirNames, fileNames in profile.timedIterator( 'walk', os.walk( docSourcesRootPath ) ):
+        for fileName in fileNames:
+            
+            # keep only markdown files
+            ( name, ext ) = os.path.splitext( fileName )
+            if( ext != '.markdown' ) : continue
+            
+            # Create paths relatives to the documentation directory 
+            filePath = os.path.join( dirPath, fileName )
+            fileRelPath = os.path.relpath( filePath, docSourcesRootPath )
+            ( dirRelPath, _ ) = os.path.splitext( fileRelPath )
+            
+            yield ( filePath, fileRelPath, dirRelPath, name )
 
 
 ###################################################################################################
 
-def parseFunctionLink( a, fileRelPath ):
+def findJobs( rebuild ):
     
-    """Extract the function name, the function signature, and the anchor from a link HTML tag <a>.
-    Return ( success, name, signature, anchor ) where success is True or False."""
-
-    # Find the text of the link. a.string is not enought because sometimes the link text is
-    # html formated.
-    content = "".join( a.stripped_strings )
-    if not content :
-        log( 'Unable to read function name in file ' + fileRelPath, ERROR )
-        log( 'Tag:', ERROR )
-        log( a, ERROR )
-        return ( False, '', '' ) 
-        
-    else:
-        m = re.search( '^.*?\s(\w+)\(.*\)$', content )
-        if m is None:
-            return ( False, '', '' )
-        else:
-            functionName = m.group(1)
-            return ( True, functionName, content )
-                
+    """Yield the processing jobs of the documentation files, for ofdoc.extractors.processSource().
+    With rebuild, the html files are converted again even if they are more recent than the sources."""
+    
+    for ( sequenceNumber, source ) in enumerate( findSources() ):
+        previous = manifest.sources.get( source[1] )
+        # The sources of an older manifest must be parsed again to find their search documents
+        previousHash = previous[0] if previous is not None and source[1] in manifest.documents else None
+        yield ( sequenceNumber, source, previousHash, rebuild or previous is not None )
+
 
 ###################################################################################################
 
-def createFunctionsIndex( htmlPath, fileRelPath ) :
+def processJobs( jobs, workerSettings, changedPaths ):
     
-    """Add index entries for a set of of functions""" 
-
-    log( 'Parsing ' + fileRelPath )
-    soup = BeautifulSoup( open( htmlPath ), "html5lib" )
-        
-    # Find table of content
-    toc = soup.find(id='TOC')
+    """Yield the results of the processing jobs, in the order of the jobs (see
+    ofdoc.extractors.processSources()).
+    With changedPaths, the set of the paths of the files changed since the last update, only the
+    jobs of these files and of the files unknown to the manifest are processed. The other files are
+    neither read nor hashed: their entries are taken from the manifest."""
     
-    # Find all the functions
-    functionsList = toc.ul.li.ul.li.ul
-    if functionsList is None:
-        log( 'No function list found in ' + fileRelPath, WARNING )
+    if changedPaths is None:
+        for result in ofdoc.extractors.processSources( jobs, workerSettings, arguments.jobs ):
+            yield result
         return
-        
-    functions = functionsList.find_all('li')
     
-    for function in functions:
-    
-        # Find function name
-        ( success, functionName, functionSignature ) = parseFunctionLink( function.a, fileRelPath )
-        if not success:
-            continue
-        if functionName in ofFunctionsList:
-            continue
-        log( "Function found: " + functionName )
-            
-        ofFunctionsList.append( functionName )
-        
-        # Create path to this function.
-        # This path will allow to open the right html page for this class in the documentation.
-        ( fileRelPathWithoutExt, _ ) = os.path.splitext( fileRelPath )
-        # We must remove the addons/ part at the beginning ot the path, if any
-        parts = splitDirPath( fileRelPathWithoutExt )
-        if parts[0] == 'addons' :
-            fileRelPathWithoutExt = '/'.join( parts[ 1: ] )
+    jobs = list( jobs )
+    changedJobs = [ job for job in jobs if job[1][0] in changedPaths or job[2] is None ]
+    results = dict()
+    for result in ofdoc.extractors.processSources( changedJobs, workerSettings, min( arguments.jobs, len( changedJobs ) ) ):
+        results[ result[0] ] = result
+    for ( sequenceNumber, source, previousHash, known ) in jobs:
+        if sequenceNumber in results:
+            yield results[ sequenceNumber ]
         else:
-            fileRelPathWithoutExt = '/'.join( parts )
-        
-        # Remove trailing _functions
-        fileRelPathWithoutExt = fileRelPathWithoutExt[ 0 : -10 ]
-        
-        # Ready to write this entry to the index
-        indexFile.write( functionName + ' ' + fileRelPathWithoutExt + ' show_' + functionName + '\n' )
-        
+            yield ( sequenceNumber, source, previousHash, None, None, None, [], ( dict(), dict() ) )
 
-###################################################################################################
 
-def createClassIndex( htmlPath, fileRelPath ) :
-    
-    """Add index entry for a class""" 
+###################################################################################################
 
-    soup = BeautifulSoup( open( htmlPath ), "html5lib" )
-        
-    # Find table of content
-    toc = soup.find(id='TOC')
-    tocLi = toc.ul.li
-    if toc is None or tocLi is None:
-        log( 'No TOC found in ' + fileRelPath, ERROR )
-        return
+def saveProfile():
     
-    # Find class name
-    title = tocLi.a.string
-    m = re.search( '^class\s+(\w+)_?', title )
-    if m is None:
-        return
-        
-    className = m.group(1)
-    log( "Class found: " + className )
+    """Write the profile report and the cProfile statistics, if asked. The cProfile statistics
+    are only the ones of the first build."""
     
-    # Create path to this class.
-    # This path will allow to open the right html page for this class in the documentation.
-    ( fileRelPathWithoutExt, _ ) = os.path.splitext( fileRelPath )
-    # We must remove the addons/ part at the beginning ot the path, if any
-    parts = splitDirPath( fileRelPathWithoutExt )
-    if parts[0] == 'addons' :
-        fileRelPathWithoutExt = '/'.join( parts[ 1: ] )
-    else:
-        fileRelPathWithoutExt = '/'.join( parts )
+    global profiler
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats( arguments.cprofile )
+        profiler = None
+    if arguments.profile:
+        profile.write( arguments.profile )
+        log( 'Profile report written to ' + arguments.profile )
+
+
+###################################################################################################
+
+def updateIndex( rebuild, changedPaths = None ):
     
-    # Trailing underscores must be ignored
-    if fileRelPathWithoutExt.endswith( '_' ) :
-        fileRelPathWithoutExt = fileRelPathWithoutExt[ 0 : -1 ]
+    """Update the index with the documentation files that changed since the last build, or with all
+    the files if rebuild is True. With changedPaths (--watch), only these files are read again (see
+    processJobs()). Return False if the verify extractor found differences."""
     
-    # Ready to write this entry to the index
-    indexFile.write( className + ' ' + fileRelPathWithoutExt + '\n' )
+    global profile, manifest
     
-    # Find methods list for this class
+    # The time of each stage of the build, see ofdoc/profiling.py
+    profile = ofdoc.profiling.Profile( arguments.profile_slowest )
+    for name in ( 'extractor', 'jobs', 'offline', 'text_index', 'watch' ):
+        profile.settings[ name ] = getattr( arguments, name )
+    profile.settings[ 'rebuild' ] = rebuild
     
-    if tocLi.ul is None:
-        return
-        
-    methods = None
-    for li in tocLi.ul.find_all('li'):
-        if li.a is None:
-            continue
-        if li.a.string == 'Methods':
-            if li.ul is None:
-                continue
-            methods = li.ul.find_all('li')
-            
-    if methods is None:
-        return
+    # The manifest of the last build, and the one of this build.
+    # The entries of the last build are not used if they were found with another extractor, and all
+    # the files must be parsed to verify the extractors.
+    manifestPath = os.path.join( indexPath, ofdoc.manifest.MANIFEST_FILE_NAME )
+    with profile.stage( 'manifest loading' ):
+        previousManifest = ofdoc.manifest.Manifest.load( manifestPath )
+    if rebuild or arguments.extractor == 'verify' or previousManifest.extractor != arguments.extractor:
+        manifest = ofdoc.manifest.Manifest()
+    else:
+        manifest = previousManifest
+    newManifest = ofdoc.manifest.Manifest()
+    newManifest.extractor = arguments.extractor
+
+    # The files for which the verify extractor found differences
+    verificationFailures = []
+
+    # The classes, the global functions and the classes methods, in the order they are found.
+    # A global function may be overloaded, only its first entry is kept. A same method name can be
+    # used in several different classes, so each method name is associated to the list of the
+    # classes that have it.
+    index = ofdoc.indexfile.IndexBuilder()
+
+    # Traverse the documentation to find OF keywords, and collect the index entries for all the classes
+    # and the globalMethods.
+    # The files are converted and parsed by a pool of worker processes (see ofdoc/extractors.py). The
+    # documentation is traversed as the workers need new files, and the entries of each file are merged
+    # to the index in the order of the traversal, to get the same index whatever the number of jobs.
+    # Files that didn't change since the last build are neither converted nor parsed, their entries are
+    # taken from the manifest.
+
+    workerSettings = {
+        'pandocExe': pandocExe,
+        'htmlRootDirPath': htmlRootDirPath,
+        'extractor': arguments.extractor,
+        'offline': arguments.offline }
+
+    changedSourcesCount = 0
+    sourcesStart = time.time()
+    for ( sequenceNumber, source, sourceHash, entries, documents, markdownEntries, messages, ( times, counts ) ) in processJobs( findJobs( rebuild ), workerSettings, changedPaths ):
     
-    # Memorize the names and the links to these methods
+        ( filePath, fileRelPath, dirRelPath, name ) = source
+        profile.addFile( fileRelPath, times )
+        for ( counter, value ) in counts.items():
+            profile.count( counter, value )
+        for ( level, message ) in messages:
+            log( message, level )
+        sys.stdout.flush()
     
-    for method in methods:
-        ( success, functionName, functionSignature ) = parseFunctionLink( method.a, fileRelPath )
-        if not success:
-            continue
-        log( 'Method found: ' + className + '::' + functionName + '()' )
-        entry = ( className, fileRelPathWithoutExt )
-        if functionName in classesMethods:
-            if not entry in classesMethods[ functionName ]:
-                classesMethods[ functionName ].append( entry );
+        profile.count( 'sources' )
+        if entries is None:
+            entries = manifest.sources[ fileRelPath ][1]
+            documents = manifest.documents[ fileRelPath ]
+            profile.count( 'sources unchanged' )
         else:
-            classesMethods[ functionName ] = [ entry ];
-    
+            changedSourcesCount += 1
+            profile.count( 'sources parsed' )
+        if markdownEntries is not None:
+            verificationFailures.append( fileRelPath )
+            log( 'The markdown and html extractors disagree on ' + fileRelPath, ERROR )
+            log( 'html:     ' + repr( entries ), ERROR )
+            log( 'markdown: ' + repr( markdownEntries ), ERROR )
+        newManifest.sources[ fileRelPath ] = ( sourceHash, entries )
+        newManifest.documents[ fileRelPath ] = documents
+        with profile.stage( 'merge' ):
+            index.addEntries( entries )
+
+    profile.add( 'sources', time.time() - sourcesStart, len( newManifest.sources ) )
+
+    # Forget the files deleted since the last build
+    deletedSources = [ path for path in previousManifest.sources if path not in newManifest.sources ]
+    profile.count( 'sources removed', len( deletedSources ) )
+    for fileRelPath in deletedSources:
+        log( 'Removed "' + fileRelPath + '"' )
+        ( dirRelPath, _ ) = os.path.splitext( fileRelPath )
+        htmlPath = os.path.join( htmlRootDirPath, dirRelPath ) + '.html'
+        if os.path.isfile( htmlPath ):
+            os.remove( htmlPath )
+
+    # Nothing to do if the index of the last build is still valid
+    binaryIndexPath = os.path.join( indexPath, ofdoc.indexfile.BINARY_INDEX_FILE_NAME )
+    fuzzyIndexPath = os.path.join( indexPath, ofdoc.fuzzy.FUZZY_INDEX_FILE_NAME )
+    searchIndexPath = os.path.join( indexPath, ofdoc.search.SEARCH_INDEX_FILE_NAME )
+    signaturesPath = os.path.join( indexPath, ofdoc.signatures.SIGNATURES_FILE_NAME )
+    tagsPath = os.path.join( indexPath, ofdoc.indexfile.TAGS_FILE_NAME )
+    offlinePackPath = os.path.join( indexPath, ofdoc.offline.OFFLINE_PACK_FILE_NAME )
+    if( changedSourcesCount == 0 and not deletedSources
+        and os.path.isfile( binaryIndexPath ) and os.path.isfile( fuzzyIndexPath ) and os.path.isfile( searchIndexPath )
+        and os.path.isfile( signaturesPath ) and os.path.isfile( tagsPath )
+        and ( previousManifest.textIndex or not arguments.text_index )
+        and ( ( previousManifest.offlinePack and os.path.isfile( offlinePackPath ) ) or not arguments.offline ) ):
+        log( 'The index is up to date' )
+        with profile.stage( 'index store' ):
+            storeVersion()
+        saveProfile()
+        return True
+
+    # Write the index. Each file is only replaced if its content changed, and index.bin is replaced
+    # last, when the files that go with it are ready.
+    with profile.stage( 'merge', 0 ):
+        topEntries = index.topEntries()
+        methods = index.methodsEntries()
+    with profile.stage( 'fuzzy index' ):
+        ofdoc.fuzzy.writeFuzzyIndex( fuzzyIndexPath, ofdoc.indexfile.keywords( topEntries, methods ) )
+    with profile.stage( 'tags file' ):
+        ofdoc.indexfile.writeTagsFile( tagsPath, topEntries, methods )
+    signatures = index.signatures()
+    with profile.stage( 'signatures', len( signatures ) ):
+        ofdoc.signatures.writeSignatureIndex( signaturesPath, signatures )
+    documents = [ document for fileRelPath in newManifest.sources for document in newManifest.documents[ fileRelPath ] ]
+    with profile.stage( 'search index', len( documents ) ):
+        ofdoc.search.writeSearchIndex( searchIndexPath, documents )
+    if arguments.text_index:
+        # One file for the classes and the functions, one file per method name
+        with profile.stage( 'text index', 1 + len( methods ) ):
+            ofdoc.indexfile.writeTextIndex( indexPath, topEntries, methods, previousManifest.methodNames )
+        newManifest.textIndex = True
+        newManifest.methodNames = sorted( methods )
+    else:
+        newManifest.methodNames = previousManifest.methodNames
+
+    # Store the documentation pages for the offline mode. The class and the functions of a same header
+    # (ofImage_.markdown and ofImage_functions.markdown) share the same page, the class first.
+    if arguments.offline:
+        offlineStart = time.time()
+        pagesFiles = dict()
+        for fileRelPath in newManifest.sources:
+            ( dirRelPath, _ ) = os.path.splitext( fileRelPath )
+            isFunctions = os.path.basename( dirRelPath ).endswith( '_functions' )
+            if isFunctions:
+                pagePathWithoutExt = ofdoc.extractors.functionsPagePath( fileRelPath )
+            else:
+                pagePathWithoutExt = ofdoc.extractors.classPagePath( fileRelPath )
+            pagesFiles.setdefault( pagePathWithoutExt, [] ).append( ( isFunctions, os.path.join( htmlRootDirPath, dirRelPath ) + '.html' ) )
+        pages = []
+        for pagePathWithoutExt, files in pagesFiles.items():
+            htmls = []
+            for ( _, htmlPath ) in sorted( files ):
+                with open( htmlPath, 'rb' ) as f:
+                    htmls.append( f.read() )
+            pages.append( ( pagePathWithoutExt, ofdoc.offline.preparePage( htmls, pagePathWithoutExt ) ) )
+        ( pageCount, blobCount ) = ofdoc.offline.writePack( offlinePackPath, pages )
+        profile.add( 'offline pack', time.time() - offlineStart, pageCount )
+        newManifest.offlinePack = True
+        log( 'Offline pack written for ' + str( pageCount ) + ' pages (' + str( blobCount ) + ' distinct contents)' )
+
+    with profile.stage( 'binary index' ):
+        ofdoc.indexfile.writeBinaryIndex( binaryIndexPath, topEntries, methods )
+    with profile.stage( 'index store' ):
+        storeVersion()
+    with profile.stage( 'manifest writing' ):
+        newManifest.save( manifestPath )
+    log( str( changedSourcesCount ) + ' files parsed, ' + str( len( deletedSources ) ) + ' files removed' )
+    saveProfile()
+
+    if arguments.extractor == 'verify':
+        if verificationFailures:
+            log( 'The extractors disagree on ' + str( len( verificationFailures ) ) + ' files', ERROR )
+            return False
+        log( 'The markdown and html extractors give the same index for ' + str( changedSourcesCount ) + ' files', WARNING )
+    return True
 
 
 ###################################################################################################
 
-# Create the directory for the index
-if( not os.path.exists( indexPath )):
-    os.makedirs( indexPath )
-indexFile = open( os.path.join( indexPath, 'classesAndGlobalFunctions.txt' ), 'w' )
-
-# Create the directory for the files created by Pandoc
-htmlRootDirPath = os.path.join( indexPath, 'html' )
-if( not os.path.exists( htmlRootDirPath )):
-    os.makedirs( htmlRootDirPath )
-
-# List of all the OF global functions. Used to memorize the OF global functions and avoid multiple
-# identicals entries in the index (because these functions may be overloaded).
-# createFunctionsIndex() will populate this list.
-ofFunctionsList = []
-
-# All the classes methods.
-# Keys of the dictionnary are the functions names.
-# The value are list. Each list contains pairs in the form ( className, fileRelPathWithoutExt ).
-# createClassIndex() will populate this dictionnary.
-classesMethods = dict()
-
-# Traverse the documentation to find OF keywords,
-# and write the index for all the classes and the globalMethods
+def watchDocumentation( watcher ):
+    
+    """Update the index each time documentation files change, until the script is interrupted.
+    A failed update is logged with the files it was updating, whatever the error, and the next
+    update checks all the files. Only Ctrl+C stops watching."""
+    
+    log( 'Watching ' + docSourcesRootPath + ' for changes, press Ctrl+C to stop', WARNING )
+    checkAll = False
+    try:
+        while True:
+            changedPaths = watcher.wait()
+            if checkAll or changedPaths is None:
+                changedPaths = None
+                log( 'Checking all the documentation files' )
+            else:
+                log( str( len( changedPaths ) ) + ' documentation files changed' )
+            try:
+                updateIndex( False, changedPaths )
+                checkAll = False
+            except Exception as e:
+                if changedPaths is None:
+                    files = 'all the documentation files'
+                else:
+                    files = ', '.join( sorted( [ os.path.relpath( path, docSourcesRootPath ) for path in changedPaths ] ) )
+                log( 'The index update failed, while updating ' + files + ':', ERROR )
+                log( traceback.format_exc().rstrip(), ERROR )
+                checkAll = True
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        log( 'Stopped watching the documentation', WARNING )
+    finally:
+        watcher.close()
 
-for dirPath, dirNames, fileNames in os.walk( docSourcesRootPath ):
-    for fileName in fileNames:
-        
-        # keep only markdown files
-        ( name, ext ) = os.path.splitext( fileName )
-        if( ext != '.markdown' ) : continue
-        
-        # Create paths relatives to the documentation directory 
-        filePath = os.path.join( dirPath, fileName )
-        fileRelPath = os.path.relpath( filePath, docSourcesRootPath )
-        ( dirRelPath, _ ) = os.path.splitext( fileRelPath )
-        
-        # Convert markdown file to HTML file, with a TOC, to make it parsable with BeautifulSoup
-        htmlPath = convertMarkDownToHTML( filePath, fileRelPath, dirRelPath )
-        
-        sys.stdout.flush()
-        
-        # Generate the index for a class or a set of functions, according to the file name
-        if name.endswith( '_functions' ):
-            createFunctionsIndex( htmlPath, fileRelPath )
-        else:
-            createClassIndex( htmlPath, fileRelPath )
-            
-indexFile.close()
 
-# Create the index for each classes method found, because a same method name can be use in several different classes
+###################################################################################################
 
-for functionName, entries in classesMethods.iteritems():
-    indexFile = open( os.path.join( indexPath, functionName + '.txt' ), 'w' )
-    for ( className, fileRelPathWithoutExt ) in entries:
-        # print functionName, className, fileRelPathWithoutExt
-        indexFile.write( className + ' ' + fileRelPathWithoutExt + '.html#show_' + functionName + '\n' )
-    indexFile.close()
+# The worker processes import this script on Windows: only the main process must build the index
+if __name__ == '__main__':
+    
+    profiler = None
+    if arguments.cprofile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    # Create the directory for the index
+    if( not os.path.exists( indexPath )):
+        os.makedirs( indexPath )
+
+    # Create the directory for the files created by Pandoc
+    htmlRootDirPath = os.path.join( indexPath, 'html' )
+    if( useHTML and not os.path.exists( htmlRootDirPath )):
+        os.makedirs( htmlRootDirPath )
+    
+    # The documentation is watched before the first build, so that no change is missed
+    watcher = ofdoc.watch.Watcher( docSourcesRootPath ) if arguments.watch else None
+    
+    if not updateIndex( arguments.rebuild ) and watcher is None:
+        sys.exit(1)
+    if watcher is not None:
+        watchDocumentation( watcher )
@@ -0,0 +1,57 @@
+# coding=utf-8
+
+"""Modules shared by generate-index.py and open-documentation.py.
+
+indexfile
+    Build, read and write the OF keywords index, in the compact binary format (index.bin) or in
+    the old text format (classesAndGlobalFunctions.txt and one file per method name), and write
+    the ctags compatible tags file.
+
+markdown
+    Read the headings of a markdown documentation file, without Pandoc.
+
+pandocjson
+    Read the headings of the documentation files in the Pandoc JSON AST, converting several files
+    per Pandoc run.
+
+extractors
+    Find the index entries of the documentation files (Pandoc conversion, html or markdown
+    parsing), in a pool of worker processes.
+
+manifest
+    Remember the hash and the index entries of each documentation source, to make the index
+    updates incremental.
+
+daemon
+    Resident lookup mode of open-documentation.py, over a local Unix socket.
+
+fuzzy
+    Prefix and fuzzy search of the keywords (fuzzy.bin), to propose candidates for an unknown
+    keyword.
+
+resolver
+    Resolve many keywords in a single process, for the scripts that link whole source files.
+
+scanner
+    Find the OF identifiers used in the C++ sources of a project (cross-reference.py).
+
+offline
+    Store the documentation pages in a compressed pack (offline.pack), and extract them to open
+    them without network access.
+
+search
+    Full-text search in the descriptions of the documentation (search.bin), with BM25 ranking.
+
+signatures
+    Overloads of the functions and methods (signatures.bin), to open the overload matching a call.
+
+watch
+    Watch the documentation directory with inotify, for generate-index.py --watch.
+
+choices
+    Classes chosen in the selection window of open-documentation.py, for each method and project.
+
+profiling
+    Time of each stage of generate-index.py, written as a JSON report by --profile.
+
+"""
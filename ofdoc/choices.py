@@ -0,0 +1,163 @@
+# coding=utf-8
+
+"""Remember the classes chosen in the class selection window of open-documentation.py.
+
+When a method name belongs to several classes, open-documentation.py asks for the class. The
+choices are counted for each method name and each project directory (the directory the lookup
+comes from), and stored in choices.json, in the index directory. Then, for the next lookups of
+the method in the project:
+- if a class was chosen at least CONFIDENT_COUNT times, and for at least CONFIDENT_SHARE of the
+  choices, its page is opened at once, without the selection window.
+- otherwise the selection window shows the classes the most chosen in the project first, then the
+  ones the most chosen in the other projects, and the first one is selected.
+
+The file keeps at most MAX_ENTRIES ( project, method name ) entries. When there are more, the
+least frequently used entries are forgotten, the least recently used first for a same frequency.
+An entry is used by each choice, and by each lookup it answers without the window.
+
+"""
+
+import os.path
+import json
+
+import ofdoc.indexfile
+
+# Name of the choices file, in the index directory
+CHOICES_FILE_NAME = 'choices.json'
+
+# Version of the file content. A file with another version is ignored.
+FORMAT = 1
+
+# Largest number of ( project, method name ) entries kept
+MAX_ENTRIES = 1000
+
+# Choices needed to open a class without asking
+CONFIDENT_COUNT = 3
+CONFIDENT_SHARE = 0.8
+
+
+###################################################################################################
+
+def toStr( value ):
+
+    """Convert a unicode string read by json to str"""
+
+    if isinstance( value, unicode ):
+        return value.encode( 'utf-8' )
+    return value
+
+
+###################################################################################################
+
+class ChoiceCache( object ):
+
+    """The classes chosen for each method name, in each project"""
+
+    def __init__( self ):
+        # Keys are ( project, keyword ) tuples, values are [ uses, lastUse, choices ] lists: the
+        # number of times the entry was used, the clock value of its last use, and a dictionary of
+        # the number of times each class was chosen
+        self.entries = dict()
+        # Incremented by each use of an entry
+        self.clock = 0
+
+    @staticmethod
+    def load( filePath ):
+
+        """Read the choices. Return an empty cache if the file doesn't exist or can't be read."""
+
+        cache = ChoiceCache()
+        if not os.path.isfile( filePath ):
+            return cache
+        try:
+            with open( filePath, 'r' ) as f:
+                content = json.load( f )
+            if content.get( 'format' ) != FORMAT:
+                return cache
+            for ( project, keyword, uses, lastUse, choices ) in content[ 'entries' ]:
+                choices = dict( [ ( toStr( className ), count ) for ( className, count ) in choices.items() ] )
+                cache.entries[ ( toStr( project ), toStr( keyword ) ) ] = [ uses, lastUse, choices ]
+            cache.clock = content[ 'clock' ]
+        except ( ValueError, KeyError, TypeError, AttributeError ):
+            return ChoiceCache()
+        return cache
+
+    def save( self, filePath ):
+
+        """Write the choices, forgetting the least frequently used entries if there are too many"""
+
+        if len( self.entries ) > MAX_ENTRIES:
+            byUse = sorted( self.entries.items(), key = lambda item: ( item[1][0], item[1][1] ) )
+            for ( key, _ ) in byUse[ : len( self.entries ) - MAX_ENTRIES ]:
+                del self.entries[ key ]
+        entries = [ [ project, keyword ] + entry for ( ( project, keyword ), entry ) in sorted( self.entries.items() ) ]
+        temporaryPath = filePath + '.tmp'
+        with open( temporaryPath, 'w' ) as f:
+            json.dump( { 'format': FORMAT, 'clock': self.clock, 'entries': entries }, f, separators = ( ',', ':' ) )
+        ofdoc.indexfile.replaceFile( temporaryPath, filePath )
+
+    def use( self, project, keyword, className = None ):
+
+        """Count a use of the entry of the keyword in the project, and the choice of className if
+        it is not None"""
+
+        self.clock += 1
+        entry = self.entries.setdefault( ( project, keyword ), [ 0, 0, dict() ] )
+        entry[0] += 1
+        entry[1] = self.clock
+        if className is not None:
+            entry[2][ className ] = entry[2].get( className, 0 ) + 1
+
+    def confidentChoice( self, project, keyword ):
+
+        """Return the class chosen often enough for the keyword in the project to be opened
+        without asking, or None"""
+
+        entry = self.entries.get( ( project, keyword ) )
+        if entry is None or not entry[2]:
+            return None
+        choices = entry[2]
+        ( count, className ) = max( [ ( count, className ) for ( className, count ) in choices.items() ] )
+        if count >= CONFIDENT_COUNT and count >= CONFIDENT_SHARE * sum( choices.values() ):
+            return className
+        return None
+
+    def rank( self, project, keyword, classNames ):
+
+        """Return the positions of the classNames, sorted by the number of times the class was
+        chosen for the keyword in the project, then in all the projects. The order of the classNames
+        is kept for a same number of choices."""
+
+        counts = dict()
+        allCounts = dict()
+        for ( ( entryProject, entryKeyword ), ( uses, lastUse, choices ) ) in self.entries.items():
+            if entryKeyword != keyword:
+                continue
+            for ( className, count ) in choices.items():
+                allCounts[ className ] = allCounts.get( className, 0 ) + count
+                if entryProject == project:
+                    counts[ className ] = count
+        return sorted( range( len( classNames ) ),
+                       key = lambda i: ( -counts.get( classNames[i], 0 ), -allCounts.get( classNames[i], 0 ), i ) )
+
+
+###################################################################################################
+
+def loadChoices( indexPath ):
+
+    """Read the choices file of the index directory"""
+
+    return ChoiceCache.load( os.path.join( indexPath, CHOICES_FILE_NAME ) )
+
+
+###################################################################################################
+
+def saveChoices( indexPath, cache ):
+
+    """Write the choices file of the index directory. The choices are only a convenience: if the
+    file can't be written, a warning is printed."""
+
+    try:
+        cache.save( os.path.join( indexPath, CHOICES_FILE_NAME ) )
+    except EnvironmentError as e:
+        print 'Warning: The class choices can\'t be saved: ' + str( e )
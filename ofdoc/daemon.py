@@ -0,0 +1,227 @@
+# coding=utf-8
+
+"""Resident lookup mode for open-documentation.py.
+
+open-documentation.py --daemon loads the index once and waits for lookups on a local Unix socket.
+When it runs, open-documentation.py only forwards the keyword to it and exits, without loading the
+index nor the GUI and web browser modules.
+
+Protocol
+========
+
+The client sends one line made of tab separated fields, the first one being the command:
+    lookup<TAB>keyword<TAB>project
+    choose<TAB>keyword<TAB>project
+    stop
+project is the directory the lookup comes from, for the choice of the class of a method (choose
+always asks for the class). complete and search take the same fields as lookup.
+The daemon answers with the text the client must print, and closes the connection. Then it does
+the requested action (open the web browser, show the selection window...) in a child process, so
+that it keeps answering the other requests while a selection window waits for the user.
+A client that gets no answer within REPLY_TIMEOUT seconds does the lookup itself.
+
+Only small built-in modules are imported by the client functions, to keep its start up fast. The
+socket module is not one of them: it loads the SSL support, which takes longer than the whole lookup.
+The client uses the _socket built-in module instead.
+
+"""
+
+import os
+import sys
+import errno
+import _socket
+import zlib
+
+# Largest request accepted by the daemon
+MAX_REQUEST_SIZE = 4096
+
+# Longest wait of a client for the answer of the daemon, in seconds
+REPLY_TIMEOUT = 5.0
+
+
+###################################################################################################
+
+def isAvailable():
+
+    """Unix sockets are not available on every platform"""
+
+    return hasattr( _socket, 'AF_UNIX' )
+
+
+###################################################################################################
+
+def socketPath( indexPath, versionName = '' ):
+
+    """Path to the socket of the daemon serving an index.
+    Each index directory, and each version of its index store, has its own daemon."""
+
+    indexId = zlib.crc32( ( os.path.realpath( indexPath ) + ( '\0' + versionName if versionName else '' ) ).encode( 'utf-8' ) ) & 0xffffffff
+    uid = os.getuid() if hasattr( os, 'getuid' ) else 0
+    tempDir = os.environ.get( 'TMPDIR', '/tmp' )
+    return os.path.join( tempDir, 'ofdoc-%d-%08x.sock' % ( uid, indexId ) )
+
+
+###################################################################################################
+
+def connect( path, timeout = None ):
+
+    """Connect to the daemon. Return the socket, or None if no daemon is running.
+    timeout is the timeout of the socket operations, in seconds (None waits forever)."""
+
+    if not isAvailable() or not os.path.exists( path ):
+        return None
+    connection = _socket.socket( _socket.AF_UNIX, _socket.SOCK_STREAM )
+    connection.settimeout( timeout )
+    try:
+        connection.connect( path )
+    except _socket.error:
+        connection.close()
+        return None
+    return connection
+
+
+###################################################################################################
+
+def send( path, *fields ):
+
+    """Send a request to the daemon and return its answer, or None if no daemon is running or if it
+    doesn't answer within REPLY_TIMEOUT seconds"""
+
+    connection = connect( path, REPLY_TIMEOUT )
+    if connection is None:
+        return None
+    try:
+        connection.sendall( '\t'.join( fields ) + '\n' )
+        chunks = []
+        while True:
+            chunk = connection.recv( 4096 )
+            if not chunk:
+                break
+            chunks.append( chunk )
+    except _socket.error:
+        return None
+    finally:
+        connection.close()
+    return ''.join( chunks )
+
+
+###################################################################################################
+
+def readRequest( connection ):
+
+    """Read the request line sent by a client, and return its fields"""
+
+    data = ''
+    while '\n' not in data and len( data ) < MAX_REQUEST_SIZE:
+        chunk = connection.recv( 1024 )
+        if not chunk:
+            break
+        data += chunk
+    return data.split( '\n', 1 )[0].split( '\t' )
+
+
+###################################################################################################
+
+def runAction( action ):
+
+    """Call the action of a request in a child process, and return at once. Without fork, the
+    action is called in the daemon process."""
+
+    if hasattr( os, 'fork' ):
+        # The child would write the pending output again
+        sys.stdout.flush()
+        if os.fork() != 0:
+            return
+        # Child process: it must never go back to the accept loop
+        try:
+            callAction( action )
+            sys.stdout.flush()
+        finally:
+            os._exit( 0 )
+    callAction( action )
+
+
+###################################################################################################
+
+def callAction( action ):
+
+    """Call the action of a request. The daemon must survive, for example, a selection window that
+    can't be opened."""
+
+    try:
+        action()
+    except Exception as e:
+        os.write( 2, 'Error: ' + str( e ) + '\n' )
+
+
+###################################################################################################
+
+def reapChildren():
+
+    """Wait for the child processes of the actions that have ended"""
+
+    while True:
+        try:
+            ( pid, _ ) = os.waitpid( -1, os.WNOHANG )
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            # ECHILD: no child process
+            return
+        if pid == 0:
+            return
+
+
+###################################################################################################
+
+def serve( path, handler ):
+
+    """Serve the requests until a stop request is received.
+    handler( fields ) must return ( reply, action ): the text to send back to the client, and a
+    function to call once the client has been answered (or None), in a child process (see runAction()).
+    Return False if another daemon is already running."""
+
+    import socket
+
+    running = connect( path )
+    if running is not None:
+        running.close()
+        return False
+    if os.path.exists( path ):
+        # A daemon has been killed without removing its socket
+        os.remove( path )
+
+    server = socket.socket( socket.AF_UNIX, socket.SOCK_STREAM )
+    # Only the current user can connect to the daemon
+    umask = os.umask( 0o077 )
+    try:
+        server.bind( path )
+    finally:
+        os.umask( umask )
+    server.listen( 5 )
+
+    try:
+        while True:
+            ( connection, _ ) = server.accept()
+            reapChildren()
+            try:
+                fields = readRequest( connection )
+                if fields[0] == 'stop':
+                    connection.sendall( 'Daemon stopped\n' )
+                    break
+                try:
+                    ( reply, action ) = handler( fields )
+                except Exception as e:
+                    ( reply, action ) = ( 'Error: ' + str( e ), None )
+                connection.sendall( reply + '\n' )
+            except socket.error:
+                continue
+            finally:
+                connection.close()
+            if action is not None:
+                runAction( action )
+    finally:
+        server.close()
+        if os.path.exists( path ):
+            os.remove( path )
+    return True
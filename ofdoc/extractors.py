@@ -0,0 +1,728 @@
+# coding=utf-8
+
+"""Find the index entries of the documentation files, for generate-index.py.
+
+The files are converted and parsed by a pool of worker processes, so that the parsing (the slowest
+part with BeautifulSoup) uses all the cores. Each worker reads the source file, checks its hash
+against the last build, converts it to html with Pandoc if needed, and finds its index entries with
+the chosen extractor (see generate-index.py). It sends back the entries and the messages to print:
+generate-index.py merges the entries and prints the messages in the order of the directory walk, so
+the index and the output don't depend on the number of jobs. The worker also sends back the time
+taken by each stage (hash, pandoc, parsing) for generate-index.py --profile (see ofdoc/profiling.py).
+
+The worker also cuts the file in documents for the full-text search (see ofdoc/search.py). The
+text of the documents is always read in the markdown file, whatever the extractor: it is the text
+of the html page, without the need for Pandoc.
+
+With the json extractor, a worker processes the files by batches: the files of a batch that changed
+since the last build are converted by a single Pandoc run (see ofdoc/pandocjson.py).
+
+At most a few files per worker are waiting to be processed or to be merged, so the memory used
+doesn't grow with the size of the documentation: the directory walk, the parsing and the merge of
+the entries in the index tables progress together.
+
+"""
+
+import os.path
+import time
+import errno
+import re
+import subprocess, shlex
+import collections
+import multiprocessing
+
+import ofdoc.manifest
+import ofdoc.markdown
+import ofdoc.pandocjson
+import ofdoc.search
+
+# Messages levels, the same as in generate-index.py
+NOTICE = 0
+WARNING = 1
+ERROR = 2
+
+# Files waiting in the pool, per worker
+FILES_PER_WORKER = 4
+
+# Files converted by a single Pandoc run with the json extractor, and batches waiting in the pool,
+# per worker
+FILES_PER_BATCH = 32
+BATCHES_PER_WORKER = 2
+
+# The start of the TOC element in the html files written by Pandoc: <div id="TOC">, or
+# <nav id="TOC" role="doc-toc"> with the recent versions
+tocStartRegex = re.compile( r'<(div|nav)\s[^>]*\bid\s*=\s*["\']?TOC\b[^>]*>', re.IGNORECASE )
+
+# The settings of the worker: pandocExe, htmlRootDirPath, extractor ('markdown', 'html', 'json' or
+# 'verify'), offline (are the html files needed for the offline pack ?)
+settings = dict()
+
+# The headings of the files converted by the batch being processed (see processBatch()). Keys are the
+# files paths, values are ( headings, seconds ), seconds being the share of the file in the time of
+# the Pandoc run.
+batchHeadings = dict()
+
+# The messages of the file being processed, as ( level, message ) tuples
+messages = []
+
+# The time of each stage of the file being processed, in seconds, and its counters, like
+# { 'pandoc': 0.2 } and { 'conversions skipped': 1 }
+times = dict()
+counts = dict()
+
+
+###################################################################################################
+
+def log( message, level = NOTICE ):
+    
+    """Keep the message, generate-index.py will print it"""
+    
+    if not isinstance( message, basestring ):
+        message = str( message )
+    messages.append( ( level, message ) )
+
+
+###################################################################################################
+
+def convertMarkDownToHTML( filePath, fileRelPath, dirRelPath, force = False ):
+    
+    """Convert a MarkDown file to an HTML file, for further processing with BeautifulSoup. This use the pandoc program.
+    Unless force is True, the conversion is skipped if the HTML file is more recent than the MarkDown file."""
+    
+    htmlPath = os.path.join( settings[ 'htmlRootDirPath' ], dirRelPath ) + '.html'
+        
+    convert = True
+    if( not force and os.path.exists( htmlPath ) ):
+        fileTime = os.path.getmtime( filePath )
+        htmlTime = os.path.getmtime( htmlPath )
+        if( fileTime <= htmlTime ):
+            convert = False
+            counts[ 'conversions skipped' ] = counts.get( 'conversions skipped', 0 ) + 1
+    
+    if( convert ):
+        start = time.time()
+        ( htmlDir, _ ) = os.path.split( htmlPath )
+        try:
+            os.makedirs( htmlDir )
+        except OSError as e:
+            # The directory may exists, or may have been created by another conversion job
+            if e.errno != errno.EEXIST:
+                raise
+        log( 'Convert "' + fileRelPath + '" to HTML' )
+        command = '"' + settings[ 'pandocExe' ] + '" --quiet -f markdown-space_in_atx_header -t html -s --toc -o "' + htmlPath + '" "' + filePath + '"'
+        args = shlex.split( command )
+        process = subprocess.Popen( args, stdout=subprocess.PIPE, stderr=subprocess.PIPE )
+        stdoutdata, stderrdata = process.communicate()
+        if stderrdata:
+            log( "pandoc failed to parse this markdown file :" + filePath, ERROR )
+            log( "pandoc return this error :", ERROR )
+            log( stderrdata, ERROR )
+        times[ 'pandoc' ] = times.get( 'pandoc', 0.0 ) + time.time() - start
+        counts[ 'conversions' ] = counts.get( 'conversions', 0 ) + 1
+        
+    return htmlPath
+
+###################################################################################################
+
+def readTocHtml( htmlPath ):
+    
+    """Return the html of the TOC element of an html file written by Pandoc. Only the TOC is parsed
+    by BeautifulSoup, not the whole page: the descriptions of the page make most of its size, and
+    they are not used. Return the whole html if the TOC element is not found."""
+    
+    with open( htmlPath, 'rb' ) as f:
+        html = f.read()
+    start = tocStartRegex.search( html )
+    if start is None:
+        return html
+    
+    # Find the end of the element: the tags of the same name are counted, the comments skipped
+    tagRegex = re.compile( r'<!--.*?-->|<(/?)' + start.group(1) + r'\b[^>]*>', re.IGNORECASE | re.DOTALL )
+    depth = 0
+    for m in tagRegex.finditer( html, start.start() ):
+        if m.group(0).startswith( '<!--' ):
+            continue
+        depth += -1 if m.group(1) else 1
+        if depth == 0:
+            return html[ start.start() : m.end() ]
+    return html
+
+
+###################################################################################################
+
+def splitDirPath( path ):
+    
+    """Cut the path to a directory into its components"""
+    
+    folders = []
+    
+    while 1:
+        ( path, folder ) = os.path.split(path)
+        if folder != "":
+            folders.append(folder)
+        else:
+            if path != "":
+                folders.append(path)
+    
+            break
+    
+    folders.reverse()
+    return folders
+
+
+###################################################################################################
+
+def parseFunctionLink( a, fileRelPath ):
+    
+    """Extract the function name, the function signature, and the anchor from a link HTML tag <a>.
+    Return ( success, name, signature, anchor ) where success is True or False."""
+
+    # Find the text of the link. a.string is not enought because sometimes the link text is
+    # html formated.
+    content = "".join( a.stripped_strings )
+    if not content :
+        log( 'Unable to read function name in file ' + fileRelPath, ERROR )
+        log( 'Tag:', ERROR )
+        log( a, ERROR )
+        return ( False, '', '' ) 
+        
+    else:
+        return parseFunctionText( content )
+                
+
+###################################################################################################
+
+def parseFunctionText( content ):
+    
+    """Extract the function name from a function signature.
+    Return ( success, name, signature ) where success is True or False."""
+    
+    m = re.search( '^.*?\s(\w+)\(.*\)$', content )
+    if m is None:
+        return ( False, '', '' )
+    else:
+        functionName = m.group(1)
+        return ( True, functionName, content )
+
+
+###################################################################################################
+
+def pagePath( fileRelPath ):
+    
+    """Create the path to the documentation page of a markdown file, without extension.
+    This path will allow to open the right html page in the documentation."""
+    
+    ( fileRelPathWithoutExt, _ ) = os.path.splitext( fileRelPath )
+    # We must remove the addons/ part at the beginning ot the path, if any
+    parts = splitDirPath( fileRelPathWithoutExt )
+    if parts[0] == 'addons' :
+        return '/'.join( parts[ 1: ] )
+    else:
+        return '/'.join( parts )
+
+
+###################################################################################################
+
+def functionsPagePath( fileRelPath ):
+    
+    """Create the path to the documentation page of a set of functions"""
+    
+    # Remove trailing _functions
+    return pagePath( fileRelPath )[ 0 : -10 ]
+
+
+###################################################################################################
+
+def classPagePath( fileRelPath ):
+    
+    """Create the path to the documentation page of a class"""
+    
+    fileRelPathWithoutExt = pagePath( fileRelPath )
+    # Trailing underscores must be ignored
+    if fileRelPathWithoutExt.endswith( '_' ) :
+        fileRelPathWithoutExt = fileRelPathWithoutExt[ 0 : -1 ]
+    return fileRelPathWithoutExt
+
+
+###################################################################################################
+
+def createFunctionsIndex( htmlPath, fileRelPath ) :
+    
+    """Find the index entries for a set of of functions.
+    Return ( topEntries, methodEntries, signatureEntries ), like createClassIndex()."""
+
+    from bs4 import BeautifulSoup
+
+    topEntries = []
+    signatureEntries = []
+
+    log( 'Parsing ' + fileRelPath )
+    # Pandoc writes the html files in UTF-8
+    soup = BeautifulSoup( readTocHtml( htmlPath ), "html5lib", from_encoding = 'utf-8' )
+        
+    # Find table of content
+    toc = soup.find(id='TOC')
+    
+    # Find all the functions
+    functionsList = toc.ul.li.ul.li.ul
+    if functionsList is None:
+        log( 'No function list found in ' + fileRelPath, WARNING )
+        return ( topEntries, [], signatureEntries )
+        
+    functions = functionsList.find_all('li')
+    
+    for function in functions:
+    
+        # Find function name
+        ( success, functionName, functionSignature ) = parseFunctionLink( function.a, fileRelPath )
+        if not success:
+            continue
+        log( "Function found: " + functionName )
+        
+        # Create path to this function.
+        fileRelPathWithoutExt = functionsPagePath( fileRelPath )
+        
+        # Ready to add this entry to the index
+        topEntries.append( ( functionName, fileRelPathWithoutExt, 'show_' + functionName ) )
+        signatureEntries.append( ( functionName, '', fileRelPathWithoutExt, functionSignature ) )
+        
+    return ( topEntries, [], signatureEntries )
+
+###################################################################################################
+
+def createClassIndex( htmlPath, fileRelPath ) :
+    
+    """Find the index entries for a class.
+    Return ( topEntries, methodEntries, signatureEntries ): topEntries is the list of
+    ( name, fileRelPathWithoutExt, anchor ) found, methodEntries the list of the methods found as
+    ( functionName, className, fileRelPathWithoutExt ), and signatureEntries the list of the
+    ( functionName, className, fileRelPathWithoutExt, signature ) of the functions or methods, with
+    an empty className for a function (see ofdoc/signatures.py)."""
+
+    from bs4 import BeautifulSoup
+
+    topEntries = []
+    methodEntries = []
+    signatureEntries = []
+
+    # Pandoc writes the html files in UTF-8
+    soup = BeautifulSoup( readTocHtml( htmlPath ), "html5lib", from_encoding = 'utf-8' )
+        
+    # Find table of content
+    toc = soup.find(id='TOC')
+    tocLi = toc.ul.li
+    if toc is None or tocLi is None:
+        log( 'No TOC found in ' + fileRelPath, ERROR )
+        return ( topEntries, methodEntries, signatureEntries )
+    
+    # Find class name
+    title = tocLi.a.string
+    m = re.search( '^class\s+(\w+)_?', title )
+    if m is None:
+        return ( topEntries, methodEntries, signatureEntries )
+        
+    className = m.group(1)
+    log( "Class found: " + className )
+    
+    # Create path to this class.
+    fileRelPathWithoutExt = classPagePath( fileRelPath )
+    
+    # Ready to add this entry to the index
+    topEntries.append( ( className, fileRelPathWithoutExt, '' ) )
+    
+    # Find methods list for this class
+    
+    if tocLi.ul is None:
+        return ( topEntries, methodEntries, signatureEntries )
+        
+    methods = None
+    for li in tocLi.ul.find_all('li'):
+        if li.a is None:
+            continue
+        if li.a.string == 'Methods':
+            if li.ul is None:
+                continue
+            methods = li.ul.find_all('li')
+            
+    if methods is None:
+        return ( topEntries, methodEntries, signatureEntries )
+    
+    # Memorize the names and the links to these methods
+    
+    for method in methods:
+        ( success, functionName, functionSignature ) = parseFunctionLink( method.a, fileRelPath )
+        if not success:
+            continue
+        log( 'Method found: ' + className + '::' + functionName + '()' )
+        methodEntries.append( ( functionName, className, fileRelPathWithoutExt ) )
+        signatureEntries.append( ( functionName, className, fileRelPathWithoutExt, functionSignature ) )
+    
+    return ( topEntries, methodEntries, signatureEntries )
+
+
+###################################################################################################
+
+def createFunctionsIndexFromMarkdown( filePath, fileRelPath, toc = None ) :
+    
+    """Find the index entries for a set of of functions, reading the headings of the markdown file,
+    or the TOC given (a list of ofdoc.markdown.Heading).
+    Return ( topEntries, methodEntries, signatureEntries ), like createFunctionsIndex()."""
+
+    topEntries = []
+    signatureEntries = []
+
+    log( 'Parsing ' + fileRelPath )
+    if toc is None:
+        toc = ofdoc.markdown.readToc( filePath )
+    
+    # Find all the functions: the sub-headings of the first sub-heading of the title
+    if not toc or not toc[0].children or not toc[0].children[0].children:
+        log( 'No function list found in ' + fileRelPath, WARNING )
+        return ( topEntries, [], signatureEntries )
+    
+    for function in ofdoc.markdown.descendants( toc[0].children[0].children ):
+        
+        # Find function name
+        content = function.text()
+        if not content:
+            log( 'Unable to read function name in file ' + fileRelPath, ERROR )
+            continue
+        ( success, functionName, functionSignature ) = parseFunctionText( content )
+        if not success:
+            continue
+        log( "Function found: " + functionName )
+        
+        # Ready to add this entry to the index
+        topEntries.append( ( functionName, functionsPagePath( fileRelPath ), 'show_' + functionName ) )
+        signatureEntries.append( ( functionName, '', functionsPagePath( fileRelPath ), functionSignature ) )
+        
+    return ( topEntries, [], signatureEntries )
+
+
+###################################################################################################
+
+def createClassIndexFromMarkdown( filePath, fileRelPath, toc = None ) :
+    
+    """Find the index entries for a class, reading the headings of the markdown file, or the TOC
+    given (a list of ofdoc.markdown.Heading).
+    Return ( topEntries, methodEntries, signatureEntries ), like createClassIndex()."""
+
+    topEntries = []
+    methodEntries = []
+    signatureEntries = []
+
+    if toc is None:
+        toc = ofdoc.markdown.readToc( filePath )
+    if not toc:
+        log( 'No TOC found in ' + fileRelPath, ERROR )
+        return ( topEntries, methodEntries, signatureEntries )
+    tocLi = toc[0]
+    
+    # Find class name
+    title = tocLi.string()
+    m = re.search( '^class\s+(\w+)_?', title or '' )
+    if m is None:
+        return ( topEntries, methodEntries, signatureEntries )
+        
+    className = m.group(1)
+    log( "Class found: " + className )
+    
+    # Ready to add this entry to the index
+    fileRelPathWithoutExt = classPagePath( fileRelPath )
+    topEntries.append( ( className, fileRelPathWithoutExt, '' ) )
+    
+    # Find methods list for this class: the sub-headings of the last "Methods" heading
+    methods = None
+    for heading in ofdoc.markdown.descendants( tocLi.children ):
+        if heading.string() == 'Methods' and heading.children:
+            methods = ofdoc.markdown.descendants( heading.children )
+            
+    if methods is None:
+        return ( topEntries, methodEntries, signatureEntries )
+    
+    # Memorize the names and the links to these methods
+    
+    for method in methods:
+        content = method.text()
+        if not content:
+            log( 'Unable to read function name in file ' + fileRelPath, ERROR )
+            continue
+        ( success, functionName, functionSignature ) = parseFunctionText( content )
+        if not success:
+            continue
+        log( 'Method found: ' + className + '::' + functionName + '()' )
+        methodEntries.append( ( functionName, className, fileRelPathWithoutExt ) )
+        signatureEntries.append( ( functionName, className, fileRelPathWithoutExt, functionSignature ) )
+    
+    return ( topEntries, methodEntries, signatureEntries )
+
+
+###################################################################################################
+
+def findDocuments( filePath, fileRelPath, name ):
+    
+    """Cut a documentation file in documents for the full-text search: a class and each of its
+    methods, or each function of a set of functions. The overloads of a function are a single
+    document. Return the list of the ( title, path, anchor, length, termCounts ) of the documents,
+    termCounts being the string of the counts of the terms (see ofdoc.search.documentTerms())."""
+    
+    # Keys are ( title, path, anchor ), values are the lists of the texts of the document
+    texts = collections.OrderedDict()
+    
+    def add( title, path, anchor, text ):
+        texts.setdefault( ( title.encode( 'utf-8' ), path, anchor.encode( 'utf-8' ) ), [] ).append( text )
+    
+    def functionName( strings ):
+        ( success, functionName, functionSignature ) = parseFunctionText( ''.join( [ s.strip() for s in strings if s.strip() ] ) )
+        return functionName if success else None
+    
+    sections = ofdoc.markdown.readSections( filePath )
+    if name.endswith( '_functions' ):
+        path = functionsPagePath( fileRelPath )
+        for ( level, strings, text ) in sections:
+            function = functionName( strings ) if level == 3 else None
+            if function is not None:
+                add( function, path, 'show_' + function, ' '.join( strings ) + ' ' + text )
+    else:
+        path = classPagePath( fileRelPath )
+        className = None
+        inMethods = False
+        for ( level, strings, text ) in sections:
+            if level == 1:
+                m = re.search( '^class\s+(\w+)_?', ''.join( strings ) )
+                className = m.group(1) if m else None
+                if className is not None:
+                    add( className, path, '', ' '.join( strings ) + ' ' + text )
+            elif className is None:
+                continue
+            elif level == 2:
+                inMethods = ''.join( strings ) == 'Methods'
+                add( className, path, '', text )
+            elif inMethods and level == 3 and functionName( strings ) is not None:
+                method = functionName( strings )
+                add( className + '::' + method, path, 'show_' + method, ' '.join( strings ) + ' ' + text )
+            else:
+                # Variables and other sub-sections of the class
+                add( className, path, '', ' '.join( strings ) + ' ' + text )
+    
+    return [ ( title, path, anchor ) + ofdoc.search.documentTerms( title, ' '.join( documentTexts ) )
+             for ( ( title, path, anchor ), documentTexts ) in texts.items() ]
+
+
+###################################################################################################
+
+def readPandocToc( filePath, fileRelPath ):
+    
+    """Return the TOC of a documentation file read in the Pandoc JSON AST, as a list of
+    ofdoc.markdown.Heading. The file was converted with the other files of its batch (see
+    processBatch()), or it is converted alone."""
+    
+    log( 'Convert "' + fileRelPath + '" to JSON' )
+    converted = batchHeadings.pop( filePath, None )
+    if converted is not None:
+        ( headings, seconds ) = converted
+        times[ 'pandoc' ] = seconds
+    else:
+        start = time.time()
+        ( headings, errors ) = ofdoc.pandocjson.convertFile( settings[ 'pandocExe' ], filePath )
+        if errors:
+            log( "pandoc failed to parse this markdown file :" + filePath, ERROR )
+            log( "pandoc return this error :", ERROR )
+            log( errors, ERROR )
+        times[ 'pandoc' ] = time.time() - start
+    counts[ 'conversions' ] = counts.get( 'conversions', 0 ) + 1
+    return ofdoc.markdown.buildToc( headings or [] )
+
+
+###################################################################################################
+def processSource( job, hashed = None ):
+    
+    """Processing job: find the index entries of a documentation file.
+    job is ( sequenceNumber, source, previousHash, known ): previousHash is the hash of the file in
+    the last build (None if its entries can't be reused), known is True if the file was part of the
+    last build. hashed is ( sourceHash, seconds ) if the file was already hashed (see processBatch()).
+    The file is converted to html with a TOC, to make it parsable with BeautifulSoup, with the html
+    and verify extractors, or for the offline pack. The conversion is skipped if the html file is
+    more recent than the source, unless the source content changed since the last build. With the
+    json extractor, the headings are read in the Pandoc JSON AST (see readPandocToc()).
+    Return ( sequenceNumber, source, sourceHash, entries, documents, markdownEntries, messages, statistics ):
+    entries is None if the entries of the last build can be used, otherwise
+    ( topEntries, methodEntries, signatureEntries ).
+    documents are the documents of the file for the full-text search (see findDocuments()), None
+    if the ones of the last build can be used.
+    markdownEntries are the entries found by the markdown extractor when the verify extractor
+    disagrees, otherwise None. statistics is ( times, counts )."""
+    
+    ( sequenceNumber, source, previousHash, known ) = job
+    ( filePath, fileRelPath, dirRelPath, name ) = source
+    del messages[:]
+    times.clear()
+    counts.clear()
+    
+    if hashed is None:
+        start = time.time()
+        sourceHash = ofdoc.manifest.hashFile( filePath )
+        times[ 'hash' ] = time.time() - start
+    else:
+        ( sourceHash, times[ 'hash' ] ) = hashed
+    extractor = settings[ 'extractor' ]
+    if sourceHash == previousHash:
+        if settings[ 'offline' ]:
+            convertMarkDownToHTML( filePath, fileRelPath, dirRelPath )
+        return ( sequenceNumber, source, sourceHash, None, None, None, list( messages ), ( dict( times ), dict( counts ) ) )
+    
+    # If the file is known but its content changed, its HTML file is obsolete whatever its date
+    if extractor in ( 'html', 'verify' ) or settings[ 'offline' ]:
+        htmlPath = convertMarkDownToHTML( filePath, fileRelPath, dirRelPath, known )
+    
+    # Generate the index for a class or a set of functions, according to the file name
+    markdownEntries = None
+    start = time.time()
+    if extractor == 'markdown':
+        if name.endswith( '_functions' ):
+            entries = createFunctionsIndexFromMarkdown( filePath, fileRelPath )
+        else:
+            entries = createClassIndexFromMarkdown( filePath, fileRelPath )
+        times[ 'markdown parsing' ] = time.time() - start
+    elif extractor == 'json':
+        toc = readPandocToc( filePath, fileRelPath )
+        start = time.time()
+        if name.endswith( '_functions' ):
+            entries = createFunctionsIndexFromMarkdown( filePath, fileRelPath, toc )
+        else:
+            entries = createClassIndexFromMarkdown( filePath, fileRelPath, toc )
+        times[ 'json parsing' ] = time.time() - start
+    else:
+        if name.endswith( '_functions' ):
+            entries = createFunctionsIndex( htmlPath, fileRelPath )
+        else:
+            entries = createClassIndex( htmlPath, fileRelPath )
+        times[ 'html parsing' ] = time.time() - start
+    
+    if extractor == 'verify':
+        start = time.time()
+        if name.endswith( '_functions' ):
+            markdownEntries = createFunctionsIndexFromMarkdown( filePath, fileRelPath )
+        else:
+            markdownEntries = createClassIndexFromMarkdown( filePath, fileRelPath )
+        times[ 'markdown parsing' ] = time.time() - start
+        if markdownEntries == entries:
+            markdownEntries = None
+    
+    start = time.time()
+    documents = findDocuments( filePath, fileRelPath, name )
+    times[ 'search documents' ] = time.time() - start
+    
+    return ( sequenceNumber, source, sourceHash, entries, documents, markdownEntries, list( messages ), ( dict( times ), dict( counts ) ) )
+
+
+###################################################################################################
+def processBatch( batch ):
+    
+    """Processing job of the json extractor: process several files, the ones that changed since the
+    last build being converted by a single Pandoc run. Return the list of the results of
+    processSource() for the jobs of the batch."""
+    
+    batchHeadings.clear()
+    hashes = []
+    filePaths = []
+    for ( sequenceNumber, source, previousHash, known ) in batch:
+        start = time.time()
+        sourceHash = ofdoc.manifest.hashFile( source[0] )
+        hashes.append( ( sourceHash, time.time() - start ) )
+        if sourceHash != previousHash:
+            filePaths.append( source[0] )
+    batchCounts = dict()
+    batchTime = 0.0
+    if len( filePaths ) > 1:
+        start = time.time()
+        headings = ofdoc.pandocjson.convertFiles( settings[ 'pandocExe' ], filePaths )
+        batchTime = time.time() - start
+        batchCounts[ 'pandoc batches' ] = 1
+        if headings is None:
+            # The files are converted one by one
+            batchCounts[ 'pandoc batches failed' ] = 1
+        else:
+            # The files having definitions for the whole document are converted alone
+            converted = [ ( filePath, h ) for ( filePath, h ) in zip( filePaths, headings ) if h is not None ]
+            if converted:
+                seconds = batchTime / len( converted )
+                batchHeadings.update( [ ( filePath, ( h, seconds ) ) for ( filePath, h ) in converted ] )
+                batchTime = 0.0
+    
+    results = [ processSource( job, hashed ) for ( job, hashed ) in zip( batch, hashes ) ]
+    
+    # The batch statistics go with the first file
+    ( firstTimes, firstCounts ) = results[0][-1]
+    firstCounts.update( batchCounts )
+    if batchTime:
+        firstTimes[ 'pandoc' ] = firstTimes.get( 'pandoc', 0.0 ) + batchTime
+    return results
+
+
+###################################################################################################
+def batches( jobs, size ):
+    
+    """Yield the jobs by lists of size jobs"""
+    
+    batch = []
+    for job in jobs:
+        batch.append( job )
+        if len( batch ) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+###################################################################################################
+def initWorker( workerSettings ):
+    
+    """Set the settings of a worker process"""
+    
+    settings.clear()
+    settings.update( workerSettings )
+
+
+###################################################################################################
+def processSources( jobs, workerSettings, processes ):
+    
+    """Process the jobs with a pool of worker processes, and yield their results in the order of
+    the jobs. The jobs are read from the iterable as the workers need them.
+    With 1 process, the jobs are processed in the current process.
+    With the json extractor, the jobs are processed by batches of FILES_PER_BATCH files."""
+    
+    if workerSettings[ 'extractor' ] == 'json':
+        for results in runTasks( processBatch, batches( jobs, FILES_PER_BATCH ), workerSettings, processes, BATCHES_PER_WORKER ):
+            for result in results:
+                yield result
+    else:
+        for result in runTasks( processSource, jobs, workerSettings, processes, FILES_PER_WORKER ):
+            yield result
+
+
+###################################################################################################
+def runTasks( function, tasks, workerSettings, processes, tasksPerWorker ):
+    
+    """Call the function on each task with a pool of worker processes, and yield the results in the
+    order of the tasks. At most tasksPerWorker tasks per worker are waiting in the pool."""
+    
+    if processes <= 1:
+        initWorker( workerSettings )
+        for task in tasks:
+            yield function( task )
+        return
+    
+    pool = multiprocessing.Pool( processes, initWorker, ( workerSettings, ) )
+    pending = collections.deque()
+    try:
+        for task in tasks:
+            pending.append( pool.apply_async( function, ( task, ) ) )
+            if len( pending ) >= processes * tasksPerWorker:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,315 @@
+# coding=utf-8
+
+"""Prefix and fuzzy search of the OF keywords.
+
+When a keyword is not in the index, open-documentation.py proposes the keywords that look like it:
+first the keywords starting with it (a partial selection like setUniform), then the keywords close to
+it (a typo like ofDrawCircl). The search is case insensitive.
+
+generate-index.py writes fuzzy.bin in the index directory, with two tables read through mmap:
+
+Names table
+    All the keywords of the index (classes, global functions, methods), sorted by their lower case
+    form. This sorted table is a flattened prefix trie: the keywords starting with a prefix are a
+    contiguous range, found with two binary searches.
+Trigrams table
+    For each trigram (3 consecutive characters of a lower case keyword, the keyword being surrounded
+    with '$'), the sorted list of the keywords containing it. A misspelled keyword still shares most
+    of its trigrams with the right one.
+Length order table
+    The numbers of all the keywords, the shortest first. The completions of a short prefix like "of"
+    are most of the keywords: they are found by reading this table until enough of them are found,
+    rather than by reading and sorting all the keywords of the prefix.
+
+All the integers are little endian.
+
+Header
+    magic ('OFDF'), format version, number of names, number of trigrams, offset of the names table,
+    offset of the trigrams table, offset of the postings, offset of the strings, offset of the
+    length order table.
+Names table
+    ( name offset, name length ) records.
+Trigrams table
+    ( trigram (3 bytes), padding, first posting, number of postings ) records.
+Postings
+    Names numbers, 4 bytes each.
+Length order table
+    Names numbers, 4 bytes each.
+
+The files of version 1 have no length order table, and the last field of their header is missing:
+they are still read, the completions of a prefix being found in all the keywords of the prefix.
+
+"""
+
+import os.path
+import mmap
+import heapq
+import struct
+
+from ofdoc.indexfile import StringTable, IndexFormatError, replaceFileIfChanged
+
+# Name of the fuzzy search index file, in the index directory
+FUZZY_INDEX_FILE_NAME = 'fuzzy.bin'
+
+MAGIC = b'OFDF'
+VERSION = 2
+
+HEADER = struct.Struct( '<4sIIIIIIII' )
+OLD_HEADER = struct.Struct( '<4sIIIIIII' )
+NAME = struct.Struct( '<II' )
+TRIGRAM = struct.Struct( '<3sxII' )
+POSTING = struct.Struct( '<I' )
+
+# Kinds of candidates, in ranking order
+EXACT = 0
+PREFIX = 1
+FUZZY = 2
+
+# Smallest trigram similarity (Dice coefficient) of a fuzzy candidate
+MIN_SIMILARITY = 0.4
+
+# Number of fuzzy candidates whose edit distance is computed
+MAX_FUZZY_CANDIDATES = 50
+
+# Number of names numbers read at once in the length order table
+LENGTH_ORDER_CHUNK = 256
+
+
+###################################################################################################
+
+def trigrams( name ):
+
+    """Return the set of the trigrams of a keyword"""
+
+    padded = '$' + name.lower() + '$'
+    return set( [ padded[ i : i + 3 ] for i in range( len( padded ) - 2 ) ] )
+
+
+###################################################################################################
+
+def editDistance( a, b ):
+
+    """Number of insertions, deletions, substitutions and transpositions to change a into b"""
+
+    previousRow = None
+    row = range( len( b ) + 1 )
+    for i in range( 1, len( a ) + 1 ):
+        previousPreviousRow, previousRow = previousRow, row
+        row = [ i ] + [ 0 ] * len( b )
+        for j in range( 1, len( b ) + 1 ):
+            cost = 0 if a[ i - 1 ] == b[ j - 1 ] else 1
+            row[j] = min( previousRow[j] + 1, row[ j - 1 ] + 1, previousRow[ j - 1 ] + cost )
+            if i > 1 and j > 1 and a[ i - 1 ] == b[ j - 2 ] and a[ i - 2 ] == b[ j - 1 ]:
+                row[j] = min( row[j], previousPreviousRow[ j - 2 ] + 1 )
+    return row[ len( b ) ]
+
+
+###################################################################################################
+
+def completionKey( name ):
+
+    """Order of the completions of a prefix: the shortest first"""
+
+    return ( len( name ), name.lower(), name )
+
+
+###################################################################################################
+
+def writeFuzzyIndex( filePath, names ):
+
+    """Write the fuzzy search index for the keywords names"""
+
+    names = sorted( set( names ), key = lambda n: ( n.lower(), n ) )
+    lengthOrder = sorted( range( len( names ) ), key = lambda number: completionKey( names[ number ] ) )
+
+    strings = StringTable()
+    postings = dict()
+    for ( number, name ) in enumerate( names ):
+        for trigram in trigrams( name ):
+            postings.setdefault( trigram, [] ).append( number )
+
+    sortedTrigrams = sorted( postings )
+    namesOffset = HEADER.size
+    trigramsOffset = namesOffset + NAME.size * len( names )
+    postingsOffset = trigramsOffset + TRIGRAM.size * len( sortedTrigrams )
+    postingsCount = sum( [ len( p ) for p in postings.values() ] )
+    lengthOrderOffset = postingsOffset + POSTING.size * postingsCount
+    stringsOffset = lengthOrderOffset + POSTING.size * len( names )
+
+    nameRecords = []
+    for name in names:
+        ( offset, length ) = strings.add( name )
+        nameRecords.append( NAME.pack( stringsOffset + offset, length ) )
+
+    trigramRecords = []
+    postingRecords = []
+    first = 0
+    for trigram in sortedTrigrams:
+        numbers = postings[ trigram ]
+        trigramRecords.append( TRIGRAM.pack( trigram.encode( 'utf-8' ), first, len( numbers ) ) )
+        postingRecords.append( struct.pack( '<%dI' % len( numbers ), *numbers ) )
+        first += len( numbers )
+
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'wb' ) as f:
+        f.write( HEADER.pack( MAGIC, VERSION, len( names ), len( sortedTrigrams ),
+                              namesOffset, trigramsOffset, postingsOffset, stringsOffset, lengthOrderOffset ) )
+        f.write( b''.join( nameRecords ) )
+        f.write( b''.join( trigramRecords ) )
+        f.write( b''.join( postingRecords ) )
+        f.write( struct.pack( '<%dI' % len( lengthOrder ), *lengthOrder ) )
+        f.write( strings.data() )
+    replaceFileIfChanged( temporaryPath, filePath )
+
+
+###################################################################################################
+
+class FuzzyIndex( object ):
+
+    """Fuzzy search index read from fuzzy.bin, mapped in memory"""
+
+    def __init__( self, filePath ):
+        self.file = open( filePath, 'rb' )
+        try:
+            self.data = mmap.mmap( self.file.fileno(), 0, access = mmap.ACCESS_READ )
+            header = OLD_HEADER.unpack_from( self.data, 0 )
+            # No length order table in the version 1
+            self.lengthOrderOffset = None
+            if header[1] == VERSION:
+                self.lengthOrderOffset = HEADER.unpack_from( self.data, 0 )[-1]
+        except ( ValueError, EnvironmentError, struct.error ):
+            self.file.close()
+            raise IndexFormatError( 'Unreadable index file ' + filePath )
+        ( magic, version, self.nameCount, self.trigramCount,
+          self.namesOffset, self.trigramsOffset, self.postingsOffset, _ ) = header
+        if magic != MAGIC or version not in ( 1, VERSION ):
+            self.close()
+            raise IndexFormatError( 'Unsupported index file ' + filePath )
+
+    def close( self ):
+        self.data.close()
+        self.file.close()
+
+    def name( self, number ):
+
+        """Return the keyword number n in the names table"""
+
+        ( offset, length ) = NAME.unpack_from( self.data, self.namesOffset + number * NAME.size )
+        return self.data[ offset : offset + length ]
+
+    def lowerBound( self, text ):
+
+        """Number of the first keyword whose lower case form is not before text"""
+
+        lo = 0
+        hi = self.nameCount
+        while lo < hi:
+            mid = ( lo + hi ) // 2
+            if self.name( mid ).lower() < text:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def prefixed( self, prefix, limit ):
+
+        """Return the limit first keywords starting with prefix (case insensitive), the shortest
+        first. The keywords of the prefix are a range of the names table: when it is large, the
+        length order table is read until limit keywords of the range are found, which is sooner
+        than reading the whole range. Otherwise the shortest keywords of the range are kept."""
+
+        prefix = prefix.lower()
+        # No UTF-8 character starts with a \xff byte
+        first = self.lowerBound( prefix )
+        end = self.lowerBound( prefix + b'\xff' )
+        count = end - first
+        if count == 0 or limit <= 0:
+            return []
+        # About limit * nameCount / count numbers are read in the length order table
+        if self.lengthOrderOffset is not None and count * count > limit * self.nameCount:
+            found = []
+            for start in range( 0, self.nameCount, LENGTH_ORDER_CHUNK ):
+                size = min( LENGTH_ORDER_CHUNK, self.nameCount - start )
+                numbers = struct.unpack_from( '<%dI' % size, self.data, self.lengthOrderOffset + start * POSTING.size )
+                for number in numbers:
+                    if first <= number < end:
+                        found.append( self.name( number ) )
+                        if len( found ) == limit:
+                            return found
+            return found
+        return heapq.nsmallest( limit, [ self.name( number ) for number in range( first, end ) ], key = completionKey )
+
+    def postings( self, trigram ):
+
+        """Return the numbers of the keywords containing the trigram"""
+
+        trigram = trigram.encode( 'utf-8' ) if not isinstance( trigram, bytes ) else trigram
+        lo = 0
+        hi = self.trigramCount
+        while lo < hi:
+            mid = ( lo + hi ) // 2
+            record = TRIGRAM.unpack_from( self.data, self.trigramsOffset + mid * TRIGRAM.size )
+            if record[0] < trigram:
+                lo = mid + 1
+            elif record[0] > trigram:
+                hi = mid
+            else:
+                return struct.unpack_from( '<%dI' % record[2], self.data, self.postingsOffset + record[1] * POSTING.size )
+        return ()
+
+    def similar( self, text, limit ):
+
+        """Return the keywords close to text, the closest first"""
+
+        queryTrigrams = trigrams( text )
+        shared = dict()
+        for trigram in queryTrigrams:
+            for number in self.postings( trigram ):
+                shared[ number ] = shared.get( number, 0 ) + 1
+
+        # Keep the keywords sharing enough trigrams, then rank the best ones by edit distance
+        candidates = []
+        for number, count in shared.items():
+            name = self.name( number )
+            similarity = 2.0 * count / ( len( queryTrigrams ) + len( name ) )
+            if similarity >= MIN_SIMILARITY:
+                candidates.append( ( -similarity, name ) )
+        candidates.sort()
+        candidates = candidates[ : MAX_FUZZY_CANDIDATES ]
+        lowerText = text.lower()
+        ranked = sorted( [ ( editDistance( lowerText, name.lower() ), similarity, name ) for ( similarity, name ) in candidates ] )
+        return [ name for ( _, _, name ) in ranked[ : limit ] ]
+
+    def complete( self, text, limit = 20 ):
+
+        """Return the candidates for text as ( name, kind ) tuples: the exact matches first, then the
+        keywords starting with text, then the keywords close to text"""
+
+        result = []
+        seen = set()
+        for name in self.prefixed( text, limit ):
+            kind = EXACT if name == text else PREFIX
+            result.append( ( kind, name ) )
+            seen.add( name )
+        result.sort( key = lambda c: c[0] )
+        if len( result ) < limit:
+            for name in self.similar( text, limit ):
+                if name not in seen and len( result ) < limit:
+                    result.append( ( FUZZY, name ) )
+                    seen.add( name )
+        return [ ( name, kind ) for ( kind, name ) in result ]
+
+
+###################################################################################################
+
+def openFuzzyIndex( indexPath ):
+
+    """Open the fuzzy search index of the index directory, or return None if there is none"""
+
+    filePath = os.path.join( indexPath, FUZZY_INDEX_FILE_NAME )
+    if not os.path.isfile( filePath ):
+        return None
+    try:
+        return FuzzyIndex( filePath )
+    except IndexFormatError:
+        return None
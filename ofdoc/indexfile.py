@@ -0,0 +1,902 @@
+# coding=utf-8
+
+"""Build, read and write the index of the OF keywords.
+
+generate-index.py collects the entries of the documentation files in an IndexBuilder, which interns
+the names and the paths and stores the entries as arrays of string numbers, then writes them with
+writeBinaryIndex(). open-documentation.py reads them back with openIndex(), through the same
+string table layout, without building any intermediate list.
+
+Binary format
+=============
+
+generate-index.py writes the whole index in a single file, index.bin, that open-documentation.py
+maps in memory. A keyword is resolved with a binary search in a sorted table of fixed size
+records, so there is no text to parse and no other file to open.
+
+All the integers are little endian.
+
+Header
+    magic ('OFDI'), format version, number of keys, number of entries, offset of the keys table,
+    offset of the entries table, offset of the strings.
+Keys table
+    One record per keyword, sorted by keyword:
+    ( keyword offset, keyword length, top entry, first method entry, number of method entries ).
+    The top entry is the class or global function matching the keyword (NO_ENTRY if none). The
+    method entries are the classes having a method with this name, sorted as they will be
+    displayed.
+Entries table
+    One record per index entry: ( name offset, path offset, anchor offset, name length,
+    path length, anchor length, kind ).
+Strings
+    All the strings used by the keys and the entries, each stored only once.
+
+Text format
+===========
+
+The old index format, still readable and optionally written by generate-index.py:
+
+classesAndGlobalFunctions.txt
+    One line per class ( "className path" ) or global function ( "functionName path anchor" ).
+    For a given keyword the first matching line wins.
+<methodName>.txt
+    One line per class having this method: "className path.html#anchor".
+
+Tags file
+=========
+
+generate-index.py also writes the entries in a tags file, in the extended format of ctags, sorted by
+tag name (byte order). Editor plugins can find a keyword in it with a binary search, like the ctags
+tags of the sources, without starting Python. The file field of a tag is the URL of its
+documentation, relative to the documentation home page:
+
+    draw<TAB>gl/ofFbo.html#show_draw<TAB>1;"<TAB>kind:m<TAB>class:ofFbo
+    ofDrawCircle<TAB>graphics/ofGraphics.html#show_ofDrawCircle<TAB>1;"<TAB>kind:f
+    ofFbo<TAB>gl/ofFbo.html<TAB>1;"<TAB>kind:c
+
+The kind is c for a class, f for a global function and m for a method, which also has the class
+field. The tags of a same name are in the order of the text index: the class or the function
+first, then the classes of the method.
+
+Index store
+===========
+
+generate-index.py --store-version 0.9.3 also adds the index to versions.bin, the index store, which
+keeps the indexes of several OF versions in a single file. Most classes, paths and methods are the
+same from one version to another, so the strings and the entries are shared by all the versions:
+
+Header
+    magic ('OFDS'), format version, number of versions, number of entries, offset of the versions
+    table, offset of the entries table, offset of the strings.
+Versions table
+    One record per version: ( name offset, name length, number of keys, offset of the keys table ).
+Keys tables
+    One per version, like the keys table of index.bin.
+Entries table
+    The entries of all the versions, like the entries table of index.bin. A class or a function
+    entry is stored once, and the method entries of a keyword are stored once if they are the same
+    in several versions.
+Strings
+    All the strings of all the versions, each stored only once.
+
+A version is read with the same code as index.bin (StoreIndex is a BinaryIndex), so a lookup in a
+version of the store costs the same as a lookup in index.bin.
+
+"""
+
+import os.path
+import re
+import mmap
+import filecmp
+import heapq
+import struct
+from array import array
+
+# Name of the binary index file, in the index directory
+BINARY_INDEX_FILE_NAME = 'index.bin'
+
+# Name of the main file of the text index, in the index directory
+TEXT_INDEX_FILE_NAME = 'classesAndGlobalFunctions.txt'
+
+# Name of the index store, in the index directory
+STORE_FILE_NAME = 'versions.bin'
+
+# Name of the tags file, in the index directory
+TAGS_FILE_NAME = 'tags'
+
+# First lines of the tags file
+TAGS_HEADER = ( '!_TAG_FILE_FORMAT\t2\t/extended format; --format=1 will not append ;" to lines/\n'
+                '!_TAG_FILE_SORTED\t1\t/0=unsorted, 1=sorted, 2=foldcase/\n'
+                '!_TAG_PROGRAM_NAME\tgenerate-index.py\t/OF documentation index/\n' )
+
+MAGIC = b'OFDI'
+VERSION = 1
+
+STORE_MAGIC = b'OFDS'
+STORE_VERSION = 1
+
+# Kinds of index entries
+CLASS = 0
+FUNCTION = 1
+METHOD = 2
+
+# Value of the top entry field for a keyword which is only a method name
+NO_ENTRY = 0xFFFFFFFF
+
+HEADER = struct.Struct( '<4sIIIIII' )
+KEY = struct.Struct( '<IIIII' )
+ENTRY = struct.Struct( '<IIIHHHBx' )
+STORE_VERSION_RECORD = struct.Struct( '<IIII' )
+
+
+class IndexFormatError( Exception ):
+
+    """Raised when an index file can't be read"""
+
+
+###################################################################################################
+
+def relativeURL( path, anchor ):
+
+    """Build the URL of a documentation entry, relative to the documentation home page"""
+
+    if anchor:
+        return path + '.html#' + anchor
+    return path + '.html'
+
+
+###################################################################################################
+
+def replaceFile( temporaryPath, filePath ):
+
+    """Replace a file by the temporary file written next to it. The index files are always written
+    this way, so that open-documentation.py never reads a half-written file: on Linux and Mac the
+    rename replaces the file at once. Windows can't rename over an existing file, so it is removed
+    first."""
+
+    if os.name == 'nt' and os.path.exists( filePath ):
+        os.remove( filePath )
+    os.rename( temporaryPath, filePath )
+
+
+###################################################################################################
+
+def replaceFileIfChanged( temporaryPath, filePath ):
+
+    """Replace a file by the temporary file written next to it, unless they have the same content:
+    then the temporary file is removed, and the file keeps its modification date. A --watch update
+    only replaces the index files it changes. Return True if the file was replaced."""
+
+    if os.path.isfile( filePath ) and filecmp.cmp( temporaryPath, filePath, shallow = False ):
+        os.remove( temporaryPath )
+        return False
+    replaceFile( temporaryPath, filePath )
+    return True
+
+
+###################################################################################################
+
+def topEntryKeys( name, anchor ):
+
+    """Return the keywords matching a class or a global function entry.
+    A class entry is also found without its trailing underscore (ofImage_ is found with ofImage)."""
+
+    if not anchor and name.endswith( '_' ):
+        return ( name, name[ 0 : -1 ] )
+    return ( name, )
+
+
+###################################################################################################
+
+def keywords( topEntries, methods ):
+
+    """Return the set of all the keywords that the index can find"""
+
+    found = set( methods )
+    for ( name, path, anchor ) in topEntries:
+        found.update( topEntryKeys( name, anchor ) )
+    return found
+
+
+###################################################################################################
+
+class StringTable( object ):
+
+    """Store each string once, and remember where it is stored"""
+
+    def __init__( self ):
+        self.chunks = []
+        self.size = 0
+        self.locations = dict()
+
+    def add( self, string ):
+        if not isinstance( string, bytes ):
+            string = string.encode( 'utf-8' )
+        location = self.locations.get( string )
+        if location is None:
+            location = ( self.size, len( string ) )
+            self.locations[ string ] = location
+            self.chunks.append( string )
+            self.size += len( string )
+        return location
+
+    def data( self ):
+        return b''.join( self.chunks )
+
+
+###################################################################################################
+
+class IndexBuilder( object ):
+
+    """Collect the index entries found in the documentation files, in the order of the files.
+    The strings are interned: each distinct name or path is stored once, and the entries are arrays
+    of string numbers. The duplicates are found with sets, so building the index takes a linear
+    time whatever the number of entries."""
+
+    def __init__( self ):
+        # The interned strings, and the number of each one
+        self.strings = []
+        self.stringNumbers = dict()
+        # The classes and the global functions, in the order they are found: three parallel arrays
+        # of string numbers ( name, path, anchor ), the anchor being empty for a class
+        self.topNames = array( 'I' )
+        self.topPaths = array( 'I' )
+        self.topAnchors = array( 'I' )
+        # The global functions already in the index. A function may be overloaded, only its first
+        # entry is kept.
+        self.functionNames = set()
+        # Keys are the methods names numbers, values are arrays of ( className, path ) numbers pairs,
+        # flattened, in the order they are found
+        self.methods = dict()
+        # The ( methodName, className, path ) numbers already in the index
+        self.methodEntries = set()
+        # The signatures of the functions and the methods, all overloads included: an array of
+        # ( name, className, path, signature ) numbers, flattened, and the set of these numbers
+        self.signatureEntries = array( 'I' )
+        self.signatureKeys = set()
+
+    def intern( self, string ):
+
+        """Return the number of a string, adding it to the strings table if needed"""
+
+        number = self.stringNumbers.get( string )
+        if number is None:
+            number = len( self.strings )
+            self.stringNumbers[ string ] = number
+            self.strings.append( string )
+        return number
+
+    def addEntries( self, entries ):
+
+        """Add the index entries found in a file: ( topEntries, methodEntries, signatureEntries ),
+        topEntries being ( name, path, anchor ) tuples, methodEntries ( methodName, className, path )
+        tuples and signatureEntries ( name, className, path, signature ) tuples"""
+
+        ( fileTopEntries, fileMethodEntries, fileSignatureEntries ) = entries
+        intern = self.intern
+
+        for ( name, path, anchor ) in fileTopEntries:
+            nameNumber = intern( name )
+            if anchor:
+                # A global function, may be overloaded
+                if nameNumber in self.functionNames:
+                    continue
+                self.functionNames.add( nameNumber )
+            self.topNames.append( nameNumber )
+            self.topPaths.append( intern( path ) )
+            self.topAnchors.append( intern( anchor ) )
+
+        for ( methodName, className, path ) in fileMethodEntries:
+            key = ( intern( methodName ), intern( className ), intern( path ) )
+            if key in self.methodEntries:
+                continue
+            self.methodEntries.add( key )
+            classes = self.methods.get( key[0] )
+            if classes is None:
+                classes = self.methods[ key[0] ] = array( 'I' )
+            classes.append( key[1] )
+            classes.append( key[2] )
+
+        for signatureEntry in fileSignatureEntries:
+            key = tuple( [ intern( string ) for string in signatureEntry ] )
+            if key in self.signatureKeys:
+                continue
+            self.signatureKeys.add( key )
+            self.signatureEntries.extend( key )
+
+    def topEntries( self ):
+
+        """Return the list of the ( name, path, anchor ) of the classes and the global functions"""
+
+        strings = self.strings
+        return [ ( strings[ name ], strings[ path ], strings[ anchor ] )
+                 for ( name, path, anchor ) in zip( self.topNames, self.topPaths, self.topAnchors ) ]
+
+    def methodsEntries( self ):
+
+        """Return the methods, as expected by writeBinaryIndex(): a dictionnary whose keys are the
+        methods names and values are lists of ( className, path, anchor ) tuples"""
+
+        strings = self.strings
+        methods = dict()
+        for ( methodNumber, classes ) in self.methods.items():
+            methodName = strings[ methodNumber ]
+            anchor = 'show_' + methodName
+            methods[ methodName ] = [ ( strings[ classes[i] ], strings[ classes[ i + 1 ] ], anchor )
+                                      for i in range( 0, len( classes ), 2 ) ]
+        return methods
+
+    def signatures( self ):
+
+        """Return the list of the ( name, className, path, signature ) of the functions and the
+        methods, as expected by ofdoc.signatures.writeSignatureIndex()"""
+
+        strings = self.strings
+        entries = self.signatureEntries
+        return [ tuple( [ strings[ number ] for number in entries[ i : i + 4 ] ] ) for i in range( 0, len( entries ), 4 ) ]
+
+
+###################################################################################################
+
+def writeBinaryIndex( filePath, topEntries, methods ):
+
+    """Write the binary index.
+    topEntries is the list of the classes and global functions, in the order of the text index:
+    ( name, path, anchor ) tuples, anchor being empty for a class.
+    methods is a dictionnary. Keys are the methods names, values are lists of
+    ( className, path, anchor ) tuples."""
+
+    strings = StringTable()
+    entries = []
+    # For each keyword: [ top entry, first method entry, number of method entries ]
+    keys = dict()
+
+    def addEntry( kind, name, path, anchor ):
+        entries.append( ( kind, strings.add( name ), strings.add( path ), strings.add( anchor ) ) )
+        return len( entries ) - 1
+
+    for ( name, path, anchor ) in topEntries:
+        kind = FUNCTION if anchor else CLASS
+        entryIndex = None
+        for key in topEntryKeys( name, anchor ):
+            record = keys.setdefault( key, [ NO_ENTRY, 0, 0 ] )
+            if record[0] != NO_ENTRY:
+                # An entry found before in the index takes precedence
+                continue
+            if entryIndex is None:
+                entryIndex = addEntry( kind, name, path, anchor )
+            record[0] = entryIndex
+
+    for methodName in sorted( methods ):
+        methodEntries = sorted( methods[ methodName ], key = lambda e: ( e[0], relativeURL( e[1], e[2] ) ) )
+        record = keys.setdefault( methodName, [ NO_ENTRY, 0, 0 ] )
+        record[1] = len( entries )
+        record[2] = len( methodEntries )
+        for ( className, path, anchor ) in methodEntries:
+            addEntry( METHOD, className, path, anchor )
+
+    sortedKeys = sorted( keys )
+    keysOffset = HEADER.size
+    entriesOffset = keysOffset + KEY.size * len( sortedKeys )
+    stringsOffset = entriesOffset + ENTRY.size * len( entries )
+
+    keyRecords = []
+    for key in sortedKeys:
+        ( keyOffset, keyLength ) = strings.add( key )
+        ( top, first, count ) = keys[ key ]
+        keyRecords.append( KEY.pack( stringsOffset + keyOffset, keyLength, top, first, count ) )
+
+    entryRecords = []
+    for ( kind, name, path, anchor ) in entries:
+        entryRecords.append( ENTRY.pack(
+            stringsOffset + name[0], stringsOffset + path[0], stringsOffset + anchor[0],
+            name[1], path[1], anchor[1], kind ) )
+
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'wb' ) as f:
+        f.write( HEADER.pack( MAGIC, VERSION, len( sortedKeys ), len( entries ),
+                              keysOffset, entriesOffset, stringsOffset ) )
+        f.write( b''.join( keyRecords ) )
+        f.write( b''.join( entryRecords ) )
+        f.write( strings.data() )
+    replaceFileIfChanged( temporaryPath, filePath )
+
+
+###################################################################################################
+
+class BinaryIndex( object ):
+
+    """Index read from a binary index file, mapped in memory"""
+
+    def __init__( self, filePath ):
+        ( magic, version, self.keyCount, self.entryCount,
+          self.keysOffset, self.entriesOffset, self.stringsOffset ) = self.mapFile( filePath )
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise IndexFormatError( 'Unsupported index file ' + filePath )
+
+    def mapFile( self, filePath ):
+
+        """Map the file in memory, and return its header"""
+
+        self.file = open( filePath, 'rb' )
+        try:
+            self.data = mmap.mmap( self.file.fileno(), 0, access = mmap.ACCESS_READ )
+            return HEADER.unpack_from( self.data, 0 )
+        except ( ValueError, EnvironmentError, struct.error ):
+            self.file.close()
+            raise IndexFormatError( 'Unreadable index file ' + filePath )
+
+    def close( self ):
+        self.data.close()
+        self.file.close()
+
+    def findKey( self, keyword ):
+
+        """Binary search of a keyword in the keys table.
+        Return the key record ( keyword offset, keyword length, top entry, first method entry,
+        number of method entries ), or None if the keyword is not in the index."""
+
+        if not isinstance( keyword, bytes ):
+            keyword = keyword.encode( 'utf-8' )
+        data = self.data
+        lo = 0
+        hi = self.keyCount
+        while lo < hi:
+            mid = ( lo + hi ) // 2
+            record = KEY.unpack_from( data, self.keysOffset + mid * KEY.size )
+            key = data[ record[0] : record[0] + record[1] ]
+            if key < keyword:
+                lo = mid + 1
+            elif key > keyword:
+                hi = mid
+            else:
+                return record
+        return None
+
+    def entry( self, entryIndex ):
+
+        """Return the entry as a ( kind, name, path, anchor ) tuple"""
+
+        data = self.data
+        ( nameOffset, pathOffset, anchorOffset, nameLength, pathLength, anchorLength, kind ) = \
+            ENTRY.unpack_from( data, self.entriesOffset + entryIndex * ENTRY.size )
+        return ( kind,
+                 data[ nameOffset : nameOffset + nameLength ],
+                 data[ pathOffset : pathOffset + pathLength ],
+                 data[ anchorOffset : anchorOffset + anchorLength ] )
+
+    def lookup( self, keyword ):
+
+        """Return the list of the ( name, relativeURL ) matching the keyword.
+        A class or a global function is a single entry, a method name can give many entries."""
+
+        record = self.findKey( keyword )
+        if record is None:
+            return []
+        return self.recordEntries( record )
+
+    def recordEntries( self, record ):
+
+        """Return the list of the ( name, relativeURL ) of a key record"""
+
+        ( _, _, top, first, count ) = record
+        if top != NO_ENTRY:
+            indices = [ top ]
+        else:
+            indices = range( first, first + count )
+        result = []
+        for entryIndex in indices:
+            ( kind, name, path, anchor ) = self.entry( entryIndex )
+            result.append( ( name, relativeURL( path, anchor ) ) )
+        return result
+
+    def items( self ):
+
+        """Yield ( keyword, lookup( keyword ), isMethod ) for all the keywords of the index, in keyword
+        order. isMethod is True for a keyword which is only a method name."""
+
+        data = self.data
+        for keyIndex in range( self.keyCount ):
+            record = KEY.unpack_from( data, self.keysOffset + keyIndex * KEY.size )
+            yield ( data[ record[0] : record[0] + record[1] ], self.recordEntries( record ), record[2] == NO_ENTRY )
+
+    def keys( self ):
+
+        """Return the content of the index as a dictionnary. Keys are the keywords, values are
+        ( top entry, method entries ): the top entry is None or a ( kind, name, path, anchor ) tuple,
+        the method entries are a tuple of such tuples."""
+
+        data = self.data
+        keys = dict()
+        for keyIndex in range( self.keyCount ):
+            ( keyOffset, keyLength, top, first, count ) = KEY.unpack_from( data, self.keysOffset + keyIndex * KEY.size )
+            keys[ data[ keyOffset : keyOffset + keyLength ] ] = (
+                self.entry( top ) if top != NO_ENTRY else None,
+                tuple( [ self.entry( entryIndex ) for entryIndex in range( first, first + count ) ] ) )
+        return keys
+
+
+###################################################################################################
+
+class StoreIndex( BinaryIndex ):
+
+    """The index of a version of the index store. The keys table of the version points to the
+    entries and the strings shared by all the versions, the lookups are the ones of BinaryIndex.
+    With versionName None, no version is selected: only versions() can be used."""
+
+    def __init__( self, filePath, versionName = None ):
+        ( magic, version, self.versionCount, self.entryCount,
+          self.versionsOffset, self.entriesOffset, self.stringsOffset ) = self.mapFile( filePath )
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            self.close()
+            raise IndexFormatError( 'Unsupported index store ' + filePath )
+        self.keyCount = 0
+        self.keysOffset = 0
+        if versionName is None:
+            return
+        for versionIndex in range( self.versionCount ):
+            ( nameOffset, nameLength, keyCount, keysOffset ) = STORE_VERSION_RECORD.unpack_from(
+                self.data, self.versionsOffset + versionIndex * STORE_VERSION_RECORD.size )
+            if self.data[ nameOffset : nameOffset + nameLength ] == versionName:
+                self.keyCount = keyCount
+                self.keysOffset = keysOffset
+                return
+        self.close()
+        raise IndexFormatError( 'No version ' + versionName + ' in the index store ' + filePath )
+
+    def versions( self ):
+
+        """Return the list of the names of the versions of the store"""
+
+        names = []
+        for versionIndex in range( self.versionCount ):
+            ( nameOffset, nameLength, _, _ ) = STORE_VERSION_RECORD.unpack_from(
+                self.data, self.versionsOffset + versionIndex * STORE_VERSION_RECORD.size )
+            names.append( self.data[ nameOffset : nameOffset + nameLength ] )
+        return names
+
+
+###################################################################################################
+
+def writeStore( filePath, versions ):
+
+    """Write the index store. versions is the list of the ( versionName, keys ) of the versions,
+    keys being like the result of BinaryIndex.keys(). The file is replaced at once."""
+
+    strings = StringTable()
+    entries = []
+    # Where each top entry and each list of method entries is stored
+    entryNumbers = dict()
+    methodRuns = dict()
+    # For each version: ( name, [ ( key, top entry, first method entry, number of method entries ) ] )
+    versionKeys = []
+
+    def addEntry( entry ):
+        ( kind, name, path, anchor ) = entry
+        entries.append( ( kind, strings.add( name ), strings.add( path ), strings.add( anchor ) ) )
+        return len( entries ) - 1
+
+    for ( versionName, keys ) in versions:
+        records = []
+        for key in sorted( keys ):
+            ( top, methodEntries ) = keys[ key ]
+            topNumber = NO_ENTRY
+            if top is not None:
+                topNumber = entryNumbers.get( top )
+                if topNumber is None:
+                    topNumber = entryNumbers[ top ] = addEntry( top )
+            first = methodRuns.get( methodEntries ) if methodEntries else 0
+            if first is None:
+                first = methodRuns[ methodEntries ] = len( entries )
+                for entry in methodEntries:
+                    addEntry( entry )
+            records.append( ( key, topNumber, first, len( methodEntries ) ) )
+        versionKeys.append( ( versionName, records ) )
+
+    versionsOffset = HEADER.size
+    keysOffset = versionsOffset + STORE_VERSION_RECORD.size * len( versionKeys )
+    entriesOffset = keysOffset + KEY.size * sum( [ len( records ) for ( _, records ) in versionKeys ] )
+    stringsOffset = entriesOffset + ENTRY.size * len( entries )
+
+    versionRecords = []
+    keyRecords = []
+    for ( versionName, records ) in versionKeys:
+        ( nameOffset, nameLength ) = strings.add( versionName )
+        versionRecords.append( STORE_VERSION_RECORD.pack( stringsOffset + nameOffset, nameLength,
+                                                          len( records ), keysOffset + KEY.size * len( keyRecords ) ) )
+        for ( key, top, first, count ) in records:
+            ( keyOffset, keyLength ) = strings.add( key )
+            keyRecords.append( KEY.pack( stringsOffset + keyOffset, keyLength, top, first, count ) )
+
+    entryRecords = []
+    for ( kind, name, path, anchor ) in entries:
+        entryRecords.append( ENTRY.pack(
+            stringsOffset + name[0], stringsOffset + path[0], stringsOffset + anchor[0],
+            name[1], path[1], anchor[1], kind ) )
+
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'wb' ) as f:
+        f.write( HEADER.pack( STORE_MAGIC, STORE_VERSION, len( versionKeys ), len( entries ),
+                              versionsOffset, entriesOffset, stringsOffset ) )
+        f.write( b''.join( versionRecords ) )
+        f.write( b''.join( keyRecords ) )
+        f.write( b''.join( entryRecords ) )
+        f.write( strings.data() )
+    replaceFile( temporaryPath, filePath )
+
+
+###################################################################################################
+
+def addStoreVersion( indexPath, versionName, index ):
+
+    """Add the content of a BinaryIndex to the index store of the index directory, as the version
+    versionName, replacing the version of the same name if there is one.
+    Return False if the store already has this version with the same content."""
+
+    storePath = os.path.join( indexPath, STORE_FILE_NAME )
+    keys = index.keys()
+    versions = []
+    found = False
+    if os.path.isfile( storePath ):
+        store = StoreIndex( storePath )
+        names = store.versions()
+        store.close()
+        for name in names:
+            versionIndex = StoreIndex( storePath, name )
+            versionKeys = versionIndex.keys()
+            versionIndex.close()
+            if name == versionName:
+                if versionKeys == keys:
+                    return False
+                versionKeys = keys
+                found = True
+            versions.append( ( name, versionKeys ) )
+    if not found:
+        versions.append( ( versionName, keys ) )
+    writeStore( storePath, versions )
+    return True
+
+
+###################################################################################################
+
+def storeVersions( indexPath ):
+
+    """Return the list of the versions of the index store of the index directory"""
+
+    storePath = os.path.join( indexPath, STORE_FILE_NAME )
+    if not os.path.isfile( storePath ):
+        return []
+    store = StoreIndex( storePath )
+    try:
+        return store.versions()
+    finally:
+        store.close()
+
+
+###################################################################################################
+
+class TextIndex( object ):
+
+    """Index read from the old text files"""
+
+    regex1 = re.compile( r'(\w+)\s+(.+)' )
+    regex2 = re.compile( r'(\S+)\s+(.+)' )
+
+    def __init__( self, indexPath ):
+        self.indexPath = indexPath
+
+    def close( self ):
+        pass
+
+    def lookup( self, keyword ):
+
+        """Return the list of the ( name, relativeURL ) matching the keyword"""
+
+        # Search the keyword in the index for classes and global functions
+        with open( os.path.join( self.indexPath, TEXT_INDEX_FILE_NAME ), 'r' ) as classesIndex:
+            for line in classesIndex:
+                entry = parseTopEntry( line )
+                if entry is None:
+                    print 'Error: Malformed index file!!!'
+                    continue
+                ( name, path, anchor ) = entry
+                if keyword in topEntryKeys( name, anchor ):
+                    return [ ( name, relativeURL( path, anchor ) ) ]
+
+        # If the keyword is not a class or a global function name, it may be a method name for a class.
+        # Does an index file exists for this keyword ?
+        methodIndexPath = os.path.join( self.indexPath, keyword + '.txt' )
+        if not os.path.isfile( methodIndexPath ):
+            return []
+        entries = []
+        with open( methodIndexPath, 'r' ) as methodIndex:
+            for line in methodIndex:
+                m = self.regex1.match( line )
+                if m is None:
+                    print 'Error: Malformed index file!!! File is ' + methodIndexPath
+                    continue
+                entries.append( ( m.group(1), m.group(2).strip() ) )
+        entries.sort()
+        return entries
+
+    def items( self ):
+
+        """Yield ( keyword, lookup( keyword ), isMethod ) for all the keywords of the index, in keyword
+        order. isMethod is True for a keyword which is only a method name."""
+
+        ( topEntries, methods ) = readTextIndex( self.indexPath )
+        found = dict()
+        methodNames = set()
+        for ( name, path, anchor ) in topEntries:
+            for key in topEntryKeys( name, anchor ):
+                if key not in found:
+                    found[ key ] = [ ( name, relativeURL( path, anchor ) ) ]
+        for methodName, entries in methods.items():
+            if methodName not in found:
+                found[ methodName ] = sorted( [ ( className, relativeURL( path, anchor ) ) for ( className, path, anchor ) in entries ] )
+                methodNames.add( methodName )
+        for key in sorted( found ):
+            yield ( key, found[ key ], key in methodNames )
+
+
+###################################################################################################
+
+def parseTopEntry( line ):
+
+    """Parse a line of classesAndGlobalFunctions.txt.
+    Return a ( name, path, anchor ) tuple, anchor being empty for a class, or None."""
+
+    m1 = TextIndex.regex1.match( line )
+    if m1 is None:
+        return None
+    # The line is composed with 2 strings (class entry) or 3 strings (function entry)
+    m2 = TextIndex.regex2.match( m1.group(2) )
+    if m2 is None:
+        return ( m1.group(1), m1.group(2).strip(), '' )
+    return ( m1.group(1), m2.group(1), m2.group(2).strip() )
+
+
+###################################################################################################
+
+def readTextIndex( indexPath ):
+
+    """Read a whole text index.
+    Return ( topEntries, methods ), as expected by writeBinaryIndex()."""
+
+    topEntries = []
+    with open( os.path.join( indexPath, TEXT_INDEX_FILE_NAME ), 'r' ) as classesIndex:
+        for line in classesIndex:
+            entry = parseTopEntry( line )
+            if entry is not None:
+                topEntries.append( entry )
+
+    methods = dict()
+    for fileName in os.listdir( indexPath ):
+        ( methodName, ext ) = os.path.splitext( fileName )
+        if ext != '.txt' or fileName == TEXT_INDEX_FILE_NAME:
+            continue
+        entries = []
+        with open( os.path.join( indexPath, fileName ), 'r' ) as methodIndex:
+            for line in methodIndex:
+                m = TextIndex.regex1.match( line )
+                if m is None:
+                    continue
+                ( path, _, anchor ) = m.group(2).strip().partition( '.html#' )
+                entries.append( ( m.group(1), path, anchor ) )
+        methods[ methodName ] = entries
+
+    return ( topEntries, methods )
+
+
+###################################################################################################
+
+def writeTextIndex( indexPath, topEntries, methods, previousMethodNames = () ):
+
+    """Write the index in the old text format.
+    Only the files whose content changed are written, each one replaced at once. The files of the
+    methods names in previousMethodNames that are no more in methods are deleted. The methods files
+    are written before the classes and functions file, and deleted after it."""
+
+    for methodName, entries in methods.items():
+        content = ''.join( [ className + ' ' + relativeURL( path, anchor ) + '\n' for ( className, path, anchor ) in entries ] )
+        writeIfChanged( os.path.join( indexPath, methodName + '.txt' ), content )
+
+    lines = []
+    for ( name, path, anchor ) in topEntries:
+        if anchor:
+            lines.append( name + ' ' + path + ' ' + anchor + '\n' )
+        else:
+            lines.append( name + ' ' + path + '\n' )
+    writeIfChanged( os.path.join( indexPath, TEXT_INDEX_FILE_NAME ), ''.join( lines ) )
+
+    for methodName in previousMethodNames:
+        methodIndexPath = os.path.join( indexPath, methodName + '.txt' )
+        if methodName not in methods and os.path.isfile( methodIndexPath ):
+            os.remove( methodIndexPath )
+
+
+###################################################################################################
+
+def tagLines( topEntries, methods ):
+
+    """Yield the lines of the tags file, sorted by tag name. topEntries and methods are like for
+    writeTextIndex(). The classes and functions, and the methods, are sorted separately, then
+    merged line by line. A class or a function has a tag for each of its keywords (see
+    topEntryKeys()): ofImage_ is also tagged ofImage."""
+
+    def topLines():
+        tags = []
+        for ( name, path, anchor ) in topEntries:
+            line = '\t' + relativeURL( path, anchor ) + '\t1;"\tkind:' + ( 'f' if anchor else 'c' ) + '\n'
+            tags += [ ( key, line ) for key in topEntryKeys( name, anchor ) ]
+        for ( key, line ) in sorted( tags, key = lambda tag: tag[0] ):
+            yield ( key, 0, key + line )
+
+    def methodLines():
+        for methodName in sorted( methods ):
+            for ( className, path, anchor ) in methods[ methodName ]:
+                yield ( methodName, 1, methodName + '\t' + relativeURL( path, anchor ) + '\t1;"\tkind:m\tclass:' + className + '\n' )
+
+    # The class or the function comes before the methods of the same name. The lines of each
+    # iterator keep their order: sorted() is stable, and merge() takes them one by one.
+    for ( name, _, line ) in heapq.merge( topLines(), methodLines() ):
+        yield line
+
+
+###################################################################################################
+
+def writeTagsFile( filePath, topEntries, methods ):
+
+    """Write the tags file. The lines are written as they are merged, and the file is replaced
+    at once."""
+
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'wb' ) as f:
+        f.write( TAGS_HEADER )
+        for line in tagLines( topEntries, methods ):
+            f.write( line )
+    replaceFileIfChanged( temporaryPath, filePath )
+
+
+###################################################################################################
+
+def writeIfChanged( filePath, content ):
+
+    """Write the content to the file, unless the file already has this content"""
+
+    if os.path.isfile( filePath ):
+        with open( filePath, 'r' ) as f:
+            if f.read() == content:
+                return
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'w' ) as f:
+        f.write( content )
+    replaceFile( temporaryPath, filePath )
+
+
+###################################################################################################
+
+def openIndex( indexPath, versionName = None ):
+
+    """Open the index stored in the index directory.
+    The binary index is used if there is one, otherwise the text index. Return None if there is no
+    index at all.
+    With a versionName, open this version of the index store. Return None if the store has no
+    such version."""
+
+    if versionName:
+        storePath = os.path.join( indexPath, STORE_FILE_NAME )
+        if versionName not in storeVersions( indexPath ):
+            return None
+        return StoreIndex( storePath, versionName )
+
+    binaryIndexPath = os.path.join( indexPath, BINARY_INDEX_FILE_NAME )
+    if os.path.isfile( binaryIndexPath ):
+        try:
+            return BinaryIndex( binaryIndexPath )
+        except IndexFormatError as e:
+            print 'Warning: ' + str( e ) + ', using the text index.'
+    if os.path.isfile( os.path.join( indexPath, TEXT_INDEX_FILE_NAME ) ):
+        return TextIndex( indexPath )
+    return None
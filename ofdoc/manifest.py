@@ -0,0 +1,126 @@
+# coding=utf-8
+
+"""Build manifest, used by generate-index.py to rebuild only what changed.
+
+The manifest is stored in the index directory as a JSON file. For each documentation source file,
+in the order of the last traversal, it keeps the hash of the file content and the index entries the
+file produced. A source whose hash didn't change doesn't need to be converted nor parsed again: its
+entries are read from the manifest. The same goes for the documents of the full-text search (see
+ofdoc/search.py): the manifest keeps the term counts of each document.
+
+"""
+
+import os.path
+import json
+import hashlib
+from collections import OrderedDict
+
+import ofdoc.indexfile
+
+# Name of the manifest file, in the index directory
+MANIFEST_FILE_NAME = 'manifest.json'
+
+# Version of the manifest content. A manifest with another version is ignored.
+FORMAT = 2
+
+
+###################################################################################################
+
+def hashFile( filePath ):
+
+    """Return the hash of the content of a file"""
+
+    with open( filePath, 'rb' ) as f:
+        return hashlib.sha1( f.read() ).hexdigest()
+
+
+###################################################################################################
+
+def toStr( value ):
+
+    """Convert the unicode strings read by json to str, recursively"""
+
+    if isinstance( value, list ):
+        return [ toStr( v ) for v in value ]
+    if isinstance( value, unicode ):
+        return value.encode( 'utf-8' )
+    return value
+
+
+###################################################################################################
+
+class Manifest( object ):
+
+    """The sources of the last build, with their hash and their index entries"""
+
+    def __init__( self ):
+        # Keys are the sources paths relative to the documentation directory,
+        # values are ( hash, ( topEntries, methodEntries, signatureEntries ) ) tuples
+        self.sources = OrderedDict()
+        # Keys are the sources paths, values are the lists of the documents of the full-text search,
+        # as ( title, path, anchor, length, termCounts ) tuples. A source of a manifest written
+        # before the full-text search has no documents.
+        self.documents = dict()
+        # The extractor used to find the index entries
+        self.extractor = ''
+        # Was the text index written by the last build ?
+        self.textIndex = False
+        # Methods names for which a text index file was written by the last build
+        self.methodNames = []
+        # Was the offline pack written by the last build ?
+        self.offlinePack = False
+
+    @staticmethod
+    def load( filePath ):
+
+        """Read a manifest. Return an empty manifest if the file doesn't exist or can't be read."""
+
+        manifest = Manifest()
+        if not os.path.isfile( filePath ):
+            return manifest
+        try:
+            with open( filePath, 'r' ) as f:
+                content = json.load( f )
+            if content.get( 'format' ) != FORMAT:
+                return manifest
+            for source in content[ 'sources' ]:
+                topEntries = [ tuple( e ) for e in toStr( source[ 'topEntries' ] ) ]
+                methodEntries = [ tuple( e ) for e in toStr( source[ 'methodEntries' ] ) ]
+                signatureEntries = [ tuple( e ) for e in toStr( source[ 'signatureEntries' ] ) ]
+                manifest.sources[ toStr( source[ 'path' ] ) ] = ( toStr( source[ 'hash' ] ), ( topEntries, methodEntries, signatureEntries ) )
+                if 'documents' in source:
+                    manifest.documents[ toStr( source[ 'path' ] ) ] = [ tuple( d ) for d in toStr( source[ 'documents' ] ) ]
+            manifest.extractor = toStr( content[ 'extractor' ] )
+            manifest.textIndex = content[ 'textIndex' ]
+            manifest.methodNames = toStr( content[ 'methodNames' ] )
+            manifest.offlinePack = content.get( 'offlinePack', False )
+        except ( ValueError, KeyError, TypeError ):
+            return Manifest()
+        return manifest
+
+    def save( self, filePath ):
+
+        """Write the manifest"""
+
+        sources = []
+        for path, ( sourceHash, ( topEntries, methodEntries, signatureEntries ) ) in self.sources.items():
+            source = OrderedDict( [
+                ( 'path', path ),
+                ( 'hash', sourceHash ),
+                ( 'topEntries', topEntries ),
+                ( 'methodEntries', methodEntries ),
+                ( 'signatureEntries', signatureEntries ) ] )
+            if path in self.documents:
+                source[ 'documents' ] = self.documents[ path ]
+            sources.append( source )
+        content = OrderedDict( [
+            ( 'format', FORMAT ),
+            ( 'extractor', self.extractor ),
+            ( 'textIndex', self.textIndex ),
+            ( 'methodNames', self.methodNames ),
+            ( 'offlinePack', self.offlinePack ),
+            ( 'sources', sources ) ] )
+        temporaryPath = filePath + '.tmp'
+        with open( temporaryPath, 'w' ) as f:
+            json.dump( content, f, separators = ( ',', ':' ) )
+        ofdoc.indexfile.replaceFile( temporaryPath, filePath )
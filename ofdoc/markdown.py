@@ -0,0 +1,343 @@
+# coding=utf-8
+
+"""Read the table of content of a markdown documentation file, without Pandoc.
+
+generate-index.py only needs the headings of the documentation files: the class title, the
+"Methods" section and the functions signatures. This module scans the markdown source and builds
+the same headings tree as the TOC produced by Pandoc with the options used by generate-index.py
+(markdown-space_in_atx_header, --toc with the default depth of 3).
+
+It follows the Pandoc rules that matter for the OF documentation:
+- ATX headings (#, ##, ###), the space after the # being optional, and setext headings
+- a heading must start a block, a # line following a paragraph line is not a heading
+- no heading in fenced code blocks (~~~ or ```) nor in HTML comments
+- the text of a heading is split in several strings around code, emphasis and HTML tags, like the
+  text of the TOC link in the HTML file, and the typographic replacements of the smart extension
+  are done.
+
+"""
+
+import re
+import codecs
+
+try:
+    from HTMLParser import HTMLParser
+    unescapeEntity = HTMLParser().unescape
+except ImportError:
+    from html import unescape as unescapeEntity
+
+# Deepest heading level in the TOC (Pandoc default)
+TOC_DEPTH = 3
+
+atxHeadingRegex = re.compile( r'^(#{1,6})(.*)$' )
+atxClosingRegex = re.compile( r'(^|\s)#+\s*$' )
+attributesRegex = re.compile( r'\s*\{[#.][^{}]*\}\s*$' )
+setextUnderlineRegex = re.compile( r'^(=+|-+)\s*$' )
+fenceRegex = re.compile( r'^ {0,3}(`{3,}|~{3,})' )
+htmlCommentRegex = re.compile( r'^ {0,3}<!--' )
+htmlTagRegex = re.compile( r'</?[A-Za-z][A-Za-z0-9-]*(\s[^<>]*)?/?>' )
+entityRegex = re.compile( r'&(#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);' )
+whitespaceRegex = re.compile( r'\s+' )
+
+# Characters that can be escaped with a backslash
+ESCAPABLE = '\\`*_{}[]()>#+-.!|~"$%&\',/:;<=>?@^'
+
+
+###################################################################################################
+
+class Heading( object ):
+
+    """A heading of the document, and the headings of its sub-sections"""
+
+    __slots__ = ( 'level', 'strings', 'children' )
+
+    def __init__( self, level, strings ):
+        self.level = level
+        self.strings = strings
+        self.children = []
+
+    def text( self ):
+
+        """The text of the heading, like "".join( a.stripped_strings ) on the TOC link"""
+
+        return ''.join( [ s.strip() for s in self.strings if s.strip() ] )
+
+    def string( self ):
+
+        """The text of the heading if it is made of a single string, otherwise None, like a.string
+        on the TOC link"""
+
+        if len( self.strings ) == 1:
+            return self.strings[0]
+        return None
+
+
+###################################################################################################
+
+def descendants( headings ):
+
+    """Yield the headings and all their sub-headings, in document order"""
+
+    for heading in headings:
+        yield heading
+        for child in descendants( heading.children ):
+            yield child
+
+
+###################################################################################################
+
+def smartPunctuation( text ):
+
+    """Apply the typographic replacements of Pandoc smart extension"""
+
+    return text.replace( u'---', u'\u2014' ).replace( u'--', u'\u2013' ).replace( u'...', u'\u2026' )
+
+
+###################################################################################################
+
+def inlineStrings( text ):
+
+    """Split the inline content of a heading in the strings the HTML would contain"""
+
+    # First cut the text in tokens: plain text, code spans, HTML tags and emphasis delimiters
+    tokens = []
+    plain = []
+
+    def flushPlain():
+        if plain:
+            tokens.append( [ 'text', ''.join( plain ) ] )
+            del plain[:]
+
+    i = 0
+    length = len( text )
+    while i < length:
+        c = text[i]
+        if c == '\\' and i + 1 < length and text[ i + 1 ] in ESCAPABLE:
+            plain.append( text[ i + 1 ] )
+            i += 2
+        elif c == '`':
+            run = i
+            while run < length and text[ run ] == '`':
+                run += 1
+            ticks = text[ i : run ]
+            end = text.find( ticks, run )
+            while end != -1 and end + len( ticks ) < length and text[ end + len( ticks ) ] == '`':
+                end = text.find( ticks, end + len( ticks ) + 1 )
+            if end == -1:
+                plain.append( ticks )
+                i = run
+            else:
+                flushPlain()
+                tokens.append( [ 'code', whitespaceRegex.sub( ' ', text[ run : end ] ).strip() ] )
+                i = end + len( ticks )
+        elif c == '<' and htmlTagRegex.match( text, i ):
+            flushPlain()
+            tokens.append( [ 'tag', '' ] )
+            i = htmlTagRegex.match( text, i ).end()
+        elif c == '&' and entityRegex.match( text, i ):
+            m = entityRegex.match( text, i )
+            plain.append( unescapeEntity( m.group(0) ) )
+            i = m.end()
+        elif c in '*_':
+            run = i
+            while run < length and text[ run ] == c:
+                run += 1
+            before = text[ i - 1 ] if i > 0 else ' '
+            after = text[ run ] if run < length else ' '
+            canOpen = not after.isspace()
+            canClose = not before.isspace()
+            if c == '_' and before.isalnum() and after.isalnum():
+                # Intraword underscores are not emphasis
+                canOpen = canClose = False
+            flushPlain()
+            tokens.append( [ 'delimiter', text[ i : run ], canOpen, canClose ] )
+            i = run
+        else:
+            plain.append( c )
+            i += 1
+    flushPlain()
+
+    # Pair the emphasis delimiters. Unpaired delimiters are plain text.
+    openers = []
+    for token in tokens:
+        if token[0] != 'delimiter':
+            continue
+        opener = None
+        if token[3]:
+            for k in range( len( openers ) - 1, -1, -1 ):
+                if openers[k][1][0] == token[1][0]:
+                    opener = openers[k]
+                    del openers[ k: ]
+                    break
+        if opener is not None:
+            opener[0] = 'emphasis'
+            token[0] = 'emphasis'
+        elif token[2]:
+            openers.append( token )
+    for token in tokens:
+        if token[0] == 'delimiter':
+            token[0] = 'text'
+
+    # Build the strings: plain text is split by code, tags and emphasis boundaries
+    strings = []
+    current = []
+    for token in tokens:
+        if token[0] == 'text':
+            current.append( token[1] )
+            continue
+        if current:
+            strings.append( ''.join( current ) )
+            current = []
+        if token[0] == 'code' and token[1]:
+            strings.append( token[1] )
+    if current:
+        strings.append( ''.join( current ) )
+
+    strings = [ smartPunctuation( whitespaceRegex.sub( ' ', s ) ) for s in strings ]
+    # The heading text is trimmed
+    if strings:
+        strings[0] = strings[0].lstrip()
+        strings[-1] = strings[-1].rstrip()
+    return [ s for s in strings if s ]
+
+
+###################################################################################################
+
+def headingContent( text ):
+
+    """Remove the closing sequence and the attributes of an ATX heading"""
+
+    text = attributesRegex.sub( '', text )
+    text = atxClosingRegex.sub( '', text )
+    return text.strip()
+
+
+###################################################################################################
+
+def readHeadings( lines, paragraphs = None ):
+
+    """Yield ( level, strings ) for each heading of the markdown document.
+    If paragraphs is a list, the lines of the paragraphs are appended to it as they are read: when a
+    heading is yielded, it holds the lines of text found before the heading."""
+
+    inParagraph = False
+    paragraphLines = 0
+    lastLine = ''
+    i = 0
+    count = len( lines )
+    while i < count:
+        line = lines[i].rstrip( '\r\n' )
+        i += 1
+
+        if not line.strip():
+            inParagraph = False
+            paragraphLines = 0
+            continue
+
+        # Fenced code block
+        m = fenceRegex.match( line )
+        if m:
+            fence = m.group(1)
+            closingRegex = re.compile( '^ {0,3}' + re.escape( fence[0] ) + '{' + str( len( fence ) ) + ',}\\s*$' )
+            while i < count and not closingRegex.match( lines[i].rstrip( '\r\n' ) ):
+                i += 1
+            i += 1
+            inParagraph = False
+            paragraphLines = 0
+            continue
+
+        # HTML comment, maybe on several lines
+        if htmlCommentRegex.match( line ):
+            start = line.index( '<!--' ) + 4
+            while line.find( '-->', start ) == -1 and i < count:
+                line = lines[i].rstrip( '\r\n' )
+                start = 0
+                i += 1
+            if not inParagraph:
+                paragraphLines = 0
+            continue
+
+        # ATX heading, only at the beginning of a block
+        if not inParagraph:
+            m = atxHeadingRegex.match( line )
+            if m:
+                yield ( len( m.group(1) ), inlineStrings( headingContent( m.group(2) ) ) )
+                continue
+
+        # Setext heading: a single line of text underlined with = or -
+        if inParagraph and paragraphLines == 1 and setextUnderlineRegex.match( line ):
+            level = 1 if line.strip()[0] == '=' else 2
+            if paragraphs is not None:
+                paragraphs.pop()
+            yield ( level, inlineStrings( attributesRegex.sub( '', lastLine ).strip() ) )
+            inParagraph = False
+            paragraphLines = 0
+            continue
+
+        # Indented code block
+        if not inParagraph and line.startswith( '    ' ):
+            continue
+
+        inParagraph = True
+        paragraphLines += 1
+        lastLine = line
+        if paragraphs is not None:
+            paragraphs.append( line )
+
+
+###################################################################################################
+
+def readSections( filePath ):
+
+    """Read a markdown file and return the list of its sections, as ( level, strings, text ) tuples:
+    the level and the strings of the heading, and the text of the paragraphs that follow it up to
+    the next heading. Code blocks and HTML comments are not part of the text."""
+
+    with codecs.open( filePath, 'r', 'utf-8' ) as f:
+        lines = f.read().splitlines()
+
+    sections = []
+    paragraphs = []
+    for ( level, strings ) in readHeadings( lines, paragraphs ):
+        if sections:
+            sections[-1][2] = ' '.join( paragraphs )
+        del paragraphs[:]
+        sections.append( [ level, strings, '' ] )
+    if sections:
+        sections[-1][2] = ' '.join( paragraphs )
+    return [ tuple( section ) for section in sections ]
+
+
+###################################################################################################
+
+def readToc( filePath, depth = TOC_DEPTH ):
+
+    """Read a markdown file and return its table of content, as the list of its top level Headings"""
+
+    with codecs.open( filePath, 'r', 'utf-8' ) as f:
+        lines = f.read().splitlines()
+    return buildToc( readHeadings( lines ), depth )
+
+
+###################################################################################################
+
+def buildToc( headings, depth = TOC_DEPTH ):
+
+    """Return the table of content of the ( level, strings ) headings of a document, as the list of
+    its top level Headings"""
+
+    toc = []
+    # The opened sections, from the top level one
+    stack = []
+    for ( level, strings ) in headings:
+        if level > depth:
+            continue
+        heading = Heading( level, strings )
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        if stack:
+            stack[-1].children.append( heading )
+        else:
+            toc.append( heading )
+        stack.append( heading )
+    return toc
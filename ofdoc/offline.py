@@ -0,0 +1,346 @@
+# coding=utf-8
+
+"""Offline copy of the OF documentation.
+
+generate-index.py --offline converts every documentation file to a standalone HTML page with Pandoc,
+and stores all the pages in a single compressed file, offline.pack, in the index directory. Before
+a page is stored:
+- a show_<name> anchor is added before each function or method heading, like on the online
+  documentation, so the URLs of the index (path.html#show_draw) work with the local pages
+- the links to the online documentation are made relative, so that they lead to the local pages
+
+open-documentation.py --offline extracts the pages in the offline directory of the index the first
+time it is used (and again when the pack changes), then opens the pages with file:// URLs. All the
+pages are extracted at once: there is no server behind a file:// URL to extract a page when a link
+is followed. Each version of the pack is extracted in its own sub-directory, named after the pack
+stamp (see packStamp()). The pages are written in a temporary directory, renamed to the stamp name
+once complete: several processes extracting the same pack at the same time don't disturb each
+other, and a page is never read from a half-written tree. The pages of a same blob are hard links
+to a single file, where the platform allows it, so the extracted pages are deduplicated like the
+pack. The sub-directories of the older packs are removed.
+
+Pack format
+===========
+
+All the integers are little endian.
+
+Header
+    magic ('OFDO'), format version, number of pages, number of blobs, offset of the pages table,
+    offset of the blobs table, offset of the strings.
+Pages table
+    One record per page, sorted by page path: ( path offset, path length, blob number ). The path is
+    the one used in the index URLs, without the .html extension.
+Blobs table
+    One record per distinct page content: ( data offset, compressed length, length ). Pages with
+    the same content share their blob.
+Strings
+    The pages paths.
+Blobs
+    The pages contents, compressed with zlib.
+
+"""
+
+import os
+import re
+import mmap
+import shutil
+import tempfile
+import zlib
+import struct
+import hashlib
+
+from ofdoc.indexfile import StringTable, IndexFormatError, replaceFileIfChanged
+
+# Name of the pack file, in the index directory
+OFFLINE_PACK_FILE_NAME = 'offline.pack'
+
+# Name of the directory where the pages are extracted, in the index directory
+OFFLINE_DIR_NAME = 'offline'
+
+# Prefix of the temporary directories of the extractions in progress, in the offline directory
+EXTRACTION_PREFIX = '.extracting-'
+
+MAGIC = b'OFDO'
+VERSION = 1
+
+HEADER = struct.Struct( '<4sIIIIII' )
+PAGE = struct.Struct( '<III' )
+BLOB = struct.Struct( '<III' )
+
+headingRegex = re.compile( r'<h([1-6])(\s[^>]*)?>(.*?)</h\1\s*>', re.DOTALL | re.IGNORECASE )
+tagRegex = re.compile( r'<[^>]*>' )
+functionNameRegex = re.compile( r'(~?[A-Za-z_]\w*)\s*\(' )
+bodyRegex = re.compile( r'<body[^>]*>(.*)</body\s*>', re.DOTALL | re.IGNORECASE )
+onlineLinkRegex = re.compile( r'''((?:href|src)\s*=\s*["'])(?:(?:https?:)?//(?:www\.)?openframeworks\.cc)?/documentation/''', re.IGNORECASE )
+
+
+###################################################################################################
+
+def headingFunctionName( headingContent ):
+
+    """Return the name of the function of a heading like "void draw(float x, float y)", or None"""
+
+    text = tagRegex.sub( '', headingContent ).replace( '&amp;', '&' ).replace( '&lt;', '<' ).replace( '&gt;', '>' )
+    m = functionNameRegex.search( text )
+    if m is None:
+        return None
+    return m.group(1)
+
+
+###################################################################################################
+
+def addShowAnchors( html ):
+
+    """Add a show_<name> anchor before the first heading of each function or method"""
+
+    chunks = []
+    done = set( re.findall( r'''id\s*=\s*["'](show_[^"']*)["']''', html ) )
+    last = 0
+    for m in headingRegex.finditer( html ):
+        name = headingFunctionName( m.group(3) )
+        if name is None or 'show_' + name in done:
+            continue
+        done.add( 'show_' + name )
+        chunks.append( html[ last : m.start() ] )
+        chunks.append( '<a id="show_' + name + '"></a>' )
+        last = m.start()
+    chunks.append( html[ last: ] )
+    return ''.join( chunks )
+
+
+###################################################################################################
+
+def rewriteLinks( html, pagePath ):
+
+    """Make the links to the online documentation relative to the page"""
+
+    prefix = '../' * pagePath.count( '/' )
+    return onlineLinkRegex.sub( lambda m: m.group(1) + prefix, html )
+
+
+###################################################################################################
+
+def combinePages( htmls ):
+
+    """Make a single page from several html files documenting the same page, like the class and the
+    functions of ofImage. The bodies of the other files are appended to the body of the first one."""
+
+    html = htmls[0]
+    bodies = []
+    for other in htmls[ 1: ]:
+        m = bodyRegex.search( other )
+        bodies.append( m.group(1) if m else other )
+    end = html.lower().rfind( '</body' )
+    if end == -1:
+        end = len( html )
+    return html[ : end ] + ''.join( bodies ) + html[ end: ]
+
+
+###################################################################################################
+
+def preparePage( htmls, pagePath ):
+
+    """Return the content stored for a page, made from the list of its html files"""
+
+    return rewriteLinks( addShowAnchors( combinePages( htmls ) ), pagePath )
+
+
+###################################################################################################
+
+def writePack( filePath, pages ):
+
+    """Write the pack of the pages. pages is a list of ( pagePath, content ) tuples, the contents
+    being prepared by preparePage(). The file is replaced at once, so open-documentation.py never
+    reads a partial pack."""
+
+    strings = StringTable()
+    blobs = []
+    blobNumbers = dict()
+    pageRecords = []
+    for ( pagePath, content ) in sorted( pages ):
+        digest = hashlib.sha1( content ).digest()
+        blobNumber = blobNumbers.get( digest )
+        if blobNumber is None:
+            blobNumber = len( blobs )
+            blobNumbers[ digest ] = blobNumber
+            blobs.append( ( zlib.compress( content, 9 ), len( content ) ) )
+        pageRecords.append( ( strings.add( pagePath ), blobNumber ) )
+
+    pagesOffset = HEADER.size
+    blobsOffset = pagesOffset + PAGE.size * len( pageRecords )
+    stringsOffset = blobsOffset + BLOB.size * len( blobs )
+    dataOffset = stringsOffset + strings.size
+
+    records = []
+    for ( ( pathOffset, pathLength ), blobNumber ) in pageRecords:
+        records.append( PAGE.pack( stringsOffset + pathOffset, pathLength, blobNumber ) )
+    offset = dataOffset
+    for ( data, length ) in blobs:
+        records.append( BLOB.pack( offset, len( data ), length ) )
+        offset += len( data )
+
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'wb' ) as f:
+        f.write( HEADER.pack( MAGIC, VERSION, len( pageRecords ), len( blobs ),
+                              pagesOffset, blobsOffset, stringsOffset ) )
+        f.write( b''.join( records ) )
+        f.write( strings.data() )
+        for ( data, _ ) in blobs:
+            f.write( data )
+    replaceFileIfChanged( temporaryPath, filePath )
+    return ( len( pageRecords ), len( blobs ) )
+
+
+###################################################################################################
+
+class OfflinePack( object ):
+
+    """The pages of an offline pack, mapped in memory"""
+
+    def __init__( self, filePath ):
+        self.file = open( filePath, 'rb' )
+        try:
+            self.data = mmap.mmap( self.file.fileno(), 0, access = mmap.ACCESS_READ )
+            header = HEADER.unpack_from( self.data, 0 )
+        except ( ValueError, EnvironmentError, struct.error ):
+            self.file.close()
+            raise IndexFormatError( 'Unreadable offline pack ' + filePath )
+        ( magic, version, self.pageCount, self.blobCount,
+          self.pagesOffset, self.blobsOffset, self.stringsOffset ) = header
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise IndexFormatError( 'Unsupported offline pack ' + filePath )
+
+    def close( self ):
+        self.data.close()
+        self.file.close()
+
+    def pages( self ):
+
+        """Yield ( pagePath, blobNumber ) for each page"""
+
+        for pageNumber in range( self.pageCount ):
+            ( pathOffset, pathLength, blobNumber ) = PAGE.unpack_from( self.data, self.pagesOffset + pageNumber * PAGE.size )
+            yield ( self.data[ pathOffset : pathOffset + pathLength ], blobNumber )
+
+    def blob( self, blobNumber ):
+
+        """Return the uncompressed content of a blob"""
+
+        ( offset, compressedLength, length ) = BLOB.unpack_from( self.data, self.blobsOffset + blobNumber * BLOB.size )
+        return zlib.decompress( self.data[ offset : offset + compressedLength ] )
+
+
+###################################################################################################
+
+def packStamp( pack ):
+
+    """Identify the version of an open pack: its size and its modification time in milliseconds.
+    The stamp is also the name of the directory of its pages."""
+
+    info = os.fstat( pack.file.fileno() )
+    return '%d-%d' % ( info.st_size, int( info.st_mtime * 1000 ) )
+
+
+###################################################################################################
+
+def stampTime( stamp ):
+
+    """Return the modification time of the pack of a stamp, or None if it is not a stamp"""
+
+    m = re.match( r'\d+-(\d+)$', stamp )
+    return int( m.group(1) ) if m else None
+
+
+###################################################################################################
+
+def extractPages( pack, dirPath ):
+
+    """Write the pages of the pack in a directory. The pages of a same blob are hard links to the
+    first one written, or copies without hard links."""
+
+    blobFiles = dict()
+    for ( pagePath, blobNumber ) in pack.pages():
+        pageFilePath = os.path.join( dirPath, *pagePath.split( '/' ) ) + '.html'
+        pageDirPath = os.path.dirname( pageFilePath )
+        if not os.path.isdir( pageDirPath ):
+            os.makedirs( pageDirPath )
+        if blobNumber in blobFiles and hasattr( os, 'link' ):
+            os.link( blobFiles[ blobNumber ], pageFilePath )
+            continue
+        with open( pageFilePath, 'wb' ) as f:
+            f.write( pack.blob( blobNumber ) )
+        blobFiles.setdefault( blobNumber, pageFilePath )
+
+
+###################################################################################################
+
+def extract( indexPath ):
+
+    """Make sure the pages of the pack of the index directory are extracted in a sub-directory of
+    its offline directory. Return the path to this sub-directory, or None if there is no pack."""
+
+    packPath = os.path.join( indexPath, OFFLINE_PACK_FILE_NAME )
+    offlinePath = os.path.join( indexPath, OFFLINE_DIR_NAME )
+    if not os.path.isfile( packPath ):
+        return None
+    # The stamp is the one of the opened file: generate-index.py may replace the pack meanwhile
+    pack = OfflinePack( packPath )
+    try:
+        stamp = packStamp( pack )
+        dirPath = os.path.join( offlinePath, stamp )
+        if os.path.isdir( dirPath ):
+            return dirPath
+
+        if not os.path.isdir( offlinePath ):
+            try:
+                os.makedirs( offlinePath )
+            except OSError:
+                # Made by another process in the meantime
+                if not os.path.isdir( offlinePath ):
+                    raise
+        temporaryPath = tempfile.mkdtemp( prefix = EXTRACTION_PREFIX, dir = offlinePath )
+        try:
+            extractPages( pack, temporaryPath )
+            os.rename( temporaryPath, dirPath )
+        except OSError:
+            # Another process renamed its extraction of the same pack first
+            if not os.path.isdir( dirPath ):
+                raise
+        finally:
+            if os.path.isdir( temporaryPath ):
+                shutil.rmtree( temporaryPath, ignore_errors = True )
+    finally:
+        pack.close()
+
+    # Remove the pages of the older packs (and the ones extracted by older versions of this
+    # module), but not the extractions in progress nor the pages of a newer pack
+    for name in os.listdir( offlinePath ):
+        if name.startswith( EXTRACTION_PREFIX ):
+            continue
+        packTime = stampTime( name )
+        if packTime is not None and packTime >= stampTime( stamp ):
+            continue
+        path = os.path.join( offlinePath, name )
+        if os.path.isdir( path ):
+            shutil.rmtree( path, ignore_errors = True )
+        else:
+            try:
+                os.remove( path )
+            except OSError:
+                pass
+    return dirPath
+
+
+###
+
+def fileURL( dirPath ):
+
+    """Return the file:// URL of a directory, ending with a /"""
+
+    path = os.path.abspath( dirPath ).replace( '\\', '/' )
+    if not path.startswith( '/' ):
+        # Windows drive letter
+        path = '/' + path
+    path = path.replace( '%', '%25' ).replace( ' ', '%20' ).replace( '#', '%23' )
+    return 'file://' + path + '/'
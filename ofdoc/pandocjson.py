@@ -0,0 +1,225 @@
+# coding=utf-8
+
+"""Read the headings of the documentation files in the Pandoc JSON AST.
+
+The json extractor of generate-index.py asks Pandoc for the syntax tree of the markdown files
+(-t json) rather than for standalone html files: the headings are read straight from the tree, no
+html file is written and BeautifulSoup is not needed. Pandoc reads the files with the same options
+as for the html files, so the headings are the ones of the html TOC.
+
+Several files are converted by a single Pandoc run, to save the start up time of a process per file.
+They are given to Pandoc as a single document, each one preceded by a marker, an HTML comment that
+Pandoc keeps in the tree as a raw block:
+
+    <!-- ofdoc source 0 -->
+
+    (content of the first file)
+
+    <!-- ofdoc source 1 -->
+
+    (content of the second file)
+
+The tree is then cut at the markers. A file that doesn't close a code block or an HTML comment
+would swallow the markers of the next ones: if the markers are not all found in order, each file is
+converted alone.
+
+Some markdown definitions are for the whole document, not only for the file they are in: link
+reference definitions, footnote definitions and YAML metadata blocks. In a single document, they
+would change the headings of the other files (a [link] would become a link, a YAML block would eat
+the variables of the other files...). The files having such a definition are not part of the
+single document, they are converted alone.
+
+The text of a heading is split in strings like the text of its link in the html TOC (see
+ofdoc/markdown.py): code, emphasis, spans and HTML tags make separate strings.
+
+"""
+
+import re
+import json
+import codecs
+import subprocess, shlex
+
+MARKER = u'<!-- ofdoc source %d -->'
+
+# Definitions for the whole document: a link reference or footnote definition ([label]: or [^label]:),
+# or the opening line of a YAML metadata block (--- not followed by a blank line, at the start of the
+# file or after a blank line)
+DOCUMENT_DEFINITION = re.compile( br'^ {0,3}\[[^\]\r\n]+\]:|(?:\A|\n[ \t]*\r?\n)---[ \t]*\r?\n(?![ \t]*\r?$)', re.MULTILINE )
+
+# Inlines written as an html element around their content
+CONTAINERS = frozenset( [ 'Emph', 'Strong', 'Strikeout', 'Superscript', 'Subscript', 'SmallCaps',
+                          'Underline', 'Span', 'Link' ] )
+
+
+###################################################################################################
+
+def pandocCommand( pandocExe, filePath = None ):
+
+    """Return the arguments of the Pandoc command writing the JSON AST of a file, or of the standard
+    input if filePath is None"""
+
+    command = '"' + pandocExe + '" --quiet -f markdown-space_in_atx_header -t json'
+    if filePath is not None:
+        command += ' "' + filePath + '"'
+    return shlex.split( command )
+
+
+###################################################################################################
+
+def inlineStrings( inlines ):
+
+    """Return the strings of the html of a list of inlines, as in the TOC link of a heading"""
+
+    strings = []
+    current = []
+
+    def flush():
+        if current:
+            strings.append( u''.join( current ) )
+            del current[:]
+
+    def walk( inlines ):
+        for inline in inlines:
+            kind = inline[ 't' ]
+            content = inline.get( 'c' )
+            if kind == 'Str':
+                current.append( content )
+            elif kind in ( 'Space', 'SoftBreak' ):
+                current.append( u' ' )
+            elif kind == 'Quoted':
+                ( opening, closing ) = ( u'“', u'”' ) if content[0][ 't' ] == 'DoubleQuote' else ( u'‘', u'’' )
+                current.append( opening )
+                walk( content[1] )
+                current.append( closing )
+            elif kind == 'Code':
+                flush()
+                strings.append( content[1] )
+            elif kind == 'Math':
+                flush()
+                strings.append( u'\\(' + content[1] + u'\\)' )
+            elif kind in CONTAINERS:
+                # Span and Link have attributes before their content
+                flush()
+                walk( content[1] if kind in ( 'Span', 'Link' ) else content )
+                flush()
+            elif kind == 'Cite':
+                flush()
+                walk( content[1] )
+                flush()
+            elif kind == 'RawInline':
+                if content[0] == 'html':
+                    flush()
+            elif kind in ( 'LineBreak', 'Image' ):
+                flush()
+            # Notes are not part of the TOC
+
+    walk( inlines )
+    flush()
+    if strings:
+        strings[0] = strings[0].lstrip()
+        strings[-1] = strings[-1].rstrip()
+    return [ s for s in strings if s ]
+
+
+###################################################################################################
+
+def documentBlocks( ast ):
+
+    """Return the blocks of a Pandoc document, in the JSON format of Pandoc 1.18 and later or in the
+    older one"""
+
+    if isinstance( ast, dict ):
+        return ast[ 'blocks' ]
+    return ast[1]
+
+
+###################################################################################################
+
+def blocksHeadings( blocks ):
+
+    """Return the ( level, strings ) of the headings of a list of blocks. Only the top level headings
+    are sections, like in the TOC."""
+
+    return [ ( block[ 'c' ][0], inlineStrings( block[ 'c' ][2] ) ) for block in blocks if block[ 't' ] == 'Header' ]
+
+
+###################################################################################################
+
+def runPandoc( arguments, data = None ):
+
+    """Run Pandoc and return ( blocks, errors ): the blocks of the document, None if Pandoc failed,
+    and the error output of Pandoc"""
+
+    process = subprocess.Popen( arguments, stdin = subprocess.PIPE if data is not None else None,
+                                stdout = subprocess.PIPE, stderr = subprocess.PIPE )
+    ( stdoutdata, stderrdata ) = process.communicate( data )
+    if process.returncode != 0:
+        return ( None, stderrdata )
+    try:
+        return ( documentBlocks( json.loads( stdoutdata ) ), stderrdata )
+    except ( ValueError, KeyError, IndexError, TypeError ):
+        return ( None, stderrdata or 'Unreadable Pandoc output' )
+
+
+###################################################################################################
+
+def readFile( filePath ):
+
+    """Return the content of a markdown file, as Pandoc reads it"""
+
+    with open( filePath, 'rb' ) as f:
+        content = f.read()
+    if content.startswith( codecs.BOM_UTF8 ):
+        content = content[ len( codecs.BOM_UTF8 ): ]
+    return content
+
+
+###################################################################################################
+
+def convertFiles( pandocExe, filePaths ):
+
+    """Convert several files with a single Pandoc run. Return the list of the ( level, strings )
+    headings of each file, None for the files having definitions for the whole document, which must
+    be converted alone (see convertFile()). Return None if the files can't be told apart in the
+    Pandoc output or if Pandoc failed."""
+
+    chunks = []
+    batched = []
+    for filePath in filePaths:
+        content = readFile( filePath )
+        if DOCUMENT_DEFINITION.search( content ):
+            continue
+        chunks.append( b'\n\n' + ( MARKER % len( batched ) ).encode( 'utf-8' ) + b'\n\n' )
+        chunks.append( content )
+        batched.append( filePath )
+    if not batched:
+        return [ None ] * len( filePaths )
+    ( blocks, errors ) = runPandoc( pandocCommand( pandocExe ), b''.join( chunks ) + b'\n' )
+    if blocks is None or errors:
+        return None
+
+    files = []
+    for block in blocks:
+        if block[ 't' ] == 'RawBlock' and block[ 'c' ][1].strip() == MARKER % len( files ):
+            files.append( [] )
+        elif files:
+            files[-1].append( block )
+        elif block[ 't' ] not in ( 'Null', 'RawBlock' ):
+            return None
+    if len( files ) != len( batched ):
+        return None
+    headings = dict( zip( batched, [ blocksHeadings( fileBlocks ) for fileBlocks in files ] ) )
+    return [ headings.get( filePath ) for filePath in filePaths ]
+
+
+###################################################################################################
+
+def convertFile( pandocExe, filePath ):
+
+    """Convert a single file. Return ( headings, errors ): the list of the ( level, strings ) headings
+    of the file, None if Pandoc failed, and the error output of Pandoc."""
+
+    ( blocks, errors ) = runPandoc( pandocCommand( pandocExe, filePath ) )
+    if blocks is None:
+        return ( None, errors )
+    return ( blocksHeadings( blocks ), errors )
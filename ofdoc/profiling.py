@@ -0,0 +1,131 @@
+# coding=utf-8
+
+"""Measure where the time goes when generate-index.py builds the index.
+
+generate-index.py --profile report.json records the wall time and the count of each stage of the
+build, and writes them as a JSON report:
+
+    {
+        "version": 1,
+        "date": "2016-05-14T18:03:12",
+        "settings": { "extractor": "html", "jobs": 4, ... },
+        "totalTime": 41.2,
+        "stages": [ { "stage": "walk", "time": 0.08, "count": 152 }, ... ],
+        "counters": { "sources": 1210, "sources parsed": 3, "conversions skipped": 1207, ... },
+        "slowestFiles": [ { "file": "3d/of3dPrimitive.markdown", "time": 0.41,
+                            "stages": { "pandoc": 0.29, "html parsing": 0.11, ... } }, ... ]
+    }
+
+The stages of the worker processes (hash, pandoc, html parsing, markdown parsing) are the sum of
+the times of all the files: with several jobs they run in parallel, so their sum can exceed the
+total time. Their count is the number of files that went through the stage. The "sources" stage is
+the wall time of the whole processing of the files, including the walk and the merge.
+
+"""
+
+import time
+import json
+import heapq
+import datetime
+import contextlib
+from collections import OrderedDict
+
+# Version of the report content
+FORMAT = 1
+
+
+###################################################################################################
+
+class Profile( object ):
+
+    """The times and the counters of a build"""
+
+    def __init__( self, slowestCount = 10 ):
+        self.startTime = time.time()
+        # Keys are the stages names, in the order they first appear, values are [ time, count ]
+        self.stages = OrderedDict()
+        self.counters = OrderedDict()
+        # The settings of the build, copied in the report
+        self.settings = OrderedDict()
+        # Heap of the slowest files, as ( time, fileRelPath, stages times )
+        self.slowestCount = slowestCount
+        self.slowestFiles = []
+
+    def add( self, stage, seconds, count = 1 ):
+
+        """Add some time to a stage"""
+
+        record = self.stages.get( stage )
+        if record is None:
+            record = self.stages[ stage ] = [ 0.0, 0 ]
+        record[0] += seconds
+        record[1] += count
+
+    def count( self, counter, value = 1 ):
+
+        """Increment a counter"""
+
+        self.counters[ counter ] = self.counters.get( counter, 0 ) + value
+
+    @contextlib.contextmanager
+    def stage( self, stage, count = 1 ):
+
+        """Add the time of a with block to a stage"""
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add( stage, time.time() - start, count )
+
+    def timedIterator( self, stage, iterable ):
+
+        """Yield the items of the iterable, adding the time taken to produce them to a stage"""
+
+        iterator = iter( iterable )
+        while True:
+            start = time.time()
+            try:
+                item = next( iterator )
+            except StopIteration:
+                self.add( stage, time.time() - start, 0 )
+                return
+            self.add( stage, time.time() - start )
+            yield item
+
+    def addFile( self, fileRelPath, times ):
+
+        """Add the times of the stages of a source file, as a { stage: seconds } dictionary"""
+
+        for ( stage, seconds ) in times.items():
+            self.add( stage, seconds )
+        record = ( sum( times.values() ), fileRelPath, times )
+        if len( self.slowestFiles ) < self.slowestCount:
+            heapq.heappush( self.slowestFiles, record )
+        elif self.slowestCount > 0:
+            heapq.heappushpop( self.slowestFiles, record )
+
+    def report( self ):
+
+        """Return the report, as a dictionary ready for json"""
+
+        report = OrderedDict()
+        report[ 'version' ] = FORMAT
+        report[ 'date' ] = datetime.datetime.fromtimestamp( self.startTime ).replace( microsecond = 0 ).isoformat()
+        report[ 'settings' ] = self.settings
+        report[ 'totalTime' ] = round( time.time() - self.startTime, 6 )
+        report[ 'stages' ] = [ OrderedDict( [ ( 'stage', stage ), ( 'time', round( seconds, 6 ) ), ( 'count', count ) ] )
+                               for ( stage, ( seconds, count ) ) in self.stages.items() ]
+        report[ 'counters' ] = self.counters
+        report[ 'slowestFiles' ] = [ OrderedDict( [ ( 'file', fileRelPath ), ( 'time', round( seconds, 6 ) ),
+                                                    ( 'stages', OrderedDict( [ ( stage, round( times[ stage ], 6 ) ) for stage in sorted( times ) ] ) ) ] )
+                                     for ( seconds, fileRelPath, times ) in sorted( self.slowestFiles, reverse = True ) ]
+        return report
+
+    def write( self, filePath ):
+
+        """Write the report to a JSON file"""
+
+        with open( filePath, 'w' ) as f:
+            json.dump( self.report(), f, indent = 4, separators = ( ',', ': ' ) )
+            f.write( '\n' )
@@ -0,0 +1,110 @@
+# coding=utf-8
+
+"""Resolve many OF keywords to their documentation URLs in a single process.
+
+open-documentation.py resolves one keyword per run, which is right for an editor shortcut but not
+for a script that links all the identifiers of a source listing. A Resolver reads the whole index
+once and keeps it in a dictionary, so each lookup is a single dictionary access:
+
+    import ofdoc.resolver
+    resolver = ofdoc.resolver.openResolver( 'path/to/index', 'http://www.openframeworks.cc/documentation/' )
+    for ( keyword, urls ) in zip( keywords, resolver.resolveMany( keywords ) ):
+        ...
+
+A keyword resolves to a tuple of URLs: empty if the keyword is not in the index, a single URL for a
+class or a global function, and one URL per class for a method name shared by many classes.
+
+open-documentation.py --batch gives the same service on the command line.
+
+"""
+
+import os
+import stat
+
+import ofdoc.indexfile
+
+
+###################################################################################################
+
+class Resolver( object ):
+
+    """All the keywords of an index, with their absolute URLs"""
+
+    def __init__( self, index, baseURL = '' ):
+        # Keys are the keywords, values are tuples of ( name, URL )
+        self.entries = dict()
+        # Keys are the keywords, values are tuples of URLs
+        self.urls = dict()
+        # The keywords which are only methods names
+        self.methodNames = set()
+        for ( keyword, entries, isMethod ) in index.items():
+            entries = tuple( [ ( name, baseURL + relURL ) for ( name, relURL ) in entries ] )
+            self.entries[ keyword ] = entries
+            self.urls[ keyword ] = tuple( [ url for ( name, url ) in entries ] )
+            if isMethod:
+                self.methodNames.add( keyword )
+
+    def __len__( self ):
+        return len( self.urls )
+
+    def lookup( self, keyword ):
+
+        """Return the tuple of the ( name, URL ) matching the keyword, like the index lookup()"""
+
+        return self.entries.get( keyword, () )
+
+    def resolve( self, keyword ):
+
+        """Return the tuple of the URLs of the keyword"""
+
+        return self.urls.get( keyword, () )
+
+    def resolveMany( self, keywords ):
+
+        """Return the list of the tuples of URLs of the keywords, in the same order"""
+
+        get = self.urls.get
+        return [ get( keyword, () ) for keyword in keywords ]
+
+
+###################################################################################################
+
+def openResolver( indexPath, baseURL = '', versionName = None ):
+
+    """Read the index of the index directory (or a version of its index store) in a Resolver, or
+    return None if there is no index"""
+
+    index = ofdoc.indexfile.openIndex( indexPath, versionName )
+    if index is None:
+        return None
+    try:
+        return Resolver( index, baseURL )
+    finally:
+        index.close()
+
+
+###################################################################################################
+
+def resolveStream( resolver, source, destination ):
+
+    """Read keywords from source, one per line, and write to destination one line per keyword:
+    the keyword and its URLs, tab separated. Return the number of keywords.
+    When source is a pipe or a terminal, each line is flushed as soon as it is resolved, so that
+    another program can use it as a coprocess."""
+
+    interactive = not stat.S_ISREG( os.fstat( source.fileno() ).st_mode )
+    resolve = resolver.urls.get
+    write = destination.write
+    count = 0
+    if interactive:
+        for line in iter( source.readline, '' ):
+            keyword = line.strip()
+            write( '\t'.join( ( keyword, ) + resolve( keyword, () ) ) + '\n' )
+            destination.flush()
+            count += 1
+    else:
+        for line in source:
+            keyword = line.strip()
+            write( '\t'.join( ( keyword, ) + resolve( keyword, () ) ) + '\n' )
+            count += 1
+    return count
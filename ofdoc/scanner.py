@@ -0,0 +1,160 @@
+# coding=utf-8
+
+"""Find the OF identifiers used in the C++ sources of a project.
+
+The sources are tokenized line by line, so a file is never loaded whole in memory. Comments, string
+and character literals and #include lines are skipped. Each identifier is then searched in the
+index, through a Resolver:
+- a class or a global function name matches anywhere (ofImage image; ofDrawCircle( ... ))
+- a method name matches only after ., -> or :: (image.draw(), ofApp::setup), otherwise every local
+  variable called like a method of some OF class would be reported.
+
+The result is a cross-reference: one ( line number, identifier, URLs ) tuple per use of an OF
+identifier. The files are scanned by a pool of worker processes, each one with its own Resolver.
+The workers only send back the line numbers and the identifiers, the URLs are added by the main
+process: this is much less data to transfer between the processes.
+
+"""
+
+import os
+import re
+import multiprocessing
+
+import ofdoc.resolver
+
+# Extensions of the C++ files to scan
+SOURCE_EXTENSIONS = ( '.cpp', '.cc', '.cxx', '.c', '.mm', '.m', '.h', '.hpp', '.hxx', '.inl' )
+
+# Files sent to a worker at once
+CHUNK_SIZE = 8
+
+# An identifier, maybe preceded by a member access operator. A comment or a literal start.
+tokenRegex = re.compile( r'(?:(->|\.|::)\s*)?([A-Za-z_]\w*)|(/\*)|//|"(?:\\.|[^"\\])*"?|\'(?:\\.|[^\'\\])*\'?' )
+# Lines with only identifiers and operators can be tokenized by a simpler regex
+identifierRegex = re.compile( r'(?:(->|\.|::)\s*)?([A-Za-z_]\w*)' )
+includeRegex = re.compile( r'^\s*#\s*(include|import)\b' )
+
+
+###################################################################################################
+
+def findSources( rootPath ):
+
+    """Yield the paths of the C++ files of a project directory, in a stable order"""
+
+    for ( dirPath, dirNames, fileNames ) in os.walk( rootPath ):
+        dirNames.sort()
+        for fileName in sorted( fileNames ):
+            if os.path.splitext( fileName )[1].lower() in SOURCE_EXTENSIONS:
+                yield os.path.join( dirPath, fileName )
+
+
+###################################################################################################
+
+def scanLines( lines, resolver ):
+
+    """Yield ( line number, identifier ) for each OF identifier of the C++ lines"""
+
+    urls = resolver.urls
+    methodNames = resolver.methodNames
+    inComment = False
+    lineNumber = 0
+    for line in lines:
+        lineNumber += 1
+        pos = 0
+        if inComment:
+            end = line.find( '*/' )
+            if end == -1:
+                continue
+            pos = end + 2
+            inComment = False
+        if '#' in line and includeRegex.match( line ):
+            continue
+
+        # Fast path: nothing to skip on this line
+        if '/' not in line and '"' not in line and "'" not in line:
+            for ( operator, identifier ) in identifierRegex.findall( line, pos ):
+                if identifier in urls and ( operator or identifier not in methodNames ):
+                    yield ( lineNumber, identifier )
+            continue
+
+        m = tokenRegex.search( line, pos )
+        while m is not None:
+            identifier = m.group(2)
+            if identifier is not None:
+                if identifier in urls and ( m.group(1) or identifier not in methodNames ):
+                    yield ( lineNumber, identifier )
+            elif m.group(3) is not None:
+                # Block comment, maybe ending on another line
+                end = line.find( '*/', m.end() )
+                if end == -1:
+                    inComment = True
+                    break
+                m = tokenRegex.search( line, end + 2 )
+                continue
+            elif m.group(0) == '//':
+                break
+            m = tokenRegex.search( line, m.end() )
+
+
+###################################################################################################
+
+def scanFile( filePath, resolver ):
+
+    """Return the list of the ( line number, identifier ) of the OF identifiers of a C++ file"""
+
+    with open( filePath, 'r' ) as f:
+        return list( scanLines( f, resolver ) )
+
+
+###################################################################################################
+
+# The Resolver of a worker process
+workerResolver = None
+
+def initWorker( indexPath ):
+
+    """Read the index in a worker process"""
+
+    global workerResolver
+    workerResolver = ofdoc.resolver.openResolver( indexPath )
+
+def scanFileInWorker( filePath ):
+
+    """Scan a file with the Resolver of the worker. Return ( file path, references, error )."""
+
+    try:
+        return ( filePath, scanFile( filePath, workerResolver ), None )
+    except EnvironmentError as e:
+        return ( filePath, [], str( e ) )
+
+
+###################################################################################################
+
+def scanProject( rootPath, indexPath, baseURL = '', jobs = None ):
+
+    """Scan all the C++ files of a project directory.
+    Yield ( file path, references, error ) for each file, in the order of findSources(). references is
+    the list of the ( line number, identifier, URLs ) of the file. error is None, or the message of
+    the error which prevented the file to be read.
+    With jobs = 1 the files are scanned in the current process."""
+
+    global workerResolver
+    resolver = ofdoc.resolver.openResolver( indexPath, baseURL )
+    urls = resolver.urls
+
+    if jobs == 1:
+        workerResolver = resolver
+        results = ( scanFileInWorker( filePath ) for filePath in findSources( rootPath ) )
+        pool = None
+    else:
+        pool = multiprocessing.Pool( jobs, initWorker, ( indexPath, ) )
+        results = pool.imap( scanFileInWorker, findSources( rootPath ), CHUNK_SIZE )
+    try:
+        for ( filePath, references, error ) in results:
+            yield ( filePath, [ ( lineNumber, identifier, urls[ identifier ] ) for ( lineNumber, identifier ) in references ], error )
+        if pool is not None:
+            pool.close()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
@@ -0,0 +1,292 @@
+# coding=utf-8
+
+"""Full-text search in the descriptions of the OF documentation.
+
+generate-index.py cuts each documentation file in documents: a class (its title and descriptions),
+each of its methods, and each global function (the signature and the description). The text of
+the documents is read in the markdown sources, which is the text of the pages without the code
+examples. It is cut in terms, and the terms are stored with their postings in search.bin, in the
+index directory. open-documentation.py --search draw rounded rectangle then reads only the postings
+of the terms of the query, and ranks the documents with BM25.
+
+Terms
+=====
+
+The words are lowercased, and the identifiers are also cut at the case changes: ofDrawRectRounded
+gives ofdrawrectrounded, draw, rect and rounded. The common English words are dropped, and the
+plural and verb endings are removed (rounded and rounding give round). The words of the title of a
+document (the class, method or function name) count TITLE_WEIGHT times.
+
+File format
+===========
+
+All the integers are little endian.
+
+Header
+    magic ('OFDT'), format version, number of documents, number of terms, total length of the
+    documents (in terms), offset of the documents table, offset of the terms table, offset of the
+    strings.
+Documents table
+    One record per document: ( title offset, path offset, anchor offset, title length, path length,
+    anchor length, length in terms ).
+Terms table
+    One record per term, sorted by term: ( term offset, term length, postings offset, number of
+    documents ).
+Postings
+    For each term, the ( document number, term count ) of the documents having the term, by
+    document number.
+Strings
+    The terms, titles, paths and anchors, each stored only once.
+
+"""
+
+import os
+import re
+import math
+import mmap
+import heapq
+import struct
+
+from ofdoc.indexfile import StringTable, IndexFormatError, relativeURL, replaceFileIfChanged
+
+# Name of the search index file, in the index directory
+SEARCH_INDEX_FILE_NAME = 'search.bin'
+
+MAGIC = b'OFDT'
+VERSION = 1
+
+HEADER = struct.Struct( '<4sIIIIIII' )
+DOCUMENT = struct.Struct( '<IIIHHHI' )
+TERM = struct.Struct( '<IIII' )
+POSTING = struct.Struct( '<II' )
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Weight of the words of the title of a document
+TITLE_WEIGHT = 3
+
+STOP_WORDS = frozenset( [
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'for', 'from', 'has', 'have', 'if', 'in',
+    'into', 'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'which', 'will',
+    'with', 'you', 'your' ] )
+
+wordRegex = re.compile( r'[A-Za-z0-9]+' )
+wordPartRegex = re.compile( r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+' )
+
+# Keys are the words already seen, values are their terms
+wordTerms = dict()
+
+
+###################################################################################################
+
+def stem( word ):
+
+    """Remove the plural and verb endings of a lowercase word"""
+
+    if len( word ) <= 4:
+        return word
+    if word.endswith( 'ies' ):
+        return word[ : -3 ] + 'y'
+    if word.endswith( ( 'sses', 'shes', 'ches', 'xes' ) ):
+        return word[ : -2 ]
+    if word.endswith( 's' ) and not word.endswith( ( 'ss', 'us', 'is' ) ):
+        return word[ : -1 ]
+    if word.endswith( 'ing' ) and len( word ) >= 6:
+        return word[ : -3 ]
+    if word.endswith( 'ed' ) and len( word ) >= 5:
+        return word[ : -2 ]
+    return word
+
+
+###################################################################################################
+
+def tokenize( text ):
+
+    """Return the list of the terms of a text"""
+
+    if isinstance( text, unicode ):
+        text = text.encode( 'utf-8' )
+    terms = []
+    for word in wordRegex.findall( text ):
+        wordTermList = wordTerms.get( word )
+        if wordTermList is None:
+            parts = wordPartRegex.findall( word )
+            wordTermList = [ word.lower() ] if len( parts ) > 1 else []
+            for part in parts:
+                part = part.lower()
+                if part not in STOP_WORDS:
+                    wordTermList.append( stem( part ) )
+            wordTerms[ word ] = wordTermList
+        terms += wordTermList
+    return terms
+
+
+###################################################################################################
+
+def documentTerms( title, text ):
+
+    """Return ( length, termCounts ) for a document: its length in terms, and the number of times
+    each term appears, as a string of space separated terms and counts ('draw 4 rect 1 ...'), sorted
+    by term. This string is stored as is in the manifest."""
+
+    counts = dict()
+    titleTerms = tokenize( title )
+    for term in titleTerms:
+        counts[ term ] = counts.get( term, 0 ) + TITLE_WEIGHT
+    terms = tokenize( text )
+    for term in terms:
+        counts[ term ] = counts.get( term, 0 ) + 1
+    termCounts = ' '.join( [ '%s %d' % item for item in sorted( counts.items() ) ] )
+    return ( len( titleTerms ) * TITLE_WEIGHT + len( terms ), termCounts )
+
+
+###################################################################################################
+
+def writeSearchIndex( filePath, documents ):
+
+    """Write the search index. documents is the list of the ( title, path, anchor, length, termCounts )
+    of the documents, as given by ofdoc.extractors.findDocuments(). The file is replaced at once."""
+
+    strings = StringTable()
+    postings = dict()
+    documentRecords = []
+    totalLength = 0
+    for ( documentNumber, ( title, path, anchor, length, termCounts ) ) in enumerate( documents ):
+        documentRecords.append( ( strings.add( title ), strings.add( path ), strings.add( anchor ), length ) )
+        totalLength += length
+        items = termCounts.split()
+        for i in range( 0, len( items ), 2 ):
+            postings.setdefault( items[i], [] ).append( ( documentNumber, int( items[ i + 1 ] ) ) )
+
+    terms = sorted( postings )
+    termStrings = [ strings.add( term ) for term in terms ]
+    documentsOffset = HEADER.size
+    termsOffset = documentsOffset + DOCUMENT.size * len( documentRecords )
+    postingsOffset = termsOffset + TERM.size * len( terms )
+    stringsOffset = postingsOffset + POSTING.size * sum( [ len( p ) for p in postings.values() ] )
+
+    records = []
+    for ( ( title, titleLength ), ( path, pathLength ), ( anchor, anchorLength ), length ) in documentRecords:
+        records.append( DOCUMENT.pack( stringsOffset + title, stringsOffset + path, stringsOffset + anchor,
+                                       titleLength, pathLength, anchorLength, length ) )
+    postingRecords = []
+    offset = postingsOffset
+    for ( term, ( termOffset, termLength ) ) in zip( terms, termStrings ):
+        termPostings = postings[ term ]
+        records.append( TERM.pack( stringsOffset + termOffset, termLength, offset, len( termPostings ) ) )
+        for ( documentNumber, count ) in termPostings:
+            postingRecords.append( POSTING.pack( documentNumber, count ) )
+        offset += POSTING.size * len( termPostings )
+
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'wb' ) as f:
+        f.write( HEADER.pack( MAGIC, VERSION, len( documentRecords ), len( terms ), totalLength,
+                              documentsOffset, termsOffset, stringsOffset ) )
+        f.write( b''.join( records ) )
+        f.write( b''.join( postingRecords ) )
+        f.write( strings.data() )
+    replaceFileIfChanged( temporaryPath, filePath )
+
+
+###################################################################################################
+
+class SearchIndex( object ):
+
+    """Search index read from search.bin, mapped in memory"""
+
+    def __init__( self, filePath ):
+        self.file = open( filePath, 'rb' )
+        try:
+            self.data = mmap.mmap( self.file.fileno(), 0, access = mmap.ACCESS_READ )
+            header = HEADER.unpack_from( self.data, 0 )
+        except ( ValueError, EnvironmentError, struct.error ):
+            self.file.close()
+            raise IndexFormatError( 'Unreadable search index ' + filePath )
+        ( magic, version, self.documentCount, self.termCount, totalLength,
+          self.documentsOffset, self.termsOffset, self.stringsOffset ) = header
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise IndexFormatError( 'Unsupported search index ' + filePath )
+        self.averageLength = float( totalLength ) / self.documentCount if self.documentCount else 1.0
+
+    def close( self ):
+        self.data.close()
+        self.file.close()
+
+    def findTerm( self, term ):
+
+        """Binary search of a term. Return ( postings offset, number of documents ), or None."""
+
+        data = self.data
+        lo = 0
+        hi = self.termCount
+        while lo < hi:
+            mid = ( lo + hi ) // 2
+            ( termOffset, termLength, postingsOffset, count ) = TERM.unpack_from( data, self.termsOffset + mid * TERM.size )
+            key = data[ termOffset : termOffset + termLength ]
+            if key < term:
+                lo = mid + 1
+            elif key > term:
+                hi = mid
+            else:
+                return ( postingsOffset, count )
+        return None
+
+    def document( self, documentNumber ):
+
+        """Return the document as a ( title, path, anchor, length ) tuple"""
+
+        data = self.data
+        ( titleOffset, pathOffset, anchorOffset, titleLength, pathLength, anchorLength, length ) = \
+            DOCUMENT.unpack_from( data, self.documentsOffset + documentNumber * DOCUMENT.size )
+        return ( data[ titleOffset : titleOffset + titleLength ],
+                 data[ pathOffset : pathOffset + pathLength ],
+                 data[ anchorOffset : anchorOffset + anchorLength ],
+                 length )
+
+    def search( self, query, limit = 20 ):
+
+        """Return the list of the ( score, title, relativeURL ) of the documents matching the query,
+        the best first"""
+
+        data = self.data
+        scores = dict()
+        lengths = dict()
+        for term in set( tokenize( query ) ):
+            found = self.findTerm( term )
+            if found is None:
+                continue
+            ( postingsOffset, count ) = found
+            idf = math.log( 1.0 + ( self.documentCount - count + 0.5 ) / ( count + 0.5 ) )
+            postings = struct.unpack_from( '<%dI' % ( 2 * count ), data, postingsOffset )
+            for i in range( 0, 2 * count, 2 ):
+                documentNumber = postings[i]
+                termCount = postings[ i + 1 ]
+                length = lengths.get( documentNumber )
+                if length is None:
+                    length = lengths[ documentNumber ] = DOCUMENT.unpack_from( data, self.documentsOffset + documentNumber * DOCUMENT.size )[6]
+                norm = K1 * ( 1.0 - B + B * length / self.averageLength )
+                scores[ documentNumber ] = scores.get( documentNumber, 0.0 ) + idf * termCount * ( K1 + 1.0 ) / ( termCount + norm )
+        results = []
+        for ( score, documentNumber ) in heapq.nlargest( limit, [ ( s, -d ) for ( d, s ) in scores.items() ] ):
+            ( title, path, anchor, _ ) = self.document( -documentNumber )
+            results.append( ( score, title, relativeURL( path, anchor ) ) )
+        return results
+
+
+###################################################################################################
+
+def openSearchIndex( indexPath ):
+
+    """Open the search index of the index directory, or return None if there is none"""
+
+    filePath = os.path.join( indexPath, SEARCH_INDEX_FILE_NAME )
+    if not os.path.isfile( filePath ):
+        return None
+    try:
+        return SearchIndex( filePath )
+    except IndexFormatError as e:
+        print 'Warning: ' + str( e )
+        return None
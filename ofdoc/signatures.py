@@ -0,0 +1,426 @@
+# coding=utf-8
+
+"""Overloads of the OF functions and methods, to open the documentation of a call.
+
+The keywords index only knows the names: all the overloads of ofDrawCircle are found at the same
+place. generate-index.py also keeps the signatures found in the TOC of each documentation file,
+and writes them in signatures.bin, in the index directory. open-documentation.py can then be given
+a call or a declaration, like ofDrawCircle(x, y, r) or ofDrawCircle(glm::vec2, float), and opens
+the overload it matches: the classes having a matching method for a method call, and the page of
+the function scrolled to the signature for a global function.
+
+Signatures
+==========
+
+A signature is cut in its return type and its parameters types, the names and the default values
+of the parameters being dropped. The types are normalized: const, & and std:: are removed, so
+"const std::string &name" gives string. Each distinct type is stored once, with a number, and the
+parameters of an overload are stored as the list of the numbers of their types: the parameter-type
+key of the overload. A lookup converts the arguments of the call to type numbers once, then compares
+them to the keys of the overloads of the name, without reading any signature text.
+
+The number of arguments must be between the number of parameters without a default value and the
+number of parameters. An argument which is a type of the documentation (glm::vec2), a declaration
+(float x) or a constructor call (ofColor(255)) must match the type of the parameter, a numeric
+literal must be given to a numeric parameter and a string literal to a string parameter. Any other
+argument (x, width / 2, a type unknown to the documentation) matches any type.
+
+File format
+===========
+
+All the integers are little endian.
+
+Header
+    magic ('OFDG'), format version, number of names, number of overloads, number of types, offset
+    of the names table, offset of the overloads table, offset of the types table, offset of the
+    parameters table, offset of the strings.
+Names table
+    One record per function or method name, sorted by name: ( name offset, name length, first
+    overload, number of overloads ).
+Overloads table
+    The overloads of each name, the global functions first then by class: ( class offset, path
+    offset, signature offset, return type, first parameter, class length, path length, signature
+    length, number of parameters, number of parameters without default value, variadic ). The
+    class is empty for a global function.
+Types table
+    One record per type, sorted by type: ( type offset, type length, flags ).
+Parameters table
+    The types numbers of the parameters of the overloads, 4 bytes each.
+Strings
+    The names, classes, paths, signatures and types, each stored only once.
+
+"""
+
+import os.path
+import re
+import mmap
+import struct
+import urllib
+
+from ofdoc.indexfile import StringTable, IndexFormatError, relativeURL, replaceFileIfChanged
+
+# Name of the signatures file, in the index directory
+SIGNATURES_FILE_NAME = 'signatures.bin'
+
+MAGIC = b'OFDG'
+VERSION = 1
+
+HEADER = struct.Struct( '<4sIIIIIIIII' )
+NAME = struct.Struct( '<IIII' )
+OVERLOAD = struct.Struct( '<IIIIIHHHHHBx' )
+TYPE = struct.Struct( '<IHBx' )
+PARAMETER = struct.Struct( '<I' )
+
+# Flags of the types
+NUMERIC = 1
+TEXT = 2
+
+NUMERIC_TYPES = frozenset( [
+    'bool', 'char', 'unsigned char', 'short', 'unsigned short', 'int', 'unsigned int', 'unsigned',
+    'long', 'unsigned long', 'long long', 'unsigned long long', 'float', 'double', 'size_t',
+    'int8_t', 'uint8_t', 'int16_t', 'uint16_t', 'int32_t', 'uint32_t', 'int64_t', 'uint64_t',
+    'GLint', 'GLuint', 'GLenum', 'GLfloat', 'GLsizei', 'ofIndexType' ] )
+TEXT_TYPES = frozenset( [ 'string', 'char*' ] )
+
+# Words that can't be the name of a parameter
+TYPE_WORDS = frozenset( [ 'bool', 'char', 'short', 'int', 'long', 'float', 'double', 'unsigned', 'signed' ] )
+
+signatureRegex = re.compile( r'^(.*?)\s(\w+)\((.*)\)$', re.DOTALL )
+callRegex = re.compile( r'^\s*(?:[^(]*?(?:\.|->|::|\s))?(\w+)\s*\((.*)\)\s*(?:const)?\s*;?\s*$', re.DOTALL )
+declarationRegex = re.compile( r'^(.*?[\s&*])(\w+)\s*(\[[^\]]*\])?$' )
+constructorRegex = re.compile( r'^([\w:]+(?:<.*>)?)\s*[({]' )
+qualifierRegex = re.compile( r'\b(const|volatile|struct|class|typename|enum)\b' )
+separatorRegex = re.compile( r'\s*([*<>,:])\s*' )
+numberRegex = re.compile( r'^[-+]?(0[xX][0-9a-fA-F]+|(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?)[fFuUlL]*$' )
+
+
+###################################################################################################
+
+def normalizeType( text ):
+
+    """Return the normalized form of a type: without const, & and std::, with single spaces"""
+
+    text = qualifierRegex.sub( ' ', text ).replace( '&', ' ' ).replace( 'std::', '' )
+    return separatorRegex.sub( r'\1', ' '.join( text.split() ) )
+
+
+###################################################################################################
+
+def splitList( text ):
+
+    """Split a list of parameters or arguments at the commas which are not nested in brackets"""
+
+    items = []
+    depth = 0
+    start = 0
+    for ( i, c ) in enumerate( text ):
+        if c in '(<[{':
+            depth += 1
+        elif c in ')>]}':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            items.append( text[ start : i ].strip() )
+            start = i + 1
+    items.append( text[ start : ].strip() )
+    if items == [ '' ]:
+        return []
+    return items
+
+
+###################################################################################################
+
+def parseParameter( text ):
+
+    """Return ( type, hasDefault ) for a parameter declaration: "const ofPoint &p = ofPoint()"
+    gives ( 'ofPoint', True ). The type is None for a variadic parameter."""
+
+    if isinstance( text, unicode ):
+        text = text.encode( 'utf-8' )
+    parts = text.split( '=', 1 )
+    declaration = parts[0].strip()
+    # Pandoc smart extension changes ... to an ellipsis
+    if declaration in ( '...', '\xe2\x80\xa6' ):
+        return ( None, False )
+    m = declarationRegex.match( declaration )
+    if m and m.group(2) not in TYPE_WORDS and normalizeType( m.group(1) ):
+        typeName = normalizeType( m.group(1) + ( '*' if m.group(3) else '' ) )
+    else:
+        typeName = normalizeType( declaration )
+    return ( typeName, len( parts ) > 1 )
+
+
+###################################################################################################
+
+def parseSignature( signature ):
+
+    """Return ( name, returnType, parameters ) for a signature like the ones of the documentation TOC,
+    parameters being the list of the ( type, hasDefault ) of the parameters, or None if the text is
+    not a signature"""
+
+    m = signatureRegex.match( signature.strip() )
+    if m is None:
+        return None
+    parameters = [ parseParameter( p ) for p in splitList( m.group(3) ) ]
+    if parameters == [ ( 'void', False ) ]:
+        parameters = []
+    return ( m.group(2), normalizeType( m.group(1) ), parameters )
+
+
+###################################################################################################
+
+def parseCall( text ):
+
+    """Return ( name, arguments ) for a call or a declaration like "ofDrawCircle(x, y, r)" or
+    "image.draw(0, 0)", arguments being the list of the arguments texts, or None if the text is not
+    a call"""
+
+    m = callRegex.match( text )
+    if m is None:
+        return None
+    arguments = splitList( m.group(2) )
+    if arguments == [ 'void' ]:
+        arguments = []
+    return ( m.group(1), arguments )
+
+
+###################################################################################################
+
+def typeFlags( typeName ):
+
+    """Return the flags of a normalized type"""
+
+    flags = 0
+    if typeName in NUMERIC_TYPES:
+        flags |= NUMERIC
+    if typeName in TEXT_TYPES:
+        flags |= TEXT
+    return flags
+
+
+###################################################################################################
+
+def overloadURL( path, name, signature ):
+
+    """Build the URL of an overload, relative to the documentation home page: the anchor of the name,
+    and a text fragment that makes the browsers which support it scroll to the signature"""
+
+    if isinstance( signature, unicode ):
+        signature = signature.encode( 'utf-8' )
+    return relativeURL( path, 'show_' + name ) + ':~:text=' + urllib.quote( signature, '' ).replace( '-', '%2D' )
+
+
+###################################################################################################
+
+def writeSignatureIndex( filePath, signatures ):
+
+    """Write the signatures file. signatures is the list of the ( name, className, path, signature )
+    of the functions and methods, className being empty for a global function."""
+
+    strings = StringTable()
+    # Keys are the names, values are the lists of the ( className, path, signature, returnType, parameters )
+    overloads = dict()
+    seen = set()
+    for ( name, className, path, signature ) in signatures:
+        if ( name, className, path, signature ) in seen:
+            continue
+        seen.add( ( name, className, path, signature ) )
+        parsed = parseSignature( signature )
+        if parsed is None:
+            continue
+        ( _, returnType, parameters ) = parsed
+        overloads.setdefault( name, [] ).append( ( className, path, signature, returnType, parameters ) )
+
+    typeNames = set()
+    for nameOverloads in overloads.values():
+        for ( className, path, signature, returnType, parameters ) in nameOverloads:
+            typeNames.add( returnType )
+            typeNames.update( [ typeName for ( typeName, hasDefault ) in parameters if typeName is not None ] )
+    typeNames = sorted( typeNames )
+    typeNumbers = dict( [ ( typeName, number ) for ( number, typeName ) in enumerate( typeNames ) ] )
+
+    names = sorted( overloads )
+    nameRecords = []
+    overloadRecords = []
+    parameterRecords = []
+    for name in names:
+        # The global functions first, then the methods by class, in the order they were found
+        nameOverloads = sorted( overloads[ name ], key = lambda o: o[0] )
+        nameRecords.append( ( strings.add( name ), len( overloadRecords ), len( nameOverloads ) ) )
+        for ( className, path, signature, returnType, parameters ) in nameOverloads:
+            variadic = any( [ typeName is None for ( typeName, hasDefault ) in parameters ] )
+            types = [ typeName for ( typeName, hasDefault ) in parameters if typeName is not None ]
+            required = len( [ p for p in parameters if p[0] is not None and not p[1] ] )
+            overloadRecords.append( ( strings.add( className ), strings.add( path ), strings.add( signature ),
+                                      typeNumbers[ returnType ], len( parameterRecords ), len( types ), required, variadic ) )
+            parameterRecords += [ typeNumbers[ typeName ] for typeName in types ]
+    typeRecords = [ ( strings.add( typeName ), typeFlags( typeName ) ) for typeName in typeNames ]
+
+    namesOffset = HEADER.size
+    overloadsOffset = namesOffset + NAME.size * len( nameRecords )
+    typesOffset = overloadsOffset + OVERLOAD.size * len( overloadRecords )
+    parametersOffset = typesOffset + TYPE.size * len( typeRecords )
+    stringsOffset = parametersOffset + PARAMETER.size * len( parameterRecords )
+
+    records = []
+    for ( ( nameOffset, nameLength ), first, count ) in nameRecords:
+        records.append( NAME.pack( stringsOffset + nameOffset, nameLength, first, count ) )
+    for ( ( classOffset, classLength ), ( pathOffset, pathLength ), ( signatureOffset, signatureLength ),
+          returnType, firstParameter, parameterCount, required, variadic ) in overloadRecords:
+        records.append( OVERLOAD.pack( stringsOffset + classOffset, stringsOffset + pathOffset, stringsOffset + signatureOffset,
+                                       returnType, firstParameter, classLength, pathLength, signatureLength,
+                                       parameterCount, required, variadic ) )
+    for ( ( typeOffset, typeLength ), flags ) in typeRecords:
+        records.append( TYPE.pack( stringsOffset + typeOffset, typeLength, flags ) )
+    records += [ PARAMETER.pack( number ) for number in parameterRecords ]
+
+    temporaryPath = filePath + '.tmp'
+    with open( temporaryPath, 'wb' ) as f:
+        f.write( HEADER.pack( MAGIC, VERSION, len( nameRecords ), len( overloadRecords ), len( typeRecords ),
+                              namesOffset, overloadsOffset, typesOffset, parametersOffset, stringsOffset ) )
+        f.write( b''.join( records ) )
+        f.write( strings.data() )
+    replaceFileIfChanged( temporaryPath, filePath )
+
+
+###################################################################################################
+
+class SignatureIndex( object ):
+
+    """Overloads read from signatures.bin, mapped in memory"""
+
+    def __init__( self, filePath ):
+        self.file = open( filePath, 'rb' )
+        try:
+            self.data = mmap.mmap( self.file.fileno(), 0, access = mmap.ACCESS_READ )
+            header = HEADER.unpack_from( self.data, 0 )
+        except ( ValueError, EnvironmentError, struct.error ):
+            self.file.close()
+            raise IndexFormatError( 'Unreadable signatures file ' + filePath )
+        ( magic, version, self.nameCount, self.overloadCount, self.typeCount, self.namesOffset,
+          self.overloadsOffset, self.typesOffset, self.parametersOffset, self.stringsOffset ) = header
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise IndexFormatError( 'Unsupported signatures file ' + filePath )
+
+    def close( self ):
+        self.data.close()
+        self.file.close()
+
+    def string( self, offset, length ):
+        return self.data[ offset : offset + length ]
+
+    def findName( self, name ):
+
+        """Binary search of a function or method name. Return ( first overload, number of overloads ),
+        or None."""
+
+        data = self.data
+        lo = 0
+        hi = self.nameCount
+        while lo < hi:
+            mid = ( lo + hi ) // 2
+            ( nameOffset, nameLength, first, count ) = NAME.unpack_from( data, self.namesOffset + mid * NAME.size )
+            key = data[ nameOffset : nameOffset + nameLength ]
+            if key < name:
+                lo = mid + 1
+            elif key > name:
+                hi = mid
+            else:
+                return ( first, count )
+        return None
+
+    def findType( self, typeName ):
+
+        """Binary search of a normalized type. Return ( type number, flags ), or None."""
+
+        data = self.data
+        lo = 0
+        hi = self.typeCount
+        while lo < hi:
+            mid = ( lo + hi ) // 2
+            ( typeOffset, typeLength, flags ) = TYPE.unpack_from( data, self.typesOffset + mid * TYPE.size )
+            key = data[ typeOffset : typeOffset + typeLength ]
+            if key < typeName:
+                lo = mid + 1
+            elif key > typeName:
+                hi = mid
+            else:
+                return ( mid, flags )
+        return None
+
+    def argumentKey( self, argument ):
+
+        """Return ( type number, flags ) for an argument of a call: the type number is None if the
+        argument doesn't give a type of the documentation, the flags are the ones of its type, or of
+        the literal it is, or 0 if it can be anything"""
+
+        if numberRegex.match( argument ) or argument in ( 'true', 'false' ) or argument.startswith( "'" ):
+            return ( None, NUMERIC )
+        if argument.startswith( '"' ):
+            return ( None, TEXT )
+        m = constructorRegex.match( argument )
+        typeName = normalizeType( m.group(1) ) if m else parseParameter( argument )[0]
+        found = self.findType( typeName ) if typeName else None
+        if found is None:
+            return ( None, 0 )
+        return found
+
+    def match( self, name, arguments ):
+
+        """Return the overloads of the name matching the arguments of a call, the best first, as
+        ( score, className, path, signature ) tuples. An argument whose type is known counts more than
+        a literal, and an overload without omitted default parameters counts more."""
+
+        if isinstance( name, unicode ):
+            name = name.encode( 'utf-8' )
+        found = self.findName( name )
+        if found is None:
+            return []
+        ( first, count ) = found
+        keys = [ self.argumentKey( argument ) for argument in arguments ]
+        argumentCount = len( keys )
+        data = self.data
+        matches = []
+        for overloadNumber in range( first, first + count ):
+            ( classOffset, pathOffset, signatureOffset, returnType, firstParameter, classLength, pathLength,
+              signatureLength, parameterCount, required, variadic ) = \
+                OVERLOAD.unpack_from( data, self.overloadsOffset + overloadNumber * OVERLOAD.size )
+            if argumentCount < required or ( argumentCount > parameterCount and not variadic ):
+                continue
+            parameterTypes = struct.unpack_from( '<%dI' % parameterCount, data, self.parametersOffset + firstParameter * PARAMETER.size )
+            score = 1 if argumentCount == parameterCount else 0
+            for ( ( typeNumber, flags ), parameterType ) in zip( keys, parameterTypes ):
+                if typeNumber == parameterType:
+                    score += 2
+                    continue
+                if not flags:
+                    # Any argument, or a type which is neither numeric nor a string
+                    if typeNumber is None:
+                        continue
+                    break
+                # A literal, or a numeric type given to another numeric type
+                parameterFlags = TYPE.unpack_from( data, self.typesOffset + parameterType * TYPE.size )[2]
+                if not flags & parameterFlags:
+                    break
+                score += 1
+            else:
+                matches.append( ( -score, overloadNumber, self.string( classOffset, classLength ),
+                                  self.string( pathOffset, pathLength ), self.string( signatureOffset, signatureLength ) ) )
+        matches.sort()
+        return [ ( -score, className, path, signature ) for ( score, _, className, path, signature ) in matches ]
+
+
+###################################################################################################
+
+def openSignatureIndex( indexPath ):
+
+    """Open the signatures file of the index directory, or return None if there is none"""
+
+    filePath = os.path.join( indexPath, SIGNATURES_FILE_NAME )
+    if not os.path.isfile( filePath ):
+        return None
+    try:
+        return SignatureIndex( filePath )
+    except IndexFormatError as e:
+        print 'Warning: ' + str( e )
+        return None
@@ -0,0 +1,206 @@
+# coding=utf-8
+
+"""Watch the documentation directory, for generate-index.py --watch.
+
+The changes are reported by inotify, so this only works on Linux. The inotify functions are called
+from the C library with ctypes: there is no module to install.
+
+inotify doesn't watch a whole tree: each directory of the documentation is watched, and the new
+directories are watched as they are created. The events of a burst of changes (an editor writing a
+temporary file then renaming it, a git checkout of many files...) are gathered until nothing
+happens for DEBOUNCE_DELAY seconds, and reported at once as the set of the files that changed, were
+added or were removed. A directory moved or removed, or too many events for the kernel queue, may
+have changed any file: then the changes are reported as None, and all the tree must be checked.
+
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes, ctypes.util
+
+# Quiet time that ends a burst of changes, and longest time a burst is delayed, in seconds
+DEBOUNCE_DELAY = 0.5
+MAX_DELAY = 5.0
+
+# Events and flags, see /usr/include/sys/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = ( IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+               IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR )
+
+# ( watch descriptor, mask, cookie, name length ), followed by the name
+EVENT = struct.Struct( 'iIII' )
+
+libc = None
+
+
+###################################################################################################
+
+def loadLibrary():
+
+    """Return the C library, or None if it has no inotify functions"""
+
+    global libc
+    if libc is None and sys.platform.startswith( 'linux' ):
+        try:
+            library = ctypes.CDLL( ctypes.util.find_library( 'c' ) or 'libc.so.6', use_errno = True )
+            library.inotify_init1
+            library.inotify_add_watch.argtypes = [ ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32 ]
+            libc = library
+        except ( OSError, AttributeError ):
+            pass
+    return libc
+
+
+###################################################################################################
+
+def isAvailable():
+
+    """inotify is only available on Linux"""
+
+    return loadLibrary() is not None
+
+
+###################################################################################################
+
+class Watcher( object ):
+
+    """Watch the files of a directory tree having an extension"""
+
+    def __init__( self, rootPath, extension = '.markdown' ):
+        self.rootPath = rootPath
+        self.extension = extension
+        self.fd = loadLibrary().inotify_init1( IN_CLOEXEC )
+        if self.fd < 0:
+            e = ctypes.get_errno()
+            raise OSError( e, 'inotify_init1: ' + os.strerror( e ) )
+        # Keys are the watch descriptors, values are the paths of the watched directories
+        self.directories = dict()
+        # The paths of the files changed since the last report, None if any file may have changed
+        self.changes = set()
+        self.addTree( rootPath )
+
+    def close( self ):
+        os.close( self.fd )
+
+    def addDirectory( self, dirPath ):
+
+        """Watch a directory. Return False if it doesn't exist anymore."""
+
+        if isinstance( dirPath, unicode ):
+            dirPath = dirPath.encode( sys.getfilesystemencoding() )
+        wd = libc.inotify_add_watch( self.fd, dirPath, WATCH_MASK )
+        if wd < 0:
+            e = ctypes.get_errno()
+            if e in ( errno.ENOENT, errno.ENOTDIR ):
+                return False
+            if e == errno.ENOSPC:
+                raise OSError( e, 'Too many directories to watch, see /proc/sys/fs/inotify/max_user_watches' )
+            raise OSError( e, 'inotify_add_watch: ' + os.strerror( e ), dirPath )
+        self.directories[ wd ] = dirPath
+        return True
+
+    def addTree( self, dirPath ):
+
+        """Watch a directory and its sub-directories. Return the paths of the files found."""
+
+        filePaths = []
+        for ( path, dirNames, fileNames ) in os.walk( dirPath ):
+            if not self.addDirectory( path ):
+                continue
+            filePaths += [ os.path.join( path, name ) for name in fileNames if name.endswith( self.extension ) ]
+        return filePaths
+
+    def resync( self ):
+
+        """Watch the directories of the tree again, after directories were moved: the moved
+        directories are watched with their new path, the ones moved out of the tree are not watched
+        anymore"""
+
+        previousDirectories = self.directories
+        self.directories = dict()
+        self.addTree( self.rootPath )
+        for wd in previousDirectories:
+            if wd not in self.directories:
+                libc.inotify_rm_watch( self.fd, wd )
+
+    def readEvents( self ):
+
+        """Read the pending events, and add the files they concern to the changes"""
+
+        data = os.read( self.fd, 65536 )
+        offset = 0
+        while offset < len( data ):
+            ( wd, mask, cookie, length ) = EVENT.unpack_from( data, offset )
+            name = data[ offset + EVENT.size : offset + EVENT.size + length ].rstrip( b'\0' )
+            offset += EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost
+                self.changes = None
+                continue
+            if mask & IN_IGNORED:
+                self.directories.pop( wd, None )
+                continue
+            dirPath = self.directories.get( wd )
+            if dirPath is None:
+                continue
+            if mask & ( IN_DELETE_SELF | IN_MOVE_SELF ):
+                # The files of this directory are gone, or elsewhere
+                self.changes = None
+                continue
+            path = os.path.join( dirPath, name )
+            if mask & IN_ISDIR:
+                if mask & ( IN_CREATE | IN_MOVED_TO ):
+                    filePaths = self.addTree( path )
+                    if self.changes is not None:
+                        self.changes.update( filePaths )
+                elif mask & IN_MOVED_FROM:
+                    self.changes = None
+            elif name.endswith( self.extension ) and self.changes is not None:
+                self.changes.add( path )
+
+    def wait( self ):
+
+        """Wait for changes. Return the set of the paths of the files changed, added or removed, or
+        None if any file may have changed."""
+
+        start = None
+        while True:
+            if start is None:
+                timeout = None
+            else:
+                timeout = min( DEBOUNCE_DELAY, start + MAX_DELAY - time.time() )
+                if timeout <= 0:
+                    break
+            try:
+                ( readable, _, _ ) = select.select( [ self.fd ], [], [], timeout )
+            except select.error as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+            if not readable:
+                break
+            self.readEvents()
+            if start is None and self.changes != set():
+                start = time.time()
+        changes = self.changes
+        self.changes = set()
+        if changes is None:
+            self.resync()
+        return changes
@@ -11,8 +11,16 @@ open-documentation.py keyword
 
 The program search the keyword in the index. The keyword can be either an OF class name,
 an OF global function name, or a method of an OF class.
+It can also be a call or a declaration, like ofDrawCircle(x, y, r) or draw(glm::vec2, float): only
+the overloads matching the arguments are proposed, and the page is scrolled to the signature by the
+browsers that support text fragments.
 If the keyword is found in the index, the matching documentation page is displayed in the web browser.
-Otherwise the Of documentation home page is displayed.
+If the keyword is a method of many classes, a window asks for the class. The choices are remembered
+for each project (the current directory, or the --project option): the classes chosen the most are
+proposed first, and a class always chosen for this method is opened without asking (see
+ofdoc/choices.py).
+Otherwise a window proposes the keywords starting with it, then the keywords close to it (to fix a
+typo). If there is none, the Of documentation home page is displayed.
 
 You can modify the URL of the documentation home page, which is by default the online documentation, to point
 to another URL, for example a local copy of the documentation.
@@ -25,6 +33,65 @@ This script use the index generated by generate-index.py to find the right html
 If you haven't downloaded an index with this script, you have to run generate-index.py only once (see
 generate-index.py documentation)
 
+Resident mode
+=============
+
+On Linux and Mac, the script can stay in memory with the index loaded, to answer faster:
+open-documentation.py --daemon
+Then open-documentation.py keyword only forwards the keyword to the resident script and exits
+immediately. If no resident script is running, or if it doesn't answer within a few seconds, the
+keyword is searched as usual. A selection window opened by the resident script doesn't delay the
+other lookups.
+open-documentation.py --stop-daemon stops the resident script.
+open-documentation.py --no-daemon keyword searches the keyword without the resident script.
+The resident script reloads the index when generate-index.py updates it.
+
+Other options
+=============
+
+--no-browser
+    Print the URL of the documentation but don't open it.
+--choose
+    Always ask for the class of a method of many classes, even if a class is usually chosen.
+--project=DIR
+    The project directory the lookup comes from, for the choice of the class of a method. By
+    default, the current directory. Editors can pass the directory of the edited file or of its
+    project.
+--complete
+    Print the keywords starting with the keyword or close to it, the best first, and exit.
+    This is fast enough to be called on every keystroke, especially with the resident script.
+--search
+    Full-text search: print the classes, methods and functions whose description matches the
+    words, the best first, with their URLs, and exit. For example:
+    open-documentation.py --search draw rounded rectangle
+    The search index is made by generate-index.py (search.bin, in the index directory).
+--offline
+    Open the local copy of the documentation made by generate-index.py --offline rather than the
+    online documentation. The pages are extracted from index/offline.pack to the index/offline
+    directory the first time (and again when generate-index.py updates the pack), then opened with
+    file:// URLs, without any network access. Set offlineDocumentation to True at the beginning of
+    this script to make it the default, then --online opens the online documentation.
+    The resident script uses the options it was started with.
+--version=VERSION
+    Use this version of the index store made by generate-index.py --store-version, rather than
+    the last index generated. A single copy of the scripts can then serve several OF versions. Set
+    documentationVersion at the beginning of this script to make it the default. Each version has
+    its own resident script (start it with --daemon --version=VERSION). The propositions for an
+    unknown keyword and the overloads of a call come from the last index generated.
+--batch [file]
+    Resolve many keywords at once: read the keywords from the file (or from the standard input if
+    there is no file or if it is -), one per line, and print for each one a line with the keyword
+    and its URLs, tab separated (no URL if the keyword is not in the index, many URLs for a method
+    of many classes). The index is read only once. Scripts can also import ofdoc.resolver to do
+    the same thing.
+
+Start up time
+=============
+
+The script is started for each lookup, so it only loads the modules needed by the current lookup:
+the GUI modules are only loaded to show the class selection window, and the web browser module only
+to open a page. benchmarks/startup.py measures the start up time and checks which modules are loaded.
+
 Requirement
 ===========
 
@@ -35,103 +102,102 @@ Python 2.7
 # Base URL of the OpenFrameworks documentation
 documentationURL = 'http://www.openframeworks.cc/documentation/'
 
+# Set to True to always use the offline copy of the documentation (see the --offline option)
+offlineDocumentation = False
+
+# Set to an OF version of the index store, like '0.9.3', to always use it (see the --version option)
+documentationVersion = ''
+
 import sys
 import os.path
-import re
-import webbrowser
-import Tkinter
-import tkFont
-import platform
+import ofdoc.daemon
 
 # Path to the script directory
 scriptDirPath = os.path.dirname(os.path.realpath(__file__))
 # Path to the index directory (downloaded with this script, or generated by generate-index.py)
 indexPath = os.path.join( scriptDirPath, 'index' )
 
-# Get the searched keyword
-if len( sys.argv ) < 2 :
-    print 'Error: This script must be call with an item name to search in the documentation as parameter.'
-    sys.exit(1)
-keyword = sys.argv[1]
-
-# Open the index file
-classesAndGlobalFunctionsIndexPath = os.path.join( indexPath, 'classesAndGlobalFunctions.txt' )
-if not os.path.isfile( classesAndGlobalFunctionsIndexPath ):
-    print 'Error: No index found.'
-    sys.exit(1)
-classesIndex = open( classesAndGlobalFunctionsIndexPath, 'r' )
-
-# Search the keyword in the index for classes and global functions
-
-regex1 = re.compile( '(\w+)\s+(.+)' )
-regex2 = re.compile( '(\S+)\s+(.+)' )
-for entry in classesIndex:
-    
-    # Split the index text line to isolate the keyword 
-    m1 = regex1.match( entry )
-    if m1 is None:
-        print 'Error: Malformed index file!!!'
-        continue
-    
-    # Check if the index line is composed with 2 strings (class entry) or 3 strings (function entry)
-    m2 = regex2.match( m1.group(2) )
-    
-    if m2 is None:
-        # If the index entry is about a class, this entry match the keyword in two cases:
-        # 1- idemName is strictly identical to the class name of this entry
-        # 2- idemName, followed by an underscore, is identical to the class name of this entry
-        if keyword == m1.group(1) or keyword + '_' == m1.group(1) :
-            # Open the right URL in the web browser
-            relPath = m1.group(2)
-            url = documentationURL + relPath + '.html'
-            print 'Opening ' + url
-            webbrowser.open( url )
-            sys.exit(0)
-    else:
-        # If the index entry is about a function, this entry match the keyword only
-        # if it is strictly identical to the function name.
-        if keyword == m1.group(1) :
-            # Open the right URL in the web browser
-            relPath = m2.group(1)
-            anchor = m2.group(2)
-            url = documentationURL + relPath + '.html#' + anchor
-            print 'Opening ' + url
-            webbrowser.open( url )
+# Read the command line
+options = [ a for a in sys.argv[1:] if a.startswith( '--' ) ]
+keywords = [ a for a in sys.argv[1:] if not a.startswith( '--' ) ]
+# The project directory the lookup comes from, for the choices of the class selection window
+projectPath = os.getcwd()
+for option in options:
+    if option.startswith( '--version=' ):
+        documentationVersion = option[ len( '--version=' ): ]
+    elif option.startswith( '--project=' ):
+        projectPath = option[ len( '--project=' ): ]
+projectPath = os.path.realpath( projectPath )
+daemonSocketPath = ofdoc.daemon.socketPath( indexPath, documentationVersion )
+
+if '--stop-daemon' in options:
+    reply = ofdoc.daemon.send( daemonSocketPath, 'stop' )
+    print reply.strip() if reply else 'No daemon running'
+    sys.exit(0)
+
+if '--daemon' not in options and '--batch' not in options:
+    
+    # Get the searched keyword
+    if not keywords :
+        print 'Error: This script must be call with an item name to search in the documentation as parameter.'
+        sys.exit(1)
+    keyword = keywords[0]
+    # The full-text search uses all the words, and a call may have been split in several arguments
+    if '--search' in options or '(' in ''.join( keywords ):
+        keyword = ' '.join( keywords )
+    
+    # Let the resident script do the job, if it is running
+    if '--no-daemon' not in options:
+        if '--complete' in options:
+            command = 'complete'
+        elif '--search' in options:
+            command = 'search'
+        elif '--choose' in options:
+            command = 'choose'
+        else:
+            command = 'lookup'
+        reply = ofdoc.daemon.send( daemonSocketPath, command, keyword, projectPath )
+        if reply is not None:
+            sys.stdout.write( reply )
             sys.exit(0)
-            
-            
-# If the keyword is not a class or a global function name, it may be a method name for a class.
-# Does an index file exists for this keyword ?
-indexPath = os.path.join( indexPath, keyword + '.txt' )
-if os.path.isfile( indexPath ):
-    
-    index = open( indexPath, 'r' )
-    
-    # Create a list of tuples ( className, relURL ) from the index
-    entries = []
-    regex = re.compile( '(\w+)\s+(.+)' )
-    for entry in index:
-        # Split the index text line to get the class name and the URL 
-        m = regex.match( entry )
-        if m is None:
-            print 'Error: Malformed index file!!! File is ' + indexPath 
-            continue
-        className = m.group(1)
-        relURL = m.group(2)
-        entries.append( ( className, relURL ) )
-    entries.sort()
+
+import ofdoc.indexfile
+
+
+###################################################################################################
+
+def openURL( url ):
     
-    # If there is only one entry, open it in the web browser 
-    if len( entries ) == 1:
-        url = documentationURL + entries[0][1]
-        print 'Opening ' + url
-        webbrowser.open( url )
-        sys.exit(0)
+    """Open the URL in the web browser"""
+    
+    if '--no-browser' in options:
+        return
+    import webbrowser
+    webbrowser.open( url )
+
+
+###################################################################################################
+
+def selectionWindow( title, labels, selected ):
+    
+    """Show a window with a list of choices. When <Return> is pressed, the window is closed and
+    selected( index of the chosen label ) is called.
+    Return False if the window can't be shown (no GUI module, no display)."""
     
-    # If there is many classes with a method called like keyword, built a selection window
+    try:
+        import Tkinter
+        import tkFont
+    except ImportError:
+        return False
+    import platform
     
-    window = Tkinter.Tk()
-    window.title(' Select Class for ' + keyword + '()' )
+    try:
+        window = Tkinter.Tk()
+    except Tkinter.TclError:
+        # No display
+        return False
+    
+    window.title( title )
     # Change the window icon, if possible
     icoPath = os.path.join( scriptDirPath, 'of' )
     if platform.system() == 'Windows':
@@ -143,14 +209,14 @@ if os.path.isfile( indexPath ):
     scrollBar = Tkinter.Scrollbar( window )
     scrollBar.pack( side=Tkinter.RIGHT, fill=Tkinter.Y )
     
-    # The list of the classes
-    height = max( 5, len(entries) )
+    # The list of the choices
+    height = max( 5, len(labels) )
     height = min( 30, height )
     font = tkFont.Font(family='Helvetica', size=10)
     listBox = Tkinter.Listbox(window, font=font, width=40, height=height, exportselection=0 )
     listBox.pack( side=Tkinter.RIGHT, fill=Tkinter.Y )
-    for entry in entries:
-        listBox.insert( Tkinter.END, entry[0] )
+    for label in labels:
+        listBox.insert( Tkinter.END, label )
     listBox.activate( 0 )
     listBox.selection_set( 0 )
     listBox.focus_set()
@@ -167,15 +233,10 @@ if os.path.isfile( indexPath ):
     y = (window.winfo_screenheight() // 2) - (height // 2)
     window.geometry('{}x{}+{}+{}'.format(width, height, x, y))
     
-    # Open the class method documentation in the browser when <Return> is pressed
+    # Close the window and call selected() when <Return> is pressed
+    choice = []
     def returnPressed(event):
-        selection = listBox.curselection()
-        if selection:
-            idx = selection[0]
-            relURL = entries[ idx ][1]
-            url = documentationURL + relURL
-            print 'Opening ' + url
-            webbrowser.open( url )
+        choice.extend( listBox.curselection() )
         window.destroy()
     window.bind("<Return>", returnPressed )
     
@@ -184,10 +245,289 @@ if os.path.isfile( indexPath ):
         window.destroy()
     window.bind("<Escape>", escapePressed )
     
-    # Ask the user to select the class
+    # Ask the user to choose
     window.mainloop()
-    sys.exit(0)
+    if choice:
+        selected( int( choice[0] ) )
+    return True
+
+
+###################################################################################################
+
+def selectClass( keyword, entries, project ):
+    
+    """Show a selection window to choose the class of the method, and open the documentation of the
+    chosen class method in the web browser. The choice is remembered for the project (see
+    ofdoc/choices.py)."""
+    
+    def selected( idx ):
+        import ofdoc.choices
+        choices = ofdoc.choices.loadChoices( indexPath )
+        choices.use( project, keyword, entries[ idx ][0] )
+        ofdoc.choices.saveChoices( indexPath, choices )
+        relURL = entries[ idx ][1]
+        url = documentationURL + relURL
+        print 'Opening ' + url
+        openURL( url )
+    
+    if not selectionWindow( ' Select Class for ' + keyword + '()', [ entry[0] for entry in entries ], selected ):
+        for ( className, relURL ) in entries:
+            print className + ' ' + documentationURL + relURL
+
+
+###################################################################################################
+
+def selectKeyword( index, keyword, candidates, project ):
+    
+    """Show a selection window with the keywords that look like the keyword, and show the
+    documentation of the chosen one. Without a window (--no-browser, or no display), print the
+    keywords and open the documentation home page."""
+    
+    def selected( idx ):
+        ( message, action ) = findDocumentation( index, candidates[ idx ], project )
+        print message
+        action()
     
+    if '--no-browser' in options or not selectionWindow( ' ' + keyword + ' not found, select a keyword', candidates, selected ):
+        print 'Candidates: ' + ', '.join( candidates )
+        openURL( documentationURL )
+
+
+###################################################################################################
+
+def findDocumentation( index, keyword, project, choose = False ):
+    
+    """Search the keyword in the index. It can be a class, a global function, or a method name for
+    one or many classes, or a call of a function or a method (see resolveCall()).
+    project is the directory the lookup comes from. For a method of many classes, the class usually
+    chosen in this project is opened without asking, unless choose is True (see ofdoc/choices.py).
+    Return ( message, action ): the message to print, and the function that shows the documentation."""
+    
+    # Get a list of tuples ( name, relURL )
+    if '(' in keyword:
+        ( keyword, entries ) = resolveCall( index, keyword )
+    else:
+        entries = index.lookup( keyword )
+    
+    # If the keyword is unknown, propose the keywords that look like it
+    if not entries:
+        candidates = completeKeyword( keyword )
+        if not candidates:
+            return ( 'Item not found in the documentation', lambda: openURL( documentationURL ) )
+        return ( 'Item not found in the documentation. Did you mean ' + ', '.join( candidates[ 0 : 5 ] ) + ' ?',
+                 lambda: selectKeyword( index, keyword, candidates, project ) )
+    
+    # If there is only one entry, open it in the web browser 
+    if len( entries ) == 1:
+        url = documentationURL + entries[0][1]
+        return ( 'Opening ' + url, lambda: openURL( url ) )
+    
+    # If there is many classes with a method called like keyword, open the class usually chosen in
+    # this project, or built a selection window with the classes the most chosen first
+    import ofdoc.choices
+    choices = ofdoc.choices.loadChoices( indexPath )
+    className = None if choose else choices.confidentChoice( project, keyword )
+    for ( entryName, relURL ) in entries:
+        if entryName == className:
+            choices.use( project, keyword )
+            ofdoc.choices.saveChoices( indexPath, choices )
+            url = documentationURL + relURL
+            return ( 'Opening ' + url + ' (usual class, use --choose to select another one)', lambda: openURL( url ) )
+    entries = [ entries[i] for i in choices.rank( project, keyword, [ entry[0] for entry in entries ] ) ]
+    return ( 'Select the class for ' + keyword + '()', lambda: selectClass( keyword, entries, project ) )
+
+
+###################################################################################################
+
+def resolveCall( index, keyword ):
+    
+    """Find the overloads matching a call or a declaration, like ofDrawCircle(x, y, r) or
+    image.draw(glm::vec2, float), with the signatures written by generate-index.py.
+    Return ( name, entries ): the name of the function or the method, and the list of the
+    ( name, relURL ) of the global function or of the classes having a matching overload, the URLs
+    pointing to the overload. If no overload matches, entries are all the entries of the name."""
+    
+    import ofdoc.signatures
+    call = ofdoc.signatures.parseCall( keyword )
+    if call is None:
+        return ( keyword, index.lookup( keyword ) )
+    ( name, arguments ) = call
+    entries = index.lookup( name )
+    signatureIndex = ofdoc.signatures.openSignatureIndex( indexPath ) if entries else None
+    if signatureIndex is None:
+        return ( name, entries )
+    matches = signatureIndex.match( name, arguments )
+    signatureIndex.close()
+    
+    # The best overload of the global function or of each class, among the best scores
+    urls = dict()
+    for ( score, className, path, signature ) in matches:
+        if score == matches[0][0] and className not in urls:
+            urls[ className ] = ofdoc.signatures.overloadURL( path, name, signature )
+    found = []
+    for ( entryName, relURL ) in entries:
+        className = '' if entryName == name else entryName
+        if className in urls:
+            found.append( ( entryName, urls[ className ] ) )
+    return ( name, found or entries )
+
+
+###################################################################################################
+
+def completeKeyword( keyword ):
+    
+    """Return the keywords of the index starting with keyword, then the keywords close to it"""
+    
+    import ofdoc.fuzzy
+    fuzzyIndex = ofdoc.fuzzy.openFuzzyIndex( indexPath )
+    if fuzzyIndex is None:
+        return []
+    candidates = fuzzyIndex.complete( keyword )
+    fuzzyIndex.close()
+    return [ name for ( name, kind ) in candidates ]
+
+
+###################################################################################################
+
+def searchDocumentation( query ):
+    
+    """Return the lines to print for a full-text search: the titles and the URLs of the documents
+    matching the query, the best first"""
+    
+    import ofdoc.search
+    searchIndex = ofdoc.search.openSearchIndex( indexPath )
+    if searchIndex is None:
+        return [ 'Error: No search index found (see generate-index.py).' ]
+    results = searchIndex.search( query )
+    searchIndex.close()
+    if not results:
+        return [ 'Nothing found in the documentation' ]
+    return [ '%-40s %s' % ( title, documentationURL + url ) for ( score, title, url ) in results ]
+
+
+###################################################################################################
+
+def offlineDocumentationURL():
+    
+    """Return the URL of the offline copy of the documentation, extracting its pages if needed"""
+    
+    import ofdoc.offline
+    dirPath = ofdoc.offline.extract( indexPath )
+    if dirPath is None:
+        print 'Warning: No offline documentation found (see generate-index.py --offline), using the online documentation.'
+        return documentationURL
+    return ofdoc.offline.fileURL( dirPath )
+
+
+###################################################################################################
+
+def openIndex():
+    
+    """Open the index (the binary index if it has been generated, otherwise the text index), or
+    the selected version of the index store"""
+    
+    index = ofdoc.indexfile.openIndex( indexPath, documentationVersion )
+    if index is None:
+        if documentationVersion:
+            versions = ofdoc.indexfile.storeVersions( indexPath )
+            print 'Error: No index found for the version ' + documentationVersion + '.',
+            print 'Versions in the index store: ' + ( ', '.join( versions ) if versions else 'none' )
+        else:
+            print 'Error: No index found.'
+        sys.exit(1)
+    return index
+
+
+###################################################################################################
+
+def indexStamp():
+    
+    """Modification dates of the index files, to know when generate-index.py updated the index. All
+    the files written by generate-index.py are checked: an update may only change some of them."""
+    
+    import ofdoc.fuzzy
+    import ofdoc.signatures
+    import ofdoc.search
+    import ofdoc.offline
+    stamp = []
+    for fileName in ( ofdoc.indexfile.BINARY_INDEX_FILE_NAME, ofdoc.indexfile.TEXT_INDEX_FILE_NAME, ofdoc.indexfile.STORE_FILE_NAME,
+                      ofdoc.indexfile.TAGS_FILE_NAME, ofdoc.fuzzy.FUZZY_INDEX_FILE_NAME, ofdoc.signatures.SIGNATURES_FILE_NAME,
+                      ofdoc.search.SEARCH_INDEX_FILE_NAME, ofdoc.offline.OFFLINE_PACK_FILE_NAME ):
+        filePath = os.path.join( indexPath, fileName )
+        stamp.append( os.path.getmtime( filePath ) if os.path.exists( filePath ) else None )
+    return stamp
+
+
+###################################################################################################
+
+# Open the local copy of the documentation rather than the online one
+offline = ( offlineDocumentation or '--offline' in options ) and '--online' not in options
+if offline:
+    documentationURL = offlineDocumentationURL()
+
+if '--daemon' in options:
+    
+    if not ofdoc.daemon.isAvailable():
+        print 'Error: The resident mode is not available on this platform.'
+        sys.exit(1)
+    
+    # Keep the index open, and reopen it when it changes
+    daemonState = { 'index': openIndex(), 'stamp': indexStamp() }
+    
+    def handleRequest( fields ):
+        global documentationURL
+        if fields[0] not in ( 'lookup', 'choose', 'complete', 'search' ) or len( fields ) < 2:
+            return ( 'Error: Unknown request', None )
+        if fields[0] == 'complete':
+            return ( '\n'.join( completeKeyword( fields[1] ) ), None )
+        if fields[0] == 'search':
+            return ( '\n'.join( searchDocumentation( fields[1] ) ), None )
+        stamp = indexStamp()
+        if stamp != daemonState[ 'stamp' ]:
+            daemonState[ 'index' ].close()
+            daemonState[ 'index' ] = openIndex()
+            daemonState[ 'stamp' ] = stamp
+            if offline:
+                documentationURL = offlineDocumentationURL()
+        # The project of the client, the one of the daemon for an older client
+        project = fields[2] if len( fields ) > 2 else projectPath
+        ( message, action ) = findDocumentation( daemonState[ 'index' ], fields[1], project, fields[0] == 'choose' )
+        print message
+        sys.stdout.flush()
+        return ( message, action )
+    
+    print 'Waiting for lookups on ' + daemonSocketPath
+    sys.stdout.flush()
+    if not ofdoc.daemon.serve( daemonSocketPath, handleRequest ):
+        print 'Error: A daemon is already running for this index.'
+        sys.exit(1)
+    sys.exit(0)
+
+if '--batch' in options:
+    import ofdoc.resolver
+    resolver = ofdoc.resolver.openResolver( indexPath, documentationURL, documentationVersion )
+    if resolver is None:
+        # Print the error and exit
+        openIndex()
+    if not keywords or keywords[0] == '-':
+        ofdoc.resolver.resolveStream( resolver, sys.stdin, sys.stdout )
+    else:
+        with open( keywords[0], 'r' ) as source:
+            ofdoc.resolver.resolveStream( resolver, source, sys.stdout )
+    sys.exit(0)
+
+if '--complete' in options:
+    for name in completeKeyword( keyword ):
+        print name
+    sys.exit(0)
+
+if '--search' in options:
+    for line in searchDocumentation( keyword ):
+        print line
+    sys.exit(0)
 
-print 'Item not found in the documentation'
-webbrowser.open( documentationURL )
+index = openIndex()
+( message, action ) = findDocumentation( index, keyword, projectPath, '--choose' in options )
+print message
+action()
+index.close()